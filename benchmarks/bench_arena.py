@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Time-stepping loop with and without the scratch-buffer arena
+
+    python benchmarks/bench_arena.py [ncells]
+
+Created on Sun Oct 18 21:48:36 2026
+
+@author: chris
+"""
+
+import sys
+import time
+import numpy as np
+
+import tablarray as ta
+
+
+def step_loop(E, dE, nsteps):
+    for _ in range(nsteps):
+        E = E + 0.01 * ta.sqrt(abs(E * dE))
+    return E
+
+
+def main(ncells=10 ** 6, nsteps=50):
+    E = ta.TablArray(np.random.rand(ncells, 2), 1)
+    dE = ta.TablArray(np.random.rand(2), 1)
+    print('%d cells, %d steps' % (ncells, nsteps))
+    for name, ctx in [('no arena', ta.arena(False)),
+                      ('arena', ta.arena())]:
+        with ctx:
+            step_loop(E, dE, 2)
+            t0 = time.perf_counter()
+            step_loop(E, dE, nsteps)
+            dt = time.perf_counter() - t0
+        print('%-10s %8.2f ms/step' % (name, dt / nsteps * 1e3))
+    print(ta.arena_info())
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compare peak memory and throughput of blocked and threaded execution
+against one call
+
+    python benchmarks/bench_blocked.py [ncells]
+
+Peak memory is traced by tracemalloc, which sees numpy allocations, and
+counts everything allocated during the op including its result.
+
+Created on Sun Oct 18 12:52:44 2026
+
+@author: chris
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+import tablarray as ta
+
+
+def measure(func, repeat=3):
+    """return (best seconds, peak bytes) of func()"""
+    best = None
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        func()
+        dt = time.perf_counter() - t0
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        best = dt if best is None else min(best, dt)
+    return best, peak
+
+
+def main(ncells=10 ** 6):
+    a = ta.TablArray(np.random.randn(ncells, 1, 3).astype(np.float32), 1)
+    b = ta.TablArray(np.random.randn(1, 4, 3).astype(np.float32), 1)
+    i = ta.TablArray(np.arange(12).reshape(4, 3), 1)
+    cases = [
+        ('a * b', lambda: a * b),
+        ('a + i', lambda: a + i),
+        ('sqrt(abs(a))', lambda: ta.sqrt(abs(a))),
+        ('a > 0', lambda: a > 0),
+        ('cumsum(a.table)', lambda: ta.cumsum(a.table, axis=0))]
+    print('%d cells' % ncells)
+    print('%-18s %-10s %10s %12s' % ('op', 'mode', 'Melem/s', 'peak MB'))
+    ncpu = os.cpu_count() or 1
+    for name, func in cases:
+        size = (func()).base.size
+        for mode, opts in [('one call', {}),
+                           ('blocked', {'threshold': 0}),
+                           ('threads', {'workers': ncpu,
+                                        'parallel_threshold': 0})]:
+            with ta.execution(**opts):
+                dt, peak = measure(func)
+            print('%-18s %-10s %10.1f %12.1f'
+                  % (name, mode, size / dt / 1e6, peak / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Overhead of TablArray wrappers against raw numpy, per wrapper family
+
+    python benchmarks/bench_dispatch.py [ncells]
+
+For each family, time the tablarray call and the equivalent numpy call on
+.base arrays, and report the ratio. Small tables (default 100 cells) show
+the Python overhead of the wraps.
+
+The target is under 2x numpy at 100 cells. Families whose numpy call takes
+about 1 us (one ufunc, or a view) stay above it: building the result
+TablArray alone costs about 1 us, and numpy's own indexing about 0.2 us.
+Their overhead is reported as ta us - numpy us, which is the number to keep
+down there.
+
+Created on Sun Oct 18 14:58:12 2026
+
+@author: chris
+"""
+
+import sys
+import timeit
+import numpy as np
+
+import tablarray as ta
+
+
+def cases(ncells):
+    a = ta.TablArray(np.random.rand(ncells, 3) + 1, 1)
+    b = ta.TablArray(np.random.rand(3), 1)
+    m = ta.TablArray(np.random.rand(ncells, 3, 3) + 3 * np.eye(3), 2)
+    x, y, mm = a.base, b.base, m.base
+    v = np.arange(3)
+    return [
+        # family, tablarray call, raw numpy call
+        ('binary ta+ta', lambda: a + b, lambda: x + y),
+        ('binary ta*scalar', lambda: a * 2.0, lambda: x * 2.0),
+        ('binary ta*ndarray', lambda: a * v, lambda: x * v),
+        ('elementwise', lambda: ta.sqrt(a), lambda: np.sqrt(x)),
+        ('ax2scalar', lambda: ta.sum(a), lambda: np.sum(x, axis=1)),
+        ('broadcastaxial', lambda: ta.cumsum(a, axis=0),
+         lambda: np.cumsum(x, axis=1)),
+        ('multiop', lambda: ta.where(a > 1.5, a, b),
+         lambda: np.where(x > 1.5, x, y)),
+        ('matmul', lambda: ta.matmul(m, a),
+         lambda: np.einsum('...ij,...j->...i', mm, x)),
+        ('linalg', lambda: ta.linalg.inv(m), lambda: np.linalg.inv(mm)),
+        ('gufunc solve', lambda: ta.linalg.solve(m, a),
+         lambda: np.linalg.solve(mm, x[..., None])[..., 0]),
+        ('view', lambda: a.cell[0], lambda: x[..., 0])]
+
+
+def main(ncells=100, number=20000):
+    print('%d cells' % ncells)
+    print('%-20s %10s %10s %10s %8s'
+          % ('family', 'ta us', 'numpy us', 'overhead', 'ratio'))
+    for name, ta_func, np_func in cases(ncells):
+        t_ta = min(timeit.repeat(ta_func, number=number, repeat=3)) / number
+        t_np = min(timeit.repeat(np_func, number=number, repeat=3)) / number
+        print('%-20s %10.2f %10.2f %10.2f %8.2f'
+              % (name, t_ta * 1e6, t_np * 1e6, (t_ta - t_np) * 1e6,
+                 t_ta / t_np))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Component-wise formulas on table-major vs cell-major TablArray layouts
+
+    python benchmarks/bench_layout.py [ncells]
+
+Created on Sun Oct 18 18:40:12 2026
+
+@author: chris
+"""
+
+import sys
+import timeit
+import numpy as np
+
+import tablarray as ta
+
+
+def main(ncells=10 ** 6, number=20):
+    E = ta.TablArray(np.random.randn(ncells, 2), 1)
+    print('%d cells' % ncells)
+    print('%-14s %12s %12s' % ('layout', 'En ms', 'E * 2 ms'))
+    for layout in ['table-major', 'cell-major']:
+        E2 = ta.as_layout(E, layout)
+        t_en = min(timeit.repeat(lambda: E2.cell[0]**2 + E2.cell[1]**2,
+                                 number=number, repeat=3)) / number
+        t_mul = min(timeit.repeat(lambda: E2 * 2, number=number,
+                                  repeat=3)) / number
+        print('%-14s %12.2f %12.2f' % (layout, t_en * 1e3, t_mul * 1e3))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
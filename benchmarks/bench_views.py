@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-access cost of TablArray views, and of small-table ops which use them
+
+    python benchmarks/bench_views.py
+
+Created on Sun Oct 18 14:22:51 2026
+
+@author: chris
+"""
+
+import timeit
+import numpy as np
+
+import tablarray as ta
+
+
+def main(number=100000):
+    a = ta.TablArray(np.ones((4, 3, 2)), 1)
+    b = ta.TablArray(np.ones((3, 1)), 1)
+    cases = [
+        ('a.cell', lambda: a.cell),
+        ('a.table', lambda: a.table),
+        ('a.bcast', lambda: a.bcast),
+        ('a.array', lambda: a.array),
+        ('a.cell[0]', lambda: a.cell[0]),
+        ('ta.sum(a.table)', lambda: ta.sum(a.table)),
+        ('a + b', lambda: a + b),
+        ('new view (uncached)', lambda: ta.TablArray(a.base, a.ts, 'cell'))]
+    print('%-22s %10s' % ('access', 'us/call'))
+    for name, func in cases:
+        dt = min(timeit.repeat(func, number=number, repeat=3))
+        print('%-22s %10.3f' % (name, dt / number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
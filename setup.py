@@ -34,7 +34,7 @@ setuptools.setup(
         'tablarray.tests']),
     python_requires='>=3.2',
     install_requires=[
-        'numpy',
+        'numpy>=1.24',
         'matplotlib',
         'attrs'],
     tests_require=['pytest'],
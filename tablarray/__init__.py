@@ -21,13 +21,26 @@ from .tanumpy import *
 
 from .version import __version__, __status__
 
+from .taextract import extract
+from .group import groupby_reduce
 from .misc import *
 from .mmul import *
+from .ragged import RaggedTablArray
 from .re import *
+from .re import as_layout, layout
 from .set import *
 from .solve import *
+from .stream import reduce_chunks
 from .stack import *
 from .ta import *
+from .taarena import arena, arena_clear, arena_info, get_arena, set_arena
+from .tacow import copyonwrite, get_copyonwrite, set_copyonwrite
+from .taexec import execution, get_execution, set_execution
+from .taio import open_memmap, read_header, save_memmap
+from .talazy import LazyTablArray, expr, islazy, lazy
 from .taplot import *
+from .taprecision import *
 from .taprint import *
 from .views import *
+from .wraps.cbroadcast import (broadcast_cache_clear, broadcast_cache_info,
+                               set_broadcast_cache_size)
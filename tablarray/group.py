@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Group-by reductions, keyed by a label TablArray
+
+Created on Sun Oct 18 19:45:16 2026
+
+@author: chris
+"""
+
+import numpy as np
+
+from . import misc
+
+_reductions = {
+    'sum': np.add, 'prod': np.multiply, 'min': np.minimum,
+    'max': np.maximum, 'mean': None, 'var': None, 'std': None,
+    'count': None}
+
+
+def _gather(base, axis, bshape, gshape, order):
+    """base sorted into contiguous group runs along axis, in one gather.
+    The group axes of base (bshape, starting at axis) broadcast to gshape,
+    order indexes the flattened gshape, so broadcast axes are indexed at 0
+    rather than materialized"""
+    if not bshape:
+        base = np.expand_dims(base, axis)
+        bshape = (1,)
+        gshape = gshape or (1,)
+    pos = np.unravel_index(order, gshape)[len(gshape) - len(bshape):]
+    index = tuple(p if n > 1 else np.zeros_like(p)
+                  for p, n in zip(pos, bshape))
+    return base[(slice(None),) * axis + index]
+
+
+def groupby_reduce(values, labels, func, view='table', ddof=0):
+    """
+    Reduce values per group of equal labels, in one vectorized pass::
+
+        # mean E per mode index, where mode is t(N, M)|c() like E
+        Emean, modes = ta.groupby_reduce(E, mode, 'mean')
+
+    Labels are sorted once, then every group is reduced by ufunc.reduceat
+    over contiguous runs, so there is no loop over unique labels.
+
+    Parameters
+    ----------
+    values : TablArray
+    labels : TablArray with cdim=0, or array-like
+        With view='table', labels broadcast against the tabular shape of
+        values, so degenerate axes of either need not be meshed. With
+        view='cell', against the cellular shape.
+    func : str or function
+        sum, prod, min, max, mean, var, std or count
+    view : 'table' or 'cell'
+        'table' groups whole cells (the cellular shape is kept), 'cell'
+        groups the elements within each cell (the tabular shape is kept)
+    ddof : int
+        delta degrees of freedom for var and std
+
+    Returns
+    -------
+    rval : TablArray
+        with view='table', tshape (ngroups,) and the cshape of values.
+        With view='cell', the tshape of values and cshape (ngroups,)
+    groups : ndarray
+        the sorted unique labels, i.e. along the new group axis
+    """
+    name = func if type(func) is str else func.__name__
+    if name not in _reductions:
+        raise ValueError('groupby_reduce does not support %s' % name)
+    if not misc.istablarray(values):
+        raise TypeError('values must be TablArray')
+    if misc.istablarray(labels):
+        if labels.ts.cdim != 0:
+            raise ValueError('labels must have cdim=0')
+        labels = labels.base
+    ts = values.ts
+    labels = np.asarray(labels)
+    base = values.base
+    if view == 'table':
+        bshape = ts.tshape
+        gaxis = 0
+    elif view == 'cell':
+        bshape = ts.cshape
+        gaxis = ts.tdim
+    else:
+        raise ValueError("view must be 'table' or 'cell'")
+    gshape = np.broadcast_shapes(labels.shape, bshape)
+    labels = np.broadcast_to(labels, gshape).ravel()
+    groups, inverse = np.unique(labels, return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    counts = np.bincount(inverse, minlength=len(groups))
+    # with empty input there are no groups, and no starts
+    starts = np.cumsum(counts) - counts
+    # the grouped axes flatten into one axis, sorted into contiguous runs
+    flat = _gather(base, gaxis, bshape, gshape, order)
+    # counts, aligned to broadcast along the group axis
+    ncounts = counts.reshape((-1,) + (1,) * (flat.ndim - gaxis - 1))
+    if name == 'count':
+        shape = list(flat.shape)
+        shape[gaxis] = len(groups)
+        rarray = np.broadcast_to(ncounts, shape).copy()
+    elif _reductions[name] is not None:
+        rarray = _reductions[name].reduceat(flat, starts, axis=gaxis)
+    else:
+        mean = np.add.reduceat(flat, starts, axis=gaxis) / ncounts
+        if name == 'mean':
+            rarray = mean
+        else:
+            dev = flat - np.repeat(mean, counts, axis=gaxis)
+            rarray = (np.add.reduceat(np.abs(dev) ** 2, starts, axis=gaxis)
+                      / (ncounts - ddof))
+            if name == 'std':
+                rarray = np.sqrt(rarray)
+    cdim = ts.cdim if view == 'table' else 1
+    return values.__class__(rarray, cdim, values.view), groups
@@ -10,13 +10,40 @@ Created on Sun Jan  3 15:34:31 2021
 
 import numpy as np
 
+from . import tacow
+
+
+# types which are known to be TablArray (registered by the class itself),
+# or known not to be, so istablarray can skip duck-typing
+_tablarray_types = set()
+_plain_types = {np.ndarray, int, float, complex, bool, list, tuple,
+                type(None), np.float64, np.int64, np.complex128, np.bool_}
+
 
 def istablarray(a):
     """returns True/False if argument appears to fulfill TablArray class"""
+    a_type = type(a)
+    if a_type in _tablarray_types:
+        return True
+    elif a_type in _plain_types:
+        return False
     return (hasattr(a, 'ts') and hasattr(a, 'view') and hasattr(a, 'base')
             and hasattr(a, 'base') and hasattr(a, 'bcast'))
 
 
+def _overrides_ufuncs(a):
+    """returns True/False if argument handles numpy ufuncs itself, i.e. has
+    an __array_ufunc__ other than those of ndarray and TablArray (e.g.
+    RaggedTablArray)"""
+    a_type = type(a)
+    if a_type in _tablarray_types or a_type in _plain_types:
+        return False
+    override = getattr(a_type, '__array_ufunc__', None)
+    return (override is not None
+            and override is not np.ndarray.__array_ufunc__
+            and not istablarray(a))
+
+
 def istablaset(a):
     """returns True/False if argument appears to fulfill TablaSet class"""
     return (hasattr(a, '_tablarrays') and hasattr(a, 'ts') and hasattr(a, 'keys')
@@ -29,9 +56,20 @@ def base(a):
 
 
 def _rval_once_a_ta(rclass, rval, cdim, view):
-    """"""
-    if rval.ndim == cdim:
+    """wrap rval as rclass, unless it has no tabular dims left
+
+    A tuple (e.g. from ufuncs with several outputs) is wrapped per item"""
+    if type(rval) is tuple:
+        return tuple(_rval_once_a_ta(rclass, item, cdim, view)
+                     for item in rval)
+    if type(rval) is np.ndarray:
+        if rval.ndim == cdim:
+            return rval
+    elif np.ndim(rval) == cdim:
         return rval
+    if rclass in _tablarray_types and isinstance(rval, np.ndarray):
+        # rval is a fresh result, so skip the checks of __init__
+        return rclass._from_trusted(rval, cdim, view)
     return rclass(rval, cdim, view)
 
 
@@ -39,6 +77,35 @@ def _rval_always_ta(rclass, rval, cdim, view):
     return rclass(rval, cdim, view)
 
 
+# features which need the full paths of wraps, i.e. lazy recording, blocked
+# or threaded execution, a precision policy or the arena. While none is
+# active, wraps take their fast paths
+_active_features = set()
+
+
+def _set_active(feature, active):
+    """record whether feature is active, see _active_features"""
+    if active:
+        _active_features.add(feature)
+    else:
+        _active_features.discard(feature)
+
+
+def _check_out(out, shape, cdim):
+    """validate an out= TablArray against the shape and cdim of a result,
+    shape=None skips the shape check, then give out a private buffer if it
+    is a copy-on-write copy"""
+    if not istablarray(out):
+        raise TypeError('out must be TablArray type, got %s' % type(out))
+    if out.ts.cdim != cdim:
+        raise ValueError('out cdim %d mismatches required cdim %d'
+                         % (out.ts.cdim, cdim))
+    if shape is not None and out.base.shape != tuple(shape):
+        raise ValueError('out.base shape %s mismatches required shape %s'
+                         % (out.base.shape, tuple(shape)))
+    tacow.detach(out)
+
+
 def _imply_shape(ll):
     """given a list [of list ...] of something
 
@@ -49,37 +116,78 @@ def _imply_shape(ll):
     return len(ll), *_imply_shape(ll[0])
 
 
+def _flatten_ragged(ll):
+    """given a possibly-ragged list [of list ...] of something, flatten it
+    in one pass, level by level
+
+    Returns
+    -------
+    tshape : tuple
+        the padded shape, i.e. max length at every depth
+    levels : list of (tuple of ndarray, list)
+        per depth where non-list objects were found, their index into the
+        padded shape (one int array per dim down to that depth) and the
+        objects themselves, in order
+    """
+    nodes = [ll]
+    index = ()
+    tshape = ()
+    levels = []
+    while nodes:
+        lengths = np.array([len(node) for node in nodes], dtype=int)
+        children = [child for node in nodes for child in node]
+        # index of every child: its parent's index, plus its position
+        parent = np.repeat(np.arange(len(nodes)), lengths)
+        starts = np.cumsum(lengths) - lengths
+        position = np.arange(len(children)) - starts[parent]
+        index = tuple(idx[parent] for idx in index) + (position,)
+        tshape = tshape + (int(lengths.max(initial=0)),)
+        is_list = np.array([type(child) is list for child in children],
+                           dtype=bool)
+        if not is_list.all():
+            is_leaf = ~is_list
+            leaves = [child for child, leaf in zip(children, is_leaf)
+                      if leaf]
+            levels.append((tuple(idx[is_leaf] for idx in index), leaves))
+        nodes = [child for child, lst in zip(children, is_list) if lst]
+        index = tuple(idx[is_list] for idx in index)
+    return tshape, levels
+
+
 def _imply_shape_ragged(ll):
     """given a possibly-ragged list [of list ...] of something
 
-    recursively imply the required padded shape
-
-    Note: Ragged recursion means reaching every element so this doesn't scale
-    well.
+    imply the required padded shape
     """
-    if type(ll) is list:
-        sub_shapes = []
-        for row in ll:
-            sub_shape = _imply_shape_ragged(row)
-            if sub_shape is not None:
-                sub_shapes.append(sub_shape)
-        n = len(sub_shapes)
-        mx_sub_shape = ()
-        if n >= 1:
-            mx_sub_shape = sub_shapes[0]
-        for a in range(n):
-            mx_sub_shape = np.maximum(mx_sub_shape, sub_shapes[a])
-        return len(ll), *mx_sub_shape
-    else:
-        return None
+    return _flatten_ragged(ll)[0]
+
+
+def _scatter_ragged(array, tdim, levels, getter=None):
+    """load the objects of levels (see _flatten_ragged) into the padded
+    array of tdim tabular dims, with one assignment per level
+
+    getter(obj) optionally extracts the value to load from each object"""
+    for index, leaves in levels:
+        if getter is not None:
+            leaves = [getter(leaf) for leaf in leaves]
+        values = np.asarray(leaves)
+        # objects found above the deepest level fill a whole sub-table
+        missing = tdim - len(index)
+        values = values.reshape(
+            values.shape[:1] + (1,) * missing + values.shape[1:])
+        array[index] = values
 
 
 def _get_1st_obj(ll):
     """given a list [of list ...] of something
 
-    get the first non-list object
+    get the first non-list object, skipping any empty lists
     """
     if type(ll) is not list:
         return ll
-    return _get_1st_obj(ll[0])
+    for row in ll:
+        obj = _get_1st_obj(row)
+        if type(obj) is not list:
+            return obj
+    return ll
 
@@ -9,9 +9,12 @@ Created on Sun Jan 19 11:26:17 2020
 import numpy as _np
 
 from . import misc
+from . import talazy
+from . import taprecision
 
 def mmul_ta_signature(arg, mxdim):
     """Given a TablArray or np.ndarray, return a TablArray"""
+    arg = talazy.evaluated(arg)
     if misc.istablarray(arg):
         # arg is TablArray type
         array = arg
@@ -33,7 +36,7 @@ def mmul_ta_signature(arg, mxdim):
     return array
 
 
-def _matmul_MV(a, b):
+def _matmul_MV(a, b, out=None, **kwargs):
     """matrix-vector multiplication a, b supporting tabular super-structure
     and/or broadcasting
 
@@ -49,10 +52,10 @@ def _matmul_MV(a, b):
     # matmul 2d matrix by vector
     subscripts = '...ij,...j->...i'
     # do einsum of a,b using the subscripts
-    return _np.einsum(subscripts, a, b)
+    return _np.einsum(subscripts, a, b, out=out, **kwargs)
 
 
-def _matmul_MM(a, b):
+def _matmul_MM(a, b, out=None, **kwargs):
     """matrix-matrix multiplication a, b supporting tabular super-structure
     and/or broadcasting
 
@@ -68,10 +71,20 @@ def _matmul_MM(a, b):
     # matmul 2d matrix by 2d matrix
     subscripts = '...ij,...jk->...ik'
     # do einsum of a,b using the subscripts
-    return _np.einsum(subscripts, a, b)
+    return _np.einsum(subscripts, a, b, out=out, **kwargs)
 
 
-def matmul(a, b):
+def _policy_kwargs(a, b, name):
+    """dtype= and casting= for einsum, computing at the dtype of the
+    precision policy rather than casting afterwards"""
+    if not taprecision.isactive():
+        return {}
+    dtype = _np.result_type(a.base, b.base)
+    dtype = taprecision.policy_dtype(dtype, (a, b), name)
+    return dict(dtype=dtype, casting='same_kind')
+
+
+def matmul(a, b, out=None):
     """Fast matrix multiplication with TablArray compatibility.
 
     Signatures::
@@ -79,12 +92,15 @@ def matmul(a, b):
         c = matmul(a: TablArray, b: TablArray)
         c = matmul(a: ndarray, b: ndarray)
         c = matmul(a: ndarray, b: TablArray)
+        matmul(a, b, out=c)     # c: TablArray receives the result
 
     Where allowed cdim are::
 
         (a: 1d, b: 1d)  # vector dot product
         (a: 2d, b: 1d)  # multiply matrix by vector
         (a: 2d, b: 2d)  # multiply matrix by matrix
+
+    out must not share memory with a or b.
     """
     a = mmul_ta_signature(a, mxdim=2)
     b = mmul_ta_signature(b, mxdim=2)
@@ -92,14 +108,19 @@ def matmul(a, b):
     # setup the subscripts to achieve matmul
     if a.ts.cdim == 2 and b.ts.cdim == 1:
         # matmul 2d matrix by vector
-        rarray = _matmul_MV(a.base, b.base)
-        return rclass(rarray, 1, a.view)
+        matmul_func, cdim = _matmul_MV, 1
     elif a.ts.cdim == 2 and b.ts.cdim == 2:
         # matmul 2d matrix by 2d matrix
-        rarray = _matmul_MM(a.base, b.base)
-        return rclass(rarray, 2, a.view)
+        matmul_func, cdim = _matmul_MM, 2
     else:
         raise ValueError('matmul works on 1d and/or 2d cells (cdim)')
+    if out is not None:
+        # einsum validates the shape of out
+        misc._check_out(out, None, cdim)
+        matmul_func(a.base, b.base, out=out.base)
+        return out
+    rarray = matmul_func(a.base, b.base, **_policy_kwargs(a, b, 'matmul'))
+    return rclass(rarray, cdim, a.view)
 
 
 def dot(a, b):
@@ -111,7 +132,8 @@ def dot(a, b):
     rclass = a.__class__
     if a.ts.cdim == 1 and b.ts.cdim == 1:
         # dot product of vectors
-        rarray = _np.einsum('...i,...i->...', a.base, b.base)
+        rarray = _np.einsum('...i,...i->...', a.base, b.base,
+                            **_policy_kwargs(a, b, 'dot'))
         return rclass(rarray, 0, a.view)
     else:
         raise ValueError('dot works on 1d cells (cdim)')
@@ -123,8 +145,14 @@ def cross(a, b):
     b = mmul_ta_signature(b, mxdim=1)
     rclass = a.__class__
     if a.ts.cdim == 1 and b.ts.cdim == 1:
-        # cross product of vectors
-        rarray = _np.cross(a.base, b.base)
+        # cross product of vectors, np.cross has no dtype=, so the
+        # operands are cast to the dtype of the precision policy
+        a_base, b_base = a.base, b.base
+        dtype = _policy_kwargs(a, b, 'cross').get('dtype')
+        if dtype is not None:
+            a_base = a_base.astype(dtype, copy=False)
+            b_base = b_base.astype(dtype, copy=False)
+        rarray = _np.cross(a_base, b_base)
         return rclass(rarray, 1, a.view)
     else:
         raise ValueError('cross works on 1d cells (cdim=1')
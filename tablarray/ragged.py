@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RaggedTablArray, tables where every row has its own length
+
+Cells of all rows are stored back to back in one values buffer, and
+offsets mark where each row starts, so nothing is padded::
+
+    r = ta.RaggedTablArray.from_rows([[1., 2.], [], [3., 4., 5.]])
+    r.sum()         # TablArray, one cell per row
+    (2 * r + 1).to_padded(blank=np.nan)
+
+Created on Sun Oct 18 16:05:44 2026
+
+@author: chris
+"""
+
+import numpy as np
+
+from . import misc
+
+
+class RaggedTablArray(np.lib.mixins.NDArrayOperatorsMixin):
+    """
+    RaggedTablArray (ragged Table-Array)
+    ------------------------------------
+    A table of nrows rows, where row i has its own number of cells. Cells
+    of every row are stored back to back in values, and row i is
+    values[offsets[i]:offsets[i + 1]].
+
+    Elementwise operators and numpy ufuncs work on values. Another operand
+    may be a RaggedTablArray with the same offsets, a scalar or cell-like
+    ndarray, or a TablArray with one cell per row (tshape (nrows,)) or a
+    single cell (tdim=0).
+
+    Parameters
+    ----------
+    values : array-like
+        cells of all rows, shape (n cells, *cshape)
+    offsets : array-like of int
+        nrows + 1 increasing offsets into values, starting at 0
+    """
+
+    def __init__(self, values, offsets):
+        self.values = np.asarray(values)
+        self.offsets = np.asarray(offsets, dtype=np.intp)
+        if self.values.ndim == 0:
+            raise ValueError('values must have a dim of cells')
+        if (self.offsets.ndim != 1 or len(self.offsets) == 0
+                or self.offsets[0] != 0
+                or self.offsets[-1] != len(self.values)
+                or np.any(np.diff(self.offsets) < 0)):
+            raise ValueError('offsets must increase from 0 to len(values)')
+
+    @classmethod
+    def from_rows(cls, rows, dtype=None):
+        """create a RaggedTablArray from a list of rows, each a list of
+        array-like cells"""
+        lengths = [len(row) for row in rows]
+        offsets = np.concatenate(([0], np.cumsum(lengths, dtype=np.intp)))
+        cells = [cell for row in rows for cell in row]
+        values = np.asarray(cells, dtype=dtype)
+        if len(cells) == 0 and values.ndim == 1:
+            values = values.astype(float if dtype is None else dtype)
+        return cls(values, offsets)
+
+    @classmethod
+    def from_padded(cls, a, lengths):
+        """create a RaggedTablArray from the first lengths[i] cells of each
+        row of a padded TablArray a, with tshape (nrows, max length)"""
+        base = misc.base(a)
+        lengths = np.asarray(lengths, dtype=np.intp)
+        rows, cols = _row_col(lengths)
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        return cls(base[rows, cols], offsets)
+
+    @property
+    def nrows(self):
+        return len(self.offsets) - 1
+
+    @property
+    def lengths(self):
+        """number of cells in each row"""
+        return np.diff(self.offsets)
+
+    @property
+    def cshape(self):
+        return self.values.shape[1:]
+
+    @property
+    def cdim(self):
+        return self.values.ndim - 1
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    def __len__(self):
+        return self.nrows
+
+    def __repr__(self):
+        return 'RaggedTablArray(%d rows, %d cells, c%s, %s)' % (
+            self.nrows, len(self.values), self.cshape, self.dtype)
+
+    def __getitem__(self, row):
+        """row (int) as a TablArray of its cells"""
+        from .ta import TablArray
+        if row < 0:
+            row += self.nrows
+        if not 0 <= row < self.nrows:
+            raise IndexError('row %d out of range' % row)
+        start, stop = self.offsets[row], self.offsets[row + 1]
+        return TablArray(self.values[start:stop], self.cdim)
+
+    def _with_values(self, values):
+        """a RaggedTablArray sharing my offsets"""
+        rval = RaggedTablArray.__new__(RaggedTablArray)
+        rval.values = values
+        rval.offsets = self.offsets
+        return rval
+
+    def _cast_other(self, other):
+        """align other with values, i.e. shape (n cells or 1, ..cells)"""
+        if isinstance(other, RaggedTablArray):
+            if not (other.offsets is self.offsets
+                    or np.array_equal(other.offsets, self.offsets)):
+                raise ValueError('RaggedTablArray offsets mismatch')
+            return other.values, other.cdim
+        if misc.istablarray(other):
+            tshape = other.ts.tshape
+            cdim = other.ts.cdim
+            if len(tshape) == 0:
+                return other.base[None], cdim
+            if tshape[-1] == 1 and len(tshape) == 2:
+                tshape = tshape[:1]
+            if tshape == (1,):
+                return other.base.reshape(other.ts.cshape)[None], cdim
+            elif tshape == (self.nrows,):
+                # one cell per row, repeated across the row
+                base = other.base.reshape((self.nrows,) + other.ts.cshape)
+                return np.repeat(base, self.lengths, axis=0), cdim
+            raise ValueError("couldn't broadcast TablArray t%s against %d "
+                             "ragged rows" % (other.ts.tshape, self.nrows))
+        # scalars and ndarray broadcast against cells
+        other = np.asarray(other)
+        return other[None], other.ndim
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if method != '__call__' or ufunc.nout != 1 or 'out' in kwargs:
+            return NotImplemented
+        cast = [self._cast_other(arg) for arg in inputs]
+        cdim = max(c for _, c in cast)
+        # insert singleton cell axes so cells of any cdim right-align
+        args = [v.reshape(v.shape[:1] + (1,) * (cdim - c) + v.shape[1:])
+                for v, c in cast]
+        return self._with_values(ufunc(*args, **kwargs))
+
+    def apply(self, func, *args, **kwargs):
+        """elementwise func(values, *args, **kwargs), for non-ufuncs"""
+        return self._with_values(func(self.values, *args, **kwargs))
+
+    def reduce(self, ufunc, blank=0):
+        """
+        Reduce each row with ufunc.reduceat, returning a TablArray with one
+        cell per row. Empty rows get blank.
+        """
+        from .ta import TablArray
+        lengths = self.lengths
+        nonempty = lengths > 0
+        dtype = np.result_type(_reduce_dtype(ufunc, self.dtype), blank)
+        rval = np.empty((self.nrows,) + self.cshape, dtype=dtype)
+        rval[~nonempty] = blank
+        if np.any(nonempty):
+            rval[nonempty] = ufunc.reduceat(
+                self.values, self.offsets[:-1][nonempty], axis=0)
+        return TablArray(rval, self.cdim)
+
+    def sum(self):
+        """sum of cells in each row (0 for empty rows)"""
+        return self.reduce(np.add, 0)
+
+    def prod(self):
+        """product of cells in each row (1 for empty rows)"""
+        return self.reduce(np.multiply, 1)
+
+    def max(self, blank=np.nan):
+        """max of cells in each row (blank for empty rows)"""
+        return self.reduce(np.maximum, blank)
+
+    def min(self, blank=np.nan):
+        """min of cells in each row (blank for empty rows)"""
+        return self.reduce(np.minimum, blank)
+
+    def mean(self):
+        """mean of cells in each row (nan for empty rows)"""
+        from .ta import TablArray
+        total = self.sum().base
+        lengths = self.lengths.reshape((-1,) + (1,) * self.cdim)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return TablArray(total / lengths, self.cdim)
+
+    def to_padded(self, blank=0, dtype=None):
+        """
+        Return a TablArray of tshape (nrows, max length), where rows are
+        padded with blank.
+        """
+        from .ta import TablArray
+        lengths = self.lengths
+        width = int(lengths.max(initial=0))
+        dtype = np.result_type(self.values, blank) if dtype is None else dtype
+        rarray = np.full((self.nrows, width) + self.cshape, blank,
+                         dtype=dtype)
+        rows, cols = _row_col(lengths)
+        rarray[rows, cols] = self.values
+        return TablArray(rarray, self.cdim)
+
+
+def _reduce_dtype(ufunc, dtype):
+    """dtype of ufunc.reduceat over values of dtype, where like np.sum, add
+    and multiply promote bool and small ints to the default int"""
+    if ufunc in (np.add, np.multiply) and dtype.kind in 'biu':
+        return np.result_type(dtype, np.uint if dtype.kind == 'u' else np.int_)
+    return ufunc.resolve_dtypes((dtype, dtype, None), reduction=True)[-1]
+
+
+def _row_col(lengths):
+    """row and column index of every cell, given the length of each row"""
+    rows = np.repeat(np.arange(len(lengths)), lengths)
+    starts = np.cumsum(lengths) - lengths
+    cols = np.arange(len(rows)) - starts[rows]
+    return rows, cols
@@ -118,3 +118,122 @@ def tile(a, reps):
     rarray = np.tile(a.base, tl_reps)
     rclass = a.__class__
     return rclass(rarray, a.ts.cdim, a.view)
+
+
+def broadcast_to(a, shape):
+    """
+    Broadcast a TablArray to a new shape, returning a read-only view which
+    uses no extra memory (see numpy.broadcast_to). Prefer this to tile when
+    the result will only be read, e.g. for plotting or reductions.
+
+    TablArray will broadcast along the current view::
+
+        broadcast_to(a.table, (4, 4))   # (4, 4) is the new tabular shape
+        broadcast_to(a.cell, (3, 2))    # (3, 2) is the new cellular shape
+
+    Parameters
+    ----------
+    a : TablArray or array-like
+        the input array
+    shape : tuple
+        the new shape, w.r.t. view
+
+    Returns
+    -------
+    c : TablArray or ndarray
+        read-only view of a
+    """
+    if not misc.istablarray(a):
+        # just fall back on np.broadcast_to if a is not TablArray
+        return np.broadcast_to(a, shape)
+
+    shape = tuple(shape)
+    base = a.base
+    if a.view == 'table' or a.view == 'bcast':
+        tl_shape = (*shape, *a.ts.cshape)
+        cdim = a.ts.cdim
+    elif a.view == 'cell':
+        tl_shape = (*a.ts.tshape, *shape)
+        cdim = len(shape)
+        # new cellular dims go between tabular and cellular dims
+        pad = (1,) * (cdim - a.ts.cdim)
+        base = base.reshape((*a.ts.tshape, *pad, *a.ts.cshape))
+    elif a.view == 'array':
+        tl_shape = shape
+        cdim = a.ts.cdim
+    else:
+        raise ValueError('unknown view %s' % a.view)
+
+    rarray = np.broadcast_to(base, tl_shape)
+    rclass = a.__class__
+    return rclass(rarray, cdim, a.view)
+
+
+_layouts = ('table-major', 'cell-major')
+
+
+def _layout_axes(ndim, cdim, layout):
+    """axes of a TablArray base, from outermost to innermost in memory"""
+    if layout == 'table-major':
+        return tuple(range(ndim))
+    elif layout == 'cell-major':
+        tdim = ndim - cdim
+        return (*range(tdim, ndim), *range(tdim))
+    raise ValueError('layout must be one of %s' % (_layouts,))
+
+
+def _empty_ordered(shape, dtype, axes):
+    """np.empty of shape, with axes ordered from outermost to innermost in
+    memory"""
+    rarray = np.empty([shape[i] for i in axes], dtype=dtype)
+    return rarray.transpose(np.argsort(axes))
+
+
+def layout(a):
+    """
+    Return the physical memory layout of a TablArray:
+
+        'table-major'   tabular axes outermost, i.e. C order of .base
+        'cell-major'    cellular axes outermost, so each cell component,
+                        e.g. a.cell[0], is contiguous
+        'strided'       neither of the above
+    """
+    base = misc.base(a)
+    if base.flags.c_contiguous:
+        return 'table-major'
+    cdim = a.ts.cdim if misc.istablarray(a) else 0
+    axes = _layout_axes(base.ndim, cdim, 'cell-major')
+    if base.transpose(axes).flags.c_contiguous:
+        return 'cell-major'
+    return 'strided'
+
+
+def as_layout(a, layout_):
+    """
+    Return a TablArray with the same logical shape, values and view, stored
+    in the physical layout 'table-major' or 'cell-major'. If a already has
+    that layout, return a itself.
+
+    .base keeps its logical shape (*tshape, *cshape) in either layout, so
+    every TablArray operation works unchanged. With 'cell-major' strides,
+    component-wise formulas like E.cell[0] * E.cell[1] run on contiguous
+    data, and elementwise results keep the layout of their operands::
+
+        E = ta.as_layout(E, 'cell-major')
+        En = E.cell[0]**2 + E.cell[1]**2
+
+    Parameters
+    ----------
+    a : TablArray
+    layout_ : 'table-major' or 'cell-major'
+    """
+    if not misc.istablarray(a):
+        if layout_ == 'table-major':
+            return np.ascontiguousarray(a)
+        raise TypeError('%s layout needs a TablArray' % layout_)
+    axes = _layout_axes(a.base.ndim, a.ts.cdim, layout_)
+    if layout(a) == layout_:
+        return a
+    rarray = _empty_ordered(a.base.shape, a.base.dtype, axes)
+    rarray[...] = a.base
+    return a.__class__(rarray, a.ts, a.view)
@@ -7,16 +7,25 @@ Created on Sun May 10 15:44:05 2020
 """
 
 import collections
+import copy
+import json
+import operator
+import os
 import numpy as np
 
 # internal imports
 # from . import _tabstr
 from . import taprint
+from . import taio
 from . import misc
 from .ta import TablArray
 from . import re
 
 
+# file listing the elements of a saved TablaSet
+_MANIFEST = 'tablaset.json'
+
+
 def _recursive_loader1(lld):
     """given a list of [list of] dict"""
     def _inner_recursive_loader1(key, sub_dataset, sub_lld):
@@ -38,23 +47,6 @@ def _recursive_loader1(lld):
     return dataset
 
 
-def _recursive_loader2(dataset, lld):
-    keys = dataset.keys()
-
-    def _inner_recursive_loader(sub_lld, *indices):
-        n = len(sub_lld)
-        for a in range(n):
-            sub_sub_lld = sub_lld[a]
-            if type(sub_sub_lld) is list:
-                _inner_recursive_loader(sub_sub_lld, *indices, a)
-            else:
-                for key in keys:
-                    dataset[key].__setitem__((*indices, a),
-                                             sub_sub_lld[key])
-
-    _inner_recursive_loader(lld)
-
-
 class TablaSet(object):
     """
     TablaSet
@@ -173,13 +165,61 @@ class TablaSet(object):
             for key, val in unlayered.items():
                 dataset[key] = TablArray(val, len(cshapes[key]))
         else:
-            tshape = misc._imply_shape_ragged(lld)
+            tshape, levels = misc._flatten_ragged(lld)
             for key in keys:
                 array = np.empty((*tshape, *cshapes[key]), dtype=dtype)
                 array[:] = blank
-                print(tshape, cshapes[key])
+                misc._scatter_ragged(array, len(tshape), levels,
+                                     operator.itemgetter(key))
                 dataset[key] = TablArray(array, len(cshapes[key]))
-            _recursive_loader2(dataset, lld)
+        return dataset
+
+    def save(self, path):
+        """
+        Save to a directory, one .npy file (plus header) per element, in
+        its own compact shape - degenerate axes are not tiled::
+
+            Efield.save('Efield.ta')
+            Efield2 = ta.TablaSet.load('Efield.ta')
+
+        Parameters
+        ----------
+        path : str or path-like
+            directory, created if needed
+        """
+        os.makedirs(path, exist_ok=True)
+        elements = []
+        for i, (key, val) in enumerate(self.items()):
+            fname = 'e%d.npy' % i
+            taio.save_memmap(val, os.path.join(path, fname))
+            elements.append({'key': key, 'file': fname})
+        manifest = {'view': self.view, 'elements': elements}
+        with open(os.path.join(path, _MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=1)
+
+    @classmethod
+    def load(cls, path, lazy=True):
+        """
+        Load a TablaSet saved by save.
+
+        Parameters
+        ----------
+        path : str or path-like
+            directory written by save
+        lazy : bool (default True)
+            If True, elements are copy-on-write memmaps: opening reads only
+            the headers, and data is paged in from disk on first access.
+            Changes stay in memory. If False, read everything now.
+        """
+        with open(os.path.join(path, _MANIFEST)) as f:
+            manifest = json.load(f)
+        dataset = cls(view=manifest['view'])
+        for element in manifest['elements']:
+            val = taio.open_memmap(os.path.join(path, element['file']),
+                                   mode='c')
+            if not lazy:
+                val = TablArray(np.array(val.base), val.ts.cdim, val.view)
+            dataset[element['key']] = val
         return dataset
 
     def _set_ts(self, new_ts):
@@ -260,6 +300,16 @@ class TablaSet(object):
                 rval[keys[i]] = rarrays[i]
         return rval
 
+    def __copy__(self):
+        """returns a copy with copied elements, which costs O(keys) if
+        copy-on-write is enabled (see tacow)"""
+        rval = TablaSet(view=self.view)
+        for key, val in self.items():
+            rval._tablarrays[key] = copy.copy(val)
+        if self.ts is not None:
+            rval._set_ts(self.ts)
+        return rval
+
     def __contains__(self, key):
         return self._tablarrays.__contains__(key)
 
@@ -301,7 +351,7 @@ class TablaSet(object):
     def array(self):
         return self.__view__('array')
 
-    def meshtile(self, *keys):
+    def meshtile(self, *keys, copy=True):
         """
         Tile an element so that it matches the overarching broadcast table
         shape of the TablaSet, same as it appears when printing a bcast view.
@@ -316,6 +366,16 @@ class TablaSet(object):
             tset1 = TablaSet(a=a, b=b, c=c)
             a_m = tset1.meshtile('a')
             b_m, c_m = tset1.meshtile('b', 'c')
+            # read-only views without extra memory
+            b_v, c_v = tset1.meshtile('b', 'c', copy=False)
+
+        Parameters
+        ----------
+        *keys : str
+            elements to tile
+        copy : bool (default True)
+            If False, return read-only broadcast views (see broadcast_to)
+            instead of tiled copies.
         """
         rvals = []
         bcast_tshape = self.ts.tshape
@@ -325,6 +385,8 @@ class TablaSet(object):
             if bcast_tshape == tshape:
                 # skip the rest
                 rvals.append(array)
+            elif not copy:
+                rvals.append(re.broadcast_to(array.table, bcast_tshape))
             else:
                 # determine the number of repetitions along each axis
                 tshape2 = np.ones(self.ts.tdim)
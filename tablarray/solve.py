@@ -37,6 +37,7 @@ import numpy as np
 import re
 
 from . import misc
+from . import tacow
 from . import tanumpy as tanumpy
 
 
@@ -345,7 +346,9 @@ class TablaSolver(object):
                 current = self.tset[key]
                 has_changed = not tanumpy.allclose(old, current)
             self._haschanged[key] = has_changed
-        self._prior_state = copy.copy(self.tset)
+        # the snapshot is only read, so share buffers until tset is written
+        with tacow.copyonwrite():
+            self._prior_state = copy.copy(self.tset)
 
     def _call_solver(self, a):
         """may or may not call a solver, determined by state of dependencies"""
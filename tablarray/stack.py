@@ -12,6 +12,8 @@ import functools
 import numpy as np
 
 from . import misc
+from . import talazy
+from . import taprecision
 from .wraps import cbroadcast
 import tablarray as ta
 
@@ -25,13 +27,12 @@ def _cast_other_types(arrays, view=None):
     1. all TablArray (alignment depends on view)
     2. or all ndarray
     """
+    arrays = [talazy.evaluated(a) for a in arrays]
     first_ta = None
     for a in arrays:
         if misc.istablarray(a):
             first_ta = a
             break
-    if type(arrays) is not list:
-        arrays = list(arrays)
     if first_ta is None:
         # if no arrays are TablArray type
         for i in range(len(arrays)):
@@ -80,6 +81,12 @@ def _wrap_stackers(func, newdim=True):
             basarrays = []
             for a in arrays:
                 basarrays.append(a.base)
+            if (out is None and taprecision.isactive()
+                    and 'dtype' not in kwargs):
+                # stack at the dtype of the precision policy
+                dtype = taprecision.policy_dtype(
+                    np.result_type(*basarrays), basarrays, func.__name__)
+                kwargs = dict(kwargs, dtype=dtype, casting='same_kind')
             rarray = func(basarrays, axis, out, *args, **kwargs)
             rclass = arrays[0].__class__
             return rclass(rarray, cdim)
@@ -146,18 +153,18 @@ def stack_bcast(arrays, axis=0, out=None, view=None):
         >>> b = ta.TablArray([[2, 1], [3, 2]], 1)
         >>> # axis=0 will be along cellular cdim
         >>> stack_bcast((a.cell, b), axis=0)
-        [|[[1. 0.] |
-         | [2. 1.]]|
+        [|[[1 0] |
+         | [2 1]]|
 
-         |[[1. 0.] |
-         | [3. 2.]]|]t(2,)|c(2, 2)
+         |[[1 0] |
+         | [3 2]]|]t(2,)|c(2, 2)
         >>> # axis=-1 will be along tabular tdim
         >>> stack_bcast((a.table, b), axis=-1)
-        [[|[1. 0.]|
-          |[2. 1.]|]
+        [[|[1 0]|
+          |[2 1]|]
 
-         [|[1. 0.]|
-          |[3. 2.]|]]t(2, 2)|c(2,)
+         [|[1 0]|
+          |[3 2]|]]t(2, 2)|c(2,)
         >>> # broadcasted stacking also works with ndarray types
         >>> stack_bcast((a.base, b.base), axis=1)
         array([[[1, 0],
@@ -215,7 +222,8 @@ def stack_bcast(arrays, axis=0, out=None, view=None):
         # print(newshape)
         # create out array, if it wasn't given to us
         if out is None:
-            out = ta.TablArray(np.zeros(newshape), cdim, view=view)
+            dtype = taprecision.policy_dtype(bc.dtype, arrays, 'stack_bcast')
+            out = ta.TablArray(np.zeros(newshape, dtype), cdim, view=view)
         elif out.base.shape != tuple(newshape):
             raise ValueError('out.base shape %s mismatches required shape %s'
                              % (out.base.shape, newshape))
@@ -232,7 +240,8 @@ def stack_bcast(arrays, axis=0, out=None, view=None):
         newshape = list(bc.shape)
         newshape.insert(axis, n)
         if out is None:
-            out = np.zeros(newshape, bc.dtype)
+            dtype = taprecision.policy_dtype(bc.dtype, arrays, 'stack_bcast')
+            out = np.zeros(newshape, dtype)
         elif out.shape != tuple(newshape):
             raise ValueError('out shape %s mismatches required shape %s'
                              % (out.shape, newshape))
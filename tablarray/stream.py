@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Out-of-core streaming reductions
+
+reduce_chunks walks a TablArray (e.g. memmapped, see taio) or an iterable
+of TablArray pieces in blocks along the leading tabular axis, and combines
+partial results, so only one block is in memory at a time::
+
+    a = ta.open_memmap('snapshots.npy', 'r')
+    Emean = ta.reduce_chunks('mean', a, axis=0)
+    Estd = ta.reduce_chunks(np.std, a, axis=0, chunk=2**24)
+
+Created on Sun Oct 18 18:58:03 2026
+
+@author: chris
+"""
+
+import warnings
+import numpy as np
+
+from . import misc
+
+# partial results and how they combine, for each reduction
+_kinds = {
+    'sum': 'sum', 'nansum': 'sum', 'prod': 'prod', 'nanprod': 'prod',
+    'min': 'min', 'amin': 'min', 'nanmin': 'min',
+    'max': 'max', 'amax': 'max', 'nanmax': 'max',
+    'mean': 'mean', 'nanmean': 'mean',
+    'var': 'var', 'nanvar': 'var', 'std': 'var', 'nanstd': 'var',
+    'argmin': 'arg', 'nanargmin': 'arg', 'argmax': 'arg', 'nanargmax': 'arg'}
+
+
+def _view_axes(a, axis):
+    """translate axis w.r.t. the view of a into axes of a.base, and the
+    number of cellular dims which collapse"""
+    if axis is None:
+        axes = tuple(a._viewdims)
+    elif type(axis) is tuple:
+        axes = tuple(a._viewdims[ax] for ax in axis)
+    else:
+        axes = (a._viewdims[axis],)
+    delta_cdim = len(axes) if a._cellular else 0
+    return axes, delta_cdim
+
+
+def _pieces(a, chunk):
+    """blocks of a.base along axis 0, with their offset"""
+    base = a.base
+    if base.ndim == 0 or a.ts.tdim == 0:
+        yield 0, base
+        return
+    row_size = max(base[:1].size, 1)
+    step = max(chunk // row_size, 1)
+    for start in range(0, base.shape[0], step):
+        yield start, base[start:start + step]
+
+
+def _iter_pieces(source, view, chunk):
+    """yield (first piece as TablArray view, offset, block) from a
+    TablArray or an iterable of TablArray pieces along the leading axis"""
+    if misc.istablarray(source):
+        sources = [source]
+    else:
+        sources = source
+    offset = 0
+    for piece in sources:
+        if not misc.istablarray(piece):
+            raise TypeError('reduce_chunks needs TablArray pieces')
+        piece = piece.__view__(view) if type(view) is str else piece
+        for start, block in _pieces(piece, chunk):
+            yield piece, offset + start, block
+        if piece.base.ndim > 0 and piece.ts.tdim > 0:
+            offset += piece.base.shape[0]
+
+
+def _count(block, axes, skipnan):
+    """number of (non-nan) elements reduced per result element"""
+    if skipnan:
+        return np.sum(~np.isnan(block), axis=axes)
+    return np.prod([block.shape[ax] for ax in axes], dtype=np.intp)
+
+
+class _Welford(object):
+    """running count, mean and sum of squared deviations, combined with
+    the parallel update of Chan et al."""
+
+    def __init__(self, skipnan):
+        self.skipnan = skipnan
+        self.n = None
+
+    def add(self, block, axes):
+        n_b = _count(block, axes, self.skipnan)
+        with warnings.catch_warnings():
+            # blocks may have all-nan slices, which the combination skips
+            warnings.simplefilter('ignore', RuntimeWarning)
+            if self.skipnan:
+                mean_b = np.nanmean(block, axis=axes, keepdims=True)
+                dev = np.nansum(np.abs(block - mean_b) ** 2, axis=axes)
+            else:
+                mean_b = np.mean(block, axis=axes, keepdims=True)
+                dev = np.sum(np.abs(block - mean_b) ** 2, axis=axes)
+        mean_b = np.squeeze(mean_b, axis=axes)
+        if self.n is None:
+            self.n, self.mean, self.m2 = n_b, mean_b, dev
+            return
+        n = self.n + n_b
+        with np.errstate(invalid='ignore', divide='ignore'):
+            frac = np.where(n > 0, n_b / np.maximum(n, 1), 0)
+            delta = np.where(n_b > 0, mean_b - self.mean, 0)
+            delta = np.where(self.n > 0, delta, 0)
+            self.mean = np.where(self.n > 0, self.mean + delta * frac,
+                                 mean_b)
+            self.m2 = self.m2 + dev + np.abs(delta) ** 2 * self.n * frac
+        self.n = n
+
+    def var(self, ddof):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.m2 / (self.n - ddof)
+
+
+def _arg_better(name, new, best):
+    """mask where new values beat the best so far, keeping the first
+    occurrence like numpy"""
+    lt = new < best if 'argmin' in name else new > best
+    if name.startswith('nan'):
+        # nan is skipped
+        return lt | (np.isnan(best) & ~np.isnan(new))
+    # nan wins, as in numpy
+    return (lt & ~np.isnan(best)) | (np.isnan(new) & ~np.isnan(best))
+
+
+def reduce_chunks(func, a, axis=None, view='table', chunk=2**20, ddof=0):
+    """
+    Reduce a TablArray in blocks along its leading tabular axis, combining
+    partial results, so memory use is about one block. The result and
+    cellular shape are the same as func(a, axis=axis, view=view).
+
+    Parameters
+    ----------
+    func : str or function
+        name (or the numpy/tablarray function) of a reduction: sum, prod,
+        min, max, mean, var, std, argmin, argmax, or their nan* versions
+    a : TablArray, or iterable of TablArray
+        e.g. a memmapped TablArray, or a generator of TablArray pieces
+        which follow each other along the leading tabular axis
+    axis : int, tuple of int or None
+        axes w.r.t. view, None reduces all axes of the view
+    view : 'table', 'cell' or None
+        None keeps the view of a
+    chunk : int
+        approximate number of elements per block
+    ddof : int
+        delta degrees of freedom for var and std
+
+    Returns
+    -------
+    rval : TablArray (or ndarray/scalar if no tabular dims remain)
+        argmin/argmax give global indices along the reduced axis
+    """
+    name = func if type(func) is str else func.__name__
+    kind = _kinds.get(name)
+    if kind is None:
+        raise ValueError('reduce_chunks does not know how to combine %s'
+                         % name)
+    skipnan = name.startswith('nan')
+    np_func = getattr(np, name)
+    state = None
+    parts = []
+    streamed = None
+    for piece, offset, block in _iter_pieces(a, view, chunk):
+        if streamed is None:
+            first = piece
+            axes, delta_cdim = _view_axes(piece, axis)
+            # is the streamed axis (axis 0 of base) reduced?
+            streamed = (block.ndim > 0 and first.ts.tdim > 0
+                        and 0 in [ax % block.ndim for ax in axes])
+            if kind == 'arg' and len(axes) != 1:
+                raise ValueError('%s needs a single axis' % name)
+            if kind == 'var':
+                state = _Welford(skipnan)
+        if not streamed:
+            # blocks reduce independently, i.e. along other axes
+            if kind == 'arg':
+                parts.append(np_func(block, axis=axes[0]))
+            elif kind == 'var':
+                parts.append(np_func(block, axis=axes, ddof=ddof))
+            else:
+                parts.append(np_func(block, axis=axes))
+            continue
+        if kind == 'var':
+            state.add(block, axes)
+        elif kind == 'mean':
+            total = (np.nansum if skipnan else np.sum)(block, axis=axes)
+            count = _count(block, axes, skipnan)
+            state = ((total, count) if state is None
+                     else (state[0] + total, state[1] + count))
+        elif kind == 'arg':
+            if skipnan:
+                # blocks may have all-nan slices, which nanarg* refuse
+                fill = np.inf if 'argmin' in name else -np.inf
+                idx = np_func(np.where(np.isnan(block), fill, block),
+                              axis=axes[0])
+            else:
+                idx = np_func(block, axis=axes[0])
+            val = np.take_along_axis(
+                block, np.expand_dims(idx, axes[0]), axes[0])
+            val = np.squeeze(val, axis=axes[0])
+            idx = idx + offset
+            if state is None:
+                state = (val, idx)
+            else:
+                better = _arg_better(name, val, state[0])
+                state = (np.where(better, val, state[0]),
+                         np.where(better, idx, state[1]))
+        else:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                part = np_func(block, axis=axes)
+            if state is None:
+                state = part
+            elif kind == 'sum':
+                state = state + part
+            elif kind == 'prod':
+                state = state * part
+            elif kind == 'min':
+                state = (np.fmin if skipnan else np.minimum)(state, part)
+            else:
+                state = (np.fmax if skipnan else np.maximum)(state, part)
+    if streamed is None:
+        raise ValueError('reduce_chunks got no data')
+    if not streamed:
+        rarray = parts[0] if len(parts) == 1 else np.concatenate(parts)
+    elif kind == 'var':
+        rarray = state.var(ddof)
+        if 'std' in name:
+            rarray = np.sqrt(rarray)
+    elif kind == 'mean':
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rarray = state[0] / state[1]
+    elif kind == 'arg':
+        rarray = state[1]
+    else:
+        rarray = state
+    cdim = first.ts.cdim - delta_cdim if np.ndim(rarray) else 0
+    return misc._rval_once_a_ta(first.__class__, rarray, cdim, first.view)
@@ -7,29 +7,47 @@ Created on Mon Apr 27 17:39:50 2020
 """
 
 import copy as _copy
+import functools as _functools
 import numpy as _np
 
+from .tanumpy import dispatch as _dispatch
 from .tanumpy import np_func as _np2ta
+from . import taextract as _extract
 from . import mmul
 from . import re
+from . import tacow
+from . import taio as _taio
+from . import talazy
 from . import tashape
 from . import taprint
 from . import misc
 from .wraps.op12swap import op12_swap as _op12_swap
-
-
-def _ragged_loader(outarray, lla):
-    def _inner_ragged_loader(sub_lla, *indices):
-        n = len(sub_lla)
-        for a in range(n):
-            sub_sub_lla = sub_lla[a]
-            if type(sub_sub_lla) is list:
-                _inner_ragged_loader(sub_sub_lla, *indices, a)
-            else:
-                outarray.__setitem__((*indices, a),
-                                     sub_sub_lla)
-
-    _inner_ragged_loader(lla)
+from .wraps.op12swap import op_inplace as _op_inplace
+
+
+@_functools.lru_cache(maxsize=1024)
+def _view_attrs(tshape, cshape, view):
+    """attributes set by TablArray.setview, for a taShape and view"""
+    tdim = len(tshape)
+    cdim = len(cshape)
+    if view == 'table' or view == 'bcast':
+        return dict(
+            _tabular=True, _cellular=False, _bcast=view == 'bcast',
+            _viewdims=tuple(range(tdim)), _viewcdim=cdim,
+            shape=tshape, ndim=tdim, size=_np.prod(tshape), view=view)
+    elif view == 'cell':
+        return dict(
+            _tabular=False, _cellular=True, _bcast=False,
+            _viewdims=tuple(range(tdim, tdim + cdim)), _viewcdim=0,
+            shape=cshape, ndim=cdim, size=_np.prod(cshape), view=view)
+    elif view == 'array':
+        shape = tshape + cshape
+        return dict(
+            _tabular=False, _cellular=False, _bcast=False,
+            _viewdims=tuple(range(tdim + cdim)), _viewcdim=0,
+            shape=shape, ndim=tdim + cdim, size=int(_np.prod(shape)),
+            view=view)
+    raise ValueError
 
 
 class TablArray(object):
@@ -95,6 +113,23 @@ class TablArray(object):
         # set the view
         self.setview(view)
 
+    @classmethod
+    def _from_trusted(cls, base, cdim, view='cell'):
+        """fast constructor for internal use, given ndarray base and int cdim
+        or its taShape, i.e. without checking or casting anything"""
+        ts = (cdim if isinstance(cdim, tashape.taShape)
+              else tashape.taShape(base.shape, cdim))
+        self = object.__new__(cls)
+        # a fresh __dict__ is faster than setview's update
+        attrs = ts._views.get(view)
+        if attrs is None:
+            attrs = ts._views[view] = _view_attrs(ts.tshape, ts.cshape, view)
+        attrs = attrs.copy()
+        attrs['base'] = base
+        attrs['ts'] = ts
+        self.__dict__ = attrs
+        return self
+
     @classmethod
     def from_tile(cls, cell, tshape, view='table'):
         """create a table by tiling a cell"""
@@ -129,19 +164,43 @@ class TablArray(object):
         if blank is None:
             a = _np.array(lla)
         else:
-            tshape = misc._imply_shape_ragged(lla)
+            tshape, levels = misc._flatten_ragged(lla)
             a = _np.empty((*tshape, *cshape), dtype=dtype)
             a[:] = blank
-            _ragged_loader(a, lla)
+            misc._scatter_ragged(a, len(tshape), levels)
         return cls(a, len(cshape), view)
 
+    @classmethod
+    def open_memmap(cls, path, mode='r+', **kwargs):
+        """open a TablArray file saved by save_memmap, see taio.open_memmap
+        """
+        return _taio.open_memmap(path, mode, **kwargs)
+
+    def save_memmap(self, path):
+        """save to a .npy file plus header, see taio.save_memmap"""
+        _taio.save_memmap(self, path)
+
     def __view__(self, view):
         """returns an ATC with a different .setview(view), using
-        pass-by-reference not copy so that changes do affect this original"""
-        return TablArray(self.base, self.ts, view)
+        pass-by-reference not copy so that changes do affect this original
+
+        Views are cached, as long as base, ts and the view still match"""
+        cache = self.__dict__.get('_viewcache')
+        if cache is None:
+            cache = self._viewcache = {}
+        rval = cache.get(view)
+        if (rval is None or rval.base is not self.base
+                or rval.ts is not self.ts or rval.view != view):
+            rval = cache[view] = TablArray._from_trusted(
+                self.base, self.ts, view)
+            tacow.own(rval, self)
+        return rval
 
     def __copy__(self):
-        """returns an independent copy"""
+        """returns an independent copy, which shares .base until either
+        one is written if copy-on-write is enabled (see tacow)"""
+        if tacow.isenabled():
+            return tacow.share(self)
         return TablArray(_copy.copy(self.base), self.ts.cdim, self.view)
 
     def __deepcopy__(self, memo):
@@ -153,43 +212,23 @@ class TablArray(object):
     def __repr__(self):
         return self.__str__()
 
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """numpy ufuncs, e.g. np.add(a, b), use TablArray broadcasting"""
+        return _dispatch.array_ufunc(ufunc, method, inputs, kwargs)
+
+    def __array_function__(self, func, types, args, kwargs):
+        """numpy functions, e.g. np.sum(a), use their TablArray compatible
+        version from tablarray, else work on .base"""
+        return _dispatch.array_function(func, types, args, kwargs)
+
     def setview(self, view):
         """view='array', 'table', 'cell', or 'bcast'
 
         Changes the sense of alignment of methods to data.
         """
-        self._tabular = False
-        self._cellular = False
-        self._bcast = False
-        # only allow one view
-        if view == 'table' or view == 'bcast':
-            self._tabular = True
-            self._viewdims = tuple(range(self.ts.tdim))
-            self._viewcdim = self.ts.cdim
-            self.shape = self.ts.tshape
-            self.ndim = self.ts.tdim
-            self.size = self.ts.tsize
-            if view == 'bcast':
-                self._bcast = True
-        elif view == 'cell':
-            self._cellular = True
-            ndim = self.ts.tdim + self.ts.cdim
-            self._viewdims = tuple(range(self.ts.tdim, ndim))
-            self._viewcdim = 0
-            self.shape = self.ts.cshape
-            self.ndim = self.ts.cdim
-            self.size = self.ts.csize
-        elif view == 'array':
-            ndim = self.ts.tdim + self.ts.cdim
-            self._viewdims = tuple(range(ndim))
-            self._viewcdim = 0
-            self.shape = self.base.shape
-            self.ndim = self.base.ndim
-            self.size = self.base.size
-        else:
-            raise ValueError
-        # keep the view string handy
-        self.view = view
+        # view attributes are derived once per taShape and view
+        self.__dict__.update(
+            _view_attrs(self.ts.tshape, self.ts.cshape, view))
 
     # ===== 'inheriting' from .base ====
     def __getattr__(self, attr):
@@ -258,7 +297,22 @@ class TablArray(object):
         return tuple(indices), cdim
 
     def __getitem__(self, indices):
-        if self.ts.tdim == 0 and self._bcast:
+        ts = self.ts
+        if type(indices) is int and not self._bcast:
+            # fast path for one int index, e.g. a.cell[0] or a.table[0]
+            if self._cellular and ts.cdim:
+                rarray = self.base[(slice(None),) * ts.tdim + (indices,)]
+                rts = ts._int_indexed(True)
+            elif self._tabular and ts.tdim:
+                rarray = self.base[indices]
+                rts = ts._int_indexed(False)
+            else:
+                rts = None
+            if rts is not None:
+                if not rts.tdim:
+                    return rarray
+                return TablArray._from_trusted(rarray, rts, self.view)
+        if ts.tdim == 0 and self._bcast:
             # special case for bcast w tdim=0
             rarray = self.base
             cdim = 0
@@ -270,6 +324,17 @@ class TablArray(object):
         return misc._rval_once_a_ta(TablArray, rarray, cdim, self.view)
 
     def __setitem__(self, indices, val):
+        tacow.detach(self)
+        if talazy.islazy(val):
+            indices, cdim = self._process_indx(indices)
+            target = self.base[indices]
+            if (isinstance(target, _np.ndarray) and target.shape == val.shape
+                    and _np.may_share_memory(target, self.base)):
+                # evaluate in blocks directly into self
+                val.evaluate(out=target)
+                return
+            self.base[indices] = misc.base(val.evaluate())
+            return
         if isinstance(val, TablArray):
             # strip ATC types - only numpy.ndarray can be set
             val = val.base
@@ -291,6 +356,13 @@ class TablArray(object):
     __divmod__ = _np2ta.divmod
     __rdivmod__ = _op12_swap(_np2ta.divmod)
     __floordiv__ = _np2ta.floor_divide
+    # in-place operators write the result into self (see out=)
+    __iadd__ = _op_inplace(_np2ta.add)
+    __isub__ = _op_inplace(_np2ta.subtract)
+    __imul__ = _op_inplace(_np2ta.multiply)
+    __ipow__ = _op_inplace(_np2ta.power)
+    __itruediv__ = _op_inplace(_np2ta.true_divide)
+    __ifloordiv__ = _op_inplace(_np2ta.floor_divide)
     __eq__ = _np2ta.equal
     __ge__ = _np2ta.greater_equal
     __gt__ = _np2ta.greater
@@ -330,3 +402,15 @@ class TablArray(object):
         along tabular or cellular structure into 1 dimension
         """
         return _copy.copy(re.ravel(self, order=order))
+
+    def compress(self, mask, return_index=False):
+        """Return the cells where a tabular mask is True, as a TablArray
+        with tshape (n,), see extract::
+
+            a.table.compress(En > threshold)
+        """
+        return _extract.extract(mask, self, return_index=return_index)
+
+
+# istablarray recognizes TablArray by type, without duck-typing
+misc._tablarray_types.add(TablArray)
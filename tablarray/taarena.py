@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Scratch-buffer arena, reusing result buffers across repeated evaluations
+
+With the arena enabled, wraps draw result buffers for ufuncs from a pool
+keyed by (shape, dtype). Each buffer handed out is an ndarray which every
+view of it keeps alive, and a finalizer on it returns its memory to the
+pool once the TablArrays using it (and their views) are released, so
+iterating the same formulas stops allocating::
+
+    with ta.arena():
+        for step in range(nsteps):
+            E = E + dt * dE(E)
+        ta.arena_info()     # hits, misses, ...
+
+The pool is evicted when the arena is disabled, e.g. when the context
+exits.
+
+Created on Sun Oct 18 21:20:58 2026
+
+@author: chris
+"""
+
+import contextlib
+import weakref
+import numpy as np
+
+from . import misc
+from . import taprecision
+
+_arena_options = {
+    'enabled': False,
+    'maxbytes': 2 ** 28,    # bound on the bytes held by the pool
+    'minbytes': 2 ** 14}    # smaller results are cheaper to allocate
+
+# (shape, dtype) -> list of free memory blocks
+_free = {}
+# generation of the pool, buffers of an evicted pool aren't taken back
+_generation = [0]
+_stats = {'hits': 0, 'misses': 0, 'bypass': 0, 'buffers': 0, 'bytes': 0}
+
+
+def _check_options_2dict(enabled=None, maxbytes=None, minbytes=None):
+    """validate options, return a dict of non-None options"""
+    options = {k: v for k, v in locals().items() if v is not None}
+    if enabled is not None and type(enabled) is not bool:
+        raise TypeError('enabled must be bool')
+    for name in ['maxbytes', 'minbytes']:
+        val = options.get(name)
+        if val is not None:
+            if type(val) is not int:
+                raise TypeError('%s must be int' % name)
+            if val < 0:
+                raise ValueError('%s must be at least 0' % name)
+    return options
+
+
+def set_arena(enabled=None, maxbytes=None, minbytes=None):
+    """
+    Set options of the scratch-buffer arena.
+
+    Parameters
+    ----------
+    enabled: bool [optional]
+        Draw result buffers from the arena. (default False) Disabling it
+        evicts the pool.
+    maxbytes: int >= 0 [optional]
+        Most bytes the pool may hold, beyond that results are allocated
+        as usual. (default 256 MiB)
+    minbytes: int >= 0 [optional]
+        Smaller results are allocated as usual. (default 16 KiB)
+    """
+    options = _check_options_2dict(enabled, maxbytes, minbytes)
+    _arena_options.update(options)
+    misc._set_active('arena', isactive())
+    if not _arena_options['enabled']:
+        _evict()
+
+
+def get_arena():
+    """
+    Return the current arena options.
+
+    Returns
+    -------
+    options: dict
+        - enabled: bool
+        - maxbytes: int
+        - minbytes: int
+    """
+    return _arena_options.copy()
+
+
+@contextlib.contextmanager
+def arena(enabled=True, maxbytes=None, minbytes=None):
+    """
+    Context manager for drawing result buffers from the arena.
+
+    >>> with ta.arena(maxbytes=2**30):
+    ...     for step in range(nsteps):
+    ...         E = E + dt * dE(E)
+
+    See set_arena for parameters.
+    """
+    opts = get_arena()
+    try:
+        set_arena(enabled, maxbytes, minbytes)
+        yield get_arena()
+    finally:
+        set_arena(**opts)
+
+
+def isactive():
+    return _arena_options['enabled']
+
+
+def arena_info():
+    """
+    Return arena statistics.
+
+    Returns
+    -------
+    info: dict
+        - hits: int, results which reused a pooled buffer
+        - misses: int, results which added a new buffer to the pool
+        - bypass: int, results allocated as usual since the pool was full
+        - buffers: int, number of pooled buffers, free or in use
+        - bytes: int, bytes held by the pool
+    """
+    return dict(_stats)
+
+
+def _evict():
+    """drop the pooled buffers, buffers still in use aren't taken back"""
+    _free.clear()
+    _generation[0] += 1
+    _stats['buffers'] = 0
+    _stats['bytes'] = 0
+
+
+def arena_clear():
+    """drop all pooled buffers and reset statistics"""
+    _evict()
+    for key in _stats:
+        _stats[key] = 0
+
+
+def _release(key, memory, generation):
+    """finalizer of a buffer handed out, its memory is free again"""
+    if generation == _generation[0]:
+        _free.setdefault(key, []).append(memory)
+
+
+def _hand_out(key, memory):
+    """a new ndarray over pooled memory. Its .base is a bytearray, which
+    numpy views don't collapse to, so they refer to the ndarray and its
+    finalizer runs only once it and all its views are released"""
+    shape, dtype = key
+    buf = np.ndarray(shape, dtype, buffer=memory)
+    weakref.finalize(buf, _release, key, memory, _generation[0])
+    return buf
+
+
+def empty(shape, dtype):
+    """np.empty(shape, dtype), reusing a free pooled buffer if the arena is
+    enabled"""
+    dtype = np.dtype(dtype)
+    shape = tuple(shape)
+    if not _arena_options['enabled']:
+        return np.empty(shape, dtype)
+    nbytes = dtype.itemsize * int(np.prod(shape))
+    if nbytes < _arena_options['minbytes']:
+        return np.empty(shape, dtype)
+    key = (shape, dtype)
+    free = _free.get(key)
+    if free:
+        _stats['hits'] += 1
+        return _hand_out(key, free.pop())
+    if _stats['bytes'] + nbytes > _arena_options['maxbytes']:
+        _stats['bypass'] += 1
+        return np.empty(shape, dtype)
+    _stats['misses'] += 1
+    _stats['buffers'] += 1
+    _stats['bytes'] += nbytes
+    return _hand_out(key, bytearray(nbytes))
+
+
+def call(func, shape, operands, *args, **kwargs):
+    """func(*operands, *args, **kwargs), computed into a buffer from the
+    arena when func is a ufunc whose result dtype is known in advance"""
+    dtype = None
+    if not args and not kwargs:
+        dtype = taprecision.ufunc_dtype(func, operands)
+    if dtype is None:
+        return func(*operands, *args, **kwargs)
+    return func(*operands, out=empty(shape, dtype))
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Copy-on-write for TablArray copies
+
+With copy-on-write on, copy.copy of a TablArray (or of a TablaSet) shares
+.base with the original instead of copying it::
+
+    with ta.copyonwrite():
+        snapshot = copy.copy(tset)      # O(keys), not O(bytes)
+    tset['E'][0] = 1                    # only now is E's buffer copied
+
+Sharers form a group. Whichever member of the group is written first,
+through __setitem__, an in-place operator or out=, gets its own copy of the
+buffer, unless the others were released. Views (.cell, .table, also views
+of views) follow the array they view. Writing to
+.base directly, or to a sliced sub-array, bypasses copy-on-write.
+
+Created on Sun Oct 18 17:52:30 2026
+
+@author: chris
+"""
+
+import contextlib
+import weakref
+
+_cow_options = {
+    'enabled': False}
+
+
+def _check_options_2dict(enabled=None):
+    """validate options, return a dict of non-None options"""
+    options = {k: v for k, v in locals().items() if v is not None}
+    if enabled is not None and type(enabled) is not bool:
+        raise TypeError('enabled must be bool')
+    return options
+
+
+def set_copyonwrite(enabled=None):
+    """
+    Set copy-on-write for copies of TablArray and TablaSet.
+
+    Parameters
+    ----------
+    enabled: bool [optional]
+        If True, copy.copy shares buffers until one sharer is written.
+        (default False, i.e. copy.copy copies .base right away)
+    """
+    options = _check_options_2dict(enabled)
+    _cow_options.update(options)
+
+
+def get_copyonwrite():
+    """
+    Return the current copy-on-write options.
+
+    Returns
+    -------
+    options: dict
+        - enabled: bool
+    """
+    return _cow_options.copy()
+
+
+@contextlib.contextmanager
+def copyonwrite(enabled=True):
+    """
+    Context manager for copy-on-write copies.
+
+    >>> with ta.copyonwrite():
+    ...     b = copy.copy(a)
+    >>> b.base is a.base
+    True
+
+    Copies made in context stay copy-on-write after it exits.
+    """
+    opts = get_copyonwrite()
+    try:
+        set_copyonwrite(enabled)
+        yield get_copyonwrite()
+    finally:
+        set_copyonwrite(**opts)
+
+
+def isenabled():
+    return _cow_options['enabled']
+
+
+def _root(a):
+    """the TablArray which owns a's buffer, following views to their
+    origin"""
+    ref = a.__dict__.get('_cowowner')
+    owner = None if ref is None else ref()
+    while owner is not None:
+        a = owner
+        ref = a.__dict__.get('_cowowner')
+        owner = None if ref is None else ref()
+    return a
+
+
+def own(view, owner):
+    """mark view as a view of owner, without keeping owner alive"""
+    view.__dict__['_cowowner'] = weakref.ref(owner)
+
+
+def share(a):
+    """return a TablArray of the same class sharing a.base, joining a's
+    copy-on-write group"""
+    root = _root(a)
+    group = root.__dict__.get('_cow')
+    if group is None:
+        # members by id, held weakly so released copies leave the group
+        group = root.__dict__['_cow'] = weakref.WeakValueDictionary()
+        group[id(root)] = root
+    rval = a.__class__._from_trusted(a.base, a.ts, a.view)
+    rval.__dict__['_cow'] = group
+    group[id(rval)] = rval
+    return rval
+
+
+def _repoint(a, base):
+    """point a, its cached views, their cached views, ... at base"""
+    a.base = base
+    for view in a.__dict__.get('_viewcache', {}).values():
+        _repoint(view, base)
+
+
+def detach(a):
+    """before writing to a, give it a private buffer if it shares one"""
+    root = _root(a)
+    group = root.__dict__.pop('_cow', None)
+    if group is not None:
+        group.pop(id(root), None)
+        if len(group) > 0:
+            # cached views were handed out, so they follow the new buffer
+            _repoint(root, root.base.copy())
+    if a.base is not root.base:
+        a.base = root.base
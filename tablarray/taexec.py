@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Execution options for large TablArray operations
+
+When a result has more than threshold elements, binary and elementwise ops
+process it in blocks of about blocksize elements along the leading axis.
+Each block is computed and written into the result in turn, so temporaries
+never exceed one block.
+
+When workers > 1 and a result has more than parallel_threshold elements,
+blocks run on a shared thread pool (numpy ufuncs release the GIL). Large
+reductions split along the leading axis in the same way, combining partial
+results when the leading axis is reduced.
+
+Created on Sun Oct 18 12:31:09 2026
+
+@author: chris
+"""
+
+import concurrent.futures
+import contextlib
+import functools
+import math
+import threading
+import numpy as np
+
+from . import misc
+from . import re as _re
+from . import taarena
+from .wraps import cbroadcast
+
+_exec_options = {
+    'blocksize': 2 ** 16,   # elements per block
+    'threshold': None,      # size > threshold triggers blocks, None is off
+    'workers': 1,           # threads, 1 is single threaded
+    'parallel_threshold': 2 ** 20}  # size > threshold triggers threads
+
+# the shared thread pool, created on demand and grown to the most workers
+_pool_state = {'executor': None, 'workers': 0}
+_pool_lock = threading.Lock()
+
+
+def _check_options_2dict(blocksize=None, threshold=None, workers=None,
+                         parallel_threshold=None):
+    """validate options, return a dict of non-None options"""
+    options = {k: v for k, v in locals().items() if v is not None}
+    if blocksize is not None:
+        if type(blocksize) is not int:
+            raise TypeError('blocksize must be int')
+        if blocksize < 1:
+            raise ValueError('blocksize must be at least 1')
+    if threshold is not None:
+        if type(threshold) is not int:
+            raise TypeError('threshold must be int')
+        if threshold < 0:
+            raise ValueError('threshold must be at least 0')
+    if workers is not None:
+        if type(workers) is not int:
+            raise TypeError('workers must be int')
+        if workers < 1:
+            raise ValueError('workers must be at least 1')
+    if parallel_threshold is not None:
+        if type(parallel_threshold) is not int:
+            raise TypeError('parallel_threshold must be int')
+        if parallel_threshold < 0:
+            raise ValueError('parallel_threshold must be at least 0')
+    return options
+
+
+def set_execution(blocksize=None, threshold=None, workers=None,
+                  parallel_threshold=None):
+    """
+    Set execution options for tablarray.
+
+    Parameters
+    ----------
+    blocksize: int >= 1 [optional]
+        Number of result elements per block. (default 65536)
+    threshold: int >= 0 [optional]
+        Result size that triggers blocked execution. (default None, i.e.
+        blocked execution is off)
+    workers: int >= 1 [optional]
+        Number of threads sharing large ops. (default 1)
+    parallel_threshold: int >= 0 [optional]
+        Result size that triggers threads when workers > 1.
+        (default 1048576)
+    """
+    options = _check_options_2dict(blocksize, threshold, workers,
+                                   parallel_threshold)
+    _exec_options.update(options)
+    misc._set_active('execution', isactive())
+
+
+def get_execution():
+    """
+    Return the current execution options for tablarray.
+
+    Returns
+    -------
+    options: dict
+        - blocksize: int
+        - threshold: int or None
+        - workers: int
+        - parallel_threshold: int
+    """
+    return _exec_options.copy()
+
+
+@contextlib.contextmanager
+def execution(*args, **kwargs):
+    """
+    Context manager for setting execution options for tablarray.
+
+    >>> import tablarray as ta
+    >>> with ta.execution(threshold=10**6):
+    ...     c = a * b
+
+    See set_execution for parameters.
+    """
+    opts = get_execution()
+    try:
+        set_execution(*args, **kwargs)
+        yield get_execution()
+    finally:
+        # set_execution ignores None, so restore directly
+        _exec_options.clear()
+        _exec_options.update(opts)
+        misc._set_active('execution', isactive())
+
+
+def _workers(size):
+    """number of threads for a result of size elements"""
+    workers = _exec_options['workers']
+    if workers > 1 and size > _exec_options['parallel_threshold']:
+        return workers
+    return 1
+
+
+def _pool(workers=None):
+    """the shared thread pool, with at least workers threads"""
+    workers = _exec_options['workers'] if workers is None else workers
+    old = None
+    with _pool_lock:
+        if _pool_state['workers'] < workers:
+            old = _pool_state['executor']
+            _pool_state['executor'] = concurrent.futures.ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix='tablarray')
+            _pool_state['workers'] = workers
+        executor = _pool_state['executor']
+    if old is not None:
+        # tasks already submitted to the smaller pool finish first
+        old.shutdown(wait=True)
+    return executor
+
+
+def _map(func, items, workers):
+    """list(map(func, items)), on the thread pool if workers > 1
+
+    The pool may have more threads than workers, so items are dealt into
+    workers tasks which each work through their share in turn."""
+    if workers > 1 and len(items) > 1:
+        ntasks = min(workers, len(items))
+        shares = [items[i::ntasks] for i in range(ntasks)]
+        rvals = [None] * len(items)
+        for i, share in enumerate(_pool(workers).map(
+                lambda share: [func(item) for item in share], shares)):
+            rvals[i::ntasks] = share
+        return rvals
+    return [func(item) for item in items]
+
+
+def isactive():
+    """True if blocked or threaded execution is enabled at all"""
+    return (_exec_options['threshold'] is not None
+            or _exec_options['workers'] > 1)
+
+
+def block_slices(shape, elements):
+    """slices of the leading axis which split shape into blocks of about
+    elements each"""
+    row_size = max(math.prod(shape[1:]), 1)
+    step = max(elements // row_size, 1)
+    return [slice(i, i + step) for i in range(0, shape[0], step)]
+
+
+def overlaps(out, arrays):
+    """
+    True if out shares memory with any of arrays, such that computing
+    block by block would overwrite elements which later blocks still
+    read. An array which is exactly out (same memory, shape and strides)
+    is safe, since each block reads its elements before writing them.
+    """
+    out_data = out.__array_interface__['data'][0]
+    for array in arrays:
+        if not isinstance(array, np.ndarray):
+            continue
+        if (array.shape == out.shape and array.strides == out.strides
+                and array.__array_interface__['data'][0] == out_data):
+            continue
+        if np.may_share_memory(array, out):
+            return True
+    return False
+
+
+def blocks(shape):
+    """
+    Slices of the leading axis which split a result of shape into blocks,
+    or None if the result should be computed in one call.
+    """
+    if not isactive() or len(shape) == 0:
+        return None
+    size = math.prod(shape)
+    threshold = _exec_options['threshold']
+    blocked = threshold is not None and size > threshold
+    workers = _workers(size)
+    if not blocked and workers == 1:
+        return None
+    row_size = max(math.prod(shape[1:]), 1)
+    step = shape[0]
+    if blocked:
+        step = max(_exec_options['blocksize'] // row_size, 1)
+    if workers > 1:
+        # at least one block per worker
+        step = min(step, -(-shape[0] // workers))
+    if step >= shape[0]:
+        return None
+    return block_slices(shape, step * row_size)
+
+
+def call_blocked(func, shape, operands, *args, out=None, dtype=None,
+                 blocks=None, **kwargs):
+    """
+    Calculate func(*operands, *args, **kwargs), block by block along the
+    leading axis of shape. Operands are right-aligned to shape like numpy
+    broadcasting. If given, out (ndarray of shape) receives the result.
+    If out overlaps an operand (other than being exactly that operand),
+    func is called once instead, which numpy makes safe.
+    """
+    if out is not None and overlaps(out, operands):
+        return cbroadcast._call_into(func, out, *operands, *args, **kwargs)
+    # functools.partial of a ufunc has .func
+    nout = getattr(getattr(func, 'func', func), 'nout', 1)
+    if out is None and nout > 1:
+        # e.g. divmod, whose outputs are a tuple of arrays
+        return func(*operands, *args, **kwargs)
+    ndim = len(shape)
+    aligned = []
+    for operand in operands:
+        if np.ndim(operand) == 0:
+            aligned.append((operand, False))
+        else:
+            operand = np.asarray(operand)
+            operand = operand.reshape(
+                (1,) * (ndim - operand.ndim) + operand.shape)
+            aligned.append((operand, operand.shape[0] > 1))
+
+    def operands_in(block):
+        return [op[block] if sliced else op for op, sliced in aligned]
+
+    if out is None:
+        # the first block determines the dtype
+        block = blocks[0]
+        rblock = np.asarray(func(*operands_in(block), *args, **kwargs),
+                            dtype=dtype)
+        # keep the memory layout of a full-shape operand, e.g. cell-major
+        proto = next((op for op, _ in aligned if op.shape == tuple(shape)),
+                     None)
+        if proto is None or proto.flags.c_contiguous:
+            out = taarena.empty(shape, rblock.dtype)
+        else:
+            axes = sorted(range(proto.ndim),
+                          key=lambda i: -abs(proto.strides[i]))
+            out = _re._empty_ordered(shape, rblock.dtype, axes)
+        out[block] = rblock
+        blocks = blocks[1:]
+
+    def calc_block(block):
+        cbroadcast._call_into(func, out[block], *operands_in(block), *args,
+                              **kwargs)
+
+    _map(calc_block, blocks, _workers(int(np.prod(shape))))
+    return out
+
+
+# reductions which combine partial results of pieces, with the ufunc that
+# combines them (mean combines sums, then divides)
+_reduce_combine = {
+    'sum': np.add, 'nansum': np.add, 'mean': np.add,
+    'prod': np.multiply, 'nanprod': np.multiply,
+    'max': np.maximum, 'amax': np.maximum, 'nanmax': np.fmax,
+    'min': np.minimum, 'amin': np.minimum, 'nanmin': np.fmin,
+    'all': np.logical_and, 'any': np.logical_or}
+
+
+def call_reduction(func, array, axis, **kwargs):
+    """
+    Calculate func(array, axis=axis, **kwargs). If the array is large,
+    pieces along axis 0 run on the thread pool. If axis 0 is reduced,
+    the partial results of the pieces combine with the ufunc of the
+    reduction, e.g. np.add for sum, and ufunc.reduce combines with ufunc.
+    """
+    workers = _workers(array.size)
+    if (workers == 1 or array.ndim == 0 or array.shape[0] < 2
+            or 'out' in kwargs):
+        return func(array, axis=axis, **kwargs)
+    if axis is None:
+        axes = tuple(range(array.ndim))
+    else:
+        axes = axis if type(axis) is tuple else (axis,)
+        axes = tuple(ax % array.ndim for ax in axes)
+    pieces = np.array_split(array, min(workers, array.shape[0]), axis=0)
+    if 0 not in axes:
+        rvals = _map(lambda piece: func(piece, axis=axis, **kwargs), pieces,
+                     workers)
+        return np.concatenate(rvals, axis=0)
+    name = getattr(func, '__name__', None)
+    ufunc = getattr(func, '__self__', None)
+    combine = (ufunc if isinstance(ufunc, np.ufunc)
+               else _reduce_combine.get(name))
+    if combine is None or 'where' in kwargs or 'initial' in kwargs:
+        return func(array, axis=axis, **kwargs)
+    partial = np.sum if name == 'mean' else func
+    rvals = _map(lambda piece: partial(piece, axis=axis, **kwargs), pieces,
+                 workers)
+    rval = functools.reduce(combine, rvals)
+    if name == 'mean':
+        rval = np.true_divide(rval, math.prod(array.shape[ax] for ax in axes))
+    return rval
+
+
+# scans which split into blocks, with the op that carries block offsets
+_scan_carry = {
+    'cumsum': np.add, 'nancumsum': np.add,
+    'cumprod': np.multiply, 'nancumprod': np.multiply}
+
+
+def call_scan(func, array, axis, workers=None, **kwargs):
+    """
+    Calculate func(array, axis=axis, **kwargs) for a scan like cumsum, as
+    a block-parallel two-pass scan when workers > 1: blocks along axis are
+    scanned locally on the thread pool, then each block is offset by the
+    carry of the blocks before it.
+
+    Block boundaries depend only on blocksize (not on workers), so results
+    are the same for any number of workers > 1, and exactly equal to one
+    serial scan for integer dtypes.
+
+    Parameters
+    ----------
+    workers : int or None
+        threads, None uses the execution options (see set_execution)
+    """
+    carry_op = _scan_carry.get(getattr(func, '__name__', None))
+    if workers is None:
+        workers = _workers(array.size)
+    if (workers == 1 or carry_op is None or axis is None or array.ndim == 0
+            or 'out' in kwargs or 'dtype' in kwargs):
+        return func(array, axis=axis, **kwargs)
+    axis = axis % array.ndim
+    length = array.shape[axis]
+    row_size = max(array.size // max(length, 1), 1)
+    step = max(_exec_options['blocksize'] // row_size, 1)
+    if step >= length:
+        return func(array, axis=axis, **kwargs)
+
+    def block(start):
+        index = [slice(None)] * array.ndim
+        index[axis] = slice(start, start + step)
+        return tuple(index)
+    starts = list(range(0, length, step))
+    # pass 1, local scans, where the first block fixes the dtype
+    first = func(array[block(0)], axis=axis, **kwargs)
+    out = np.empty(array.shape, dtype=first.dtype)
+    out[block(0)] = first
+
+    def local_scan(start):
+        func(array[block(start)], axis=axis, out=out[block(start)], **kwargs)
+    _map(local_scan, starts[1:], workers)
+    # the carry into each block, from the last element of the ones before
+    carries = []
+    carry = None
+    for start in starts[:-1]:
+        last = np.take(out, [start + step - 1], axis=axis)
+        carry = last if carry is None else carry_op(carry, last)
+        carries.append(carry)
+
+    # pass 2, offset each block by its carry
+    def offset(item):
+        start, carry = item
+        target = out[block(start)]
+        carry_op(target, carry, out=target)
+    _map(offset, list(zip(starts[1:], carries)), workers)
+    return out
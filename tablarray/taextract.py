@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Module for selecting the table cells which satisfy a condition.
+
+Created on Sun Oct 18 16:48:20 2026
+
+@author: chris
+"""
+
+import numpy as np
+
+from . import misc
+
+
+def extract(mask, a, return_index=False):
+    """
+    Return the cells of a where a tabular mask is True, as a TablArray
+    with tshape (n,) and the cdim of a::
+
+        hot, index = ta.extract(En > threshold, a, return_index=True)
+        b.table[index] = f(hot)     # scatter results back
+
+    The mask broadcasts against the tabular shape of a, so degenerate
+    axes of either one need not be meshed. Cells are gathered directly
+    from a.base by integer index, without full-size intermediates.
+
+    Parameters
+    ----------
+    mask : bool ndarray or TablArray with cdim=0
+        condition over the tabular shape (broadcast with a.ts.tshape)
+    a : TablArray
+        table of cells. If a is not a TablArray, fall back on np.extract
+    return_index : bool, optional
+        also return the table coordinates of the extracted cells, a tuple
+        of int arrays (like np.nonzero) in the broadcast tabular shape
+
+    Returns
+    -------
+    cells : TablArray
+        tshape (n,), cshape of a
+    index : tuple of ndarray
+        only if return_index
+    """
+    if not misc.istablarray(a):
+        if return_index:
+            raise TypeError('return_index needs a TablArray')
+        return np.extract(mask, a)
+    if misc.istablarray(mask):
+        if mask.ts.cdim != 0:
+            raise ValueError('mask must be tabular, i.e. cdim=0')
+        mask = mask.base
+    mask = np.asarray(mask, dtype=bool)
+    tshape = np.broadcast_shapes(mask.shape, a.ts.tshape)
+    if len(tshape) == 0:
+        raise ValueError('extract needs a tabular dim in mask or a')
+    # broadcast_to is a view, so only the index arrays are allocated
+    index = np.nonzero(np.broadcast_to(mask, tshape))
+    # right-align the tabular axes of a, using index 0 on degenerate axes
+    a_index = index[len(tshape) - a.ts.tdim:]
+    a_index = tuple(i if n != 1 else np.zeros_like(i)
+                    for i, n in zip(a_index, a.ts.tshape))
+    if a.ts.tdim == 0:
+        cells = np.repeat(a.base[None], len(index[0]), axis=0)
+    else:
+        cells = a.base[a_index]
+    rval = a.__class__(cells, a.ts.cdim, a.view)
+    if return_index:
+        return rval, index
+    return rval
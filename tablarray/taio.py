@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Memory-mapped TablArray files
+
+A TablArray is saved as a plain .npy file, plus a small JSON header next to
+it (path + '.json') with cdim, view, dtype and shape::
+
+    ta.save_memmap(a, 'field.npy')
+    b = ta.open_memmap('field.npy', 'r+')
+    b.table[10:20] *= 2     # only touched pages are read and written
+
+The .npy file stays readable by np.load without tablarray.
+
+Created on Sun Oct 18 17:06:37 2026
+
+@author: chris
+"""
+
+import json
+
+import numpy as np
+
+from . import misc
+
+
+def _header_path(path):
+    return str(path) + '.json'
+
+
+def _write_header(path, base, cdim, view):
+    header = {'cdim': int(cdim), 'view': view,
+              'dtype': np.lib.format.dtype_to_descr(base.dtype),
+              'shape': list(base.shape)}
+    with open(_header_path(path), 'w') as f:
+        json.dump(header, f)
+
+
+def read_header(path):
+    """return the header dict (cdim, view, dtype, shape) of a memmap file"""
+    with open(_header_path(path)) as f:
+        header = json.load(f)
+    header['dtype'] = np.lib.format.descr_to_dtype(header['dtype'])
+    header['shape'] = tuple(header['shape'])
+    return header
+
+
+def save_memmap(a, path, chunk=2**16):
+    """
+    Save a TablArray to a .npy file plus header, without holding a second
+    copy in memory: data is copied in chunks along axis 0.
+
+    Parameters
+    ----------
+    a : TablArray
+    path : str or path-like
+        the .npy file, the header goes in path + '.json'
+    chunk : int
+        number of elements of axis 0 per copy
+    """
+    if not misc.istablarray(a):
+        raise TypeError('save_memmap needs a TablArray')
+    base = a.base
+    out = np.lib.format.open_memmap(path, mode='w+', dtype=base.dtype,
+                                    shape=base.shape)
+    if base.ndim == 0:
+        out[...] = base
+    else:
+        for start in range(0, len(base), chunk):
+            out[start:start + chunk] = base[start:start + chunk]
+    out.flush()
+    del out
+    _write_header(path, base, a.ts.cdim, a.view)
+
+
+def open_memmap(path, mode='r+', shape=None, dtype=float, cdim=None,
+                view='cell'):
+    """
+    Open a TablArray saved by save_memmap, with a np.memmap base.
+
+    Every wrapper works on the result as usual. Indexing pages in only the
+    touched blocks, and with mode 'r+' __setitem__ writes through to disk.
+
+    Parameters
+    ----------
+    path : str or path-like
+        the .npy file
+    mode : str
+        'r', 'r+', 'c' (copy-on-write, see np.memmap) or 'w+' to create a
+        new file of shape, dtype and cdim
+    shape, dtype, cdim, view
+        only for mode 'w+'
+    """
+    from .ta import TablArray
+    if mode == 'w+':
+        if shape is None or cdim is None:
+            raise ValueError("mode 'w+' needs shape and cdim")
+        base = np.lib.format.open_memmap(path, mode='w+', dtype=dtype,
+                                         shape=tuple(shape))
+        _write_header(path, base, cdim, view)
+        return TablArray(base, cdim, view)
+    header = read_header(path)
+    base = np.lib.format.open_memmap(path, mode=mode)
+    if base.shape != header['shape'] or base.dtype != header['dtype']:
+        raise ValueError('%s does not match its header' % path)
+    return TablArray(base, header['cdim'], header['view'])
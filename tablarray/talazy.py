@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lazy evaluation of TablArray formulas
+
+Inside ``with ta.lazy():`` binary and elementwise operators on TablArrays
+record a LazyTablArray graph instead of computing. Broadcast shapes resolve
+while the graph is built, then evaluation runs in blocks along the leading
+tabular axis, so no intermediate result is ever allocated at full size::
+
+    with ta.lazy():
+        E.cell[0] = 1.5 / (x**2 + y**2)     # evaluates straight into E
+
+    r = ta.expr(lambda x, y: ta.sqrt(x**2 + y**2), x, y)
+
+Everything else which gets a LazyTablArray (reductions, scans, matmul,
+indexing, numpy functions, ...) evaluates it first.
+
+Created on Sun Oct 18 11:20:37 2026
+
+@author: chris
+"""
+
+import contextlib
+import numpy as np
+
+from . import misc
+from . import taexec
+from . import taprecision
+from . import tashape
+
+_lazy_options = {
+    'enabled': False,
+    'chunk': 2 ** 16}   # number of elements per evaluation block
+
+
+@contextlib.contextmanager
+def lazy(chunk=None):
+    """
+    Context manager, within which TablArray operators record LazyTablArray
+    graphs. Assigning a LazyTablArray into a TablArray, or calling
+    .evaluate(), evaluates it.
+
+    Parameters
+    ----------
+    chunk : int [optional]
+        number of elements per evaluation block (default 65536)
+    """
+    opts = _lazy_options.copy()
+    try:
+        _lazy_options['enabled'] = True
+        misc._set_active('lazy', True)
+        if chunk is not None:
+            _lazy_options['chunk'] = int(chunk)
+        yield
+    finally:
+        _lazy_options.update(opts)
+        misc._set_active('lazy', opts['enabled'])
+
+
+def islazy(a):
+    """returns True/False if argument is a LazyTablArray"""
+    return isinstance(a, LazyTablArray)
+
+
+def evaluated(a):
+    """a, or the TablArray it evaluates to if a is a LazyTablArray. Wraps
+    which don't record graphs (reductions, scans, matmul, ...) evaluate
+    their operands with this"""
+    return a.evaluate() if islazy(a) else a
+
+
+def _evaluated_all(arg):
+    """evaluated, also within lists, tuples and dicts"""
+    if islazy(arg):
+        return arg.evaluate()
+    elif type(arg) is list or type(arg) is tuple:
+        return type(arg)(_evaluated_all(a) for a in arg)
+    elif type(arg) is dict:
+        return {key: _evaluated_all(val) for key, val in arg.items()}
+    return arg
+
+
+def isrecording():
+    """returns True inside a lazy() context"""
+    return _lazy_options['enabled']
+
+
+def expr(func, *args, chunk=None, **kwargs):
+    """
+    Evaluate func(*args, **kwargs) lazily, i.e. TablArray args become leaves
+    of a LazyTablArray graph, which is evaluated in blocks.
+
+    e.g.::
+
+        r = ta.expr(lambda x, y: 1.5 / (x**2 + y**2), x, y)
+    """
+    args2 = [LazyTablArray.leaf(arg) if misc.istablarray(arg) else arg
+             for arg in args]
+    rval = func(*args2, **kwargs)
+    return rval.evaluate(chunk=chunk) if islazy(rval) else rval
+
+
+def record(func, operands, kwargs=None):
+    """
+    Record func(*operands, **kwargs) as a LazyTablArray node.
+
+    operands may be LazyTablArray, TablArray, ndarray or scalar. Arrays
+    broadcast against the cells of the first TablArray-like operand, so
+    they should already be cast for its view (see _cast_other_type).
+    """
+    first = None
+    for operand in operands:
+        if islazy(operand) or misc.istablarray(operand):
+            first = operand
+            break
+    nodes = []
+    ts = None
+    for operand in operands:
+        if islazy(operand):
+            node = operand
+        elif misc.istablarray(operand):
+            node = LazyTablArray.leaf(operand)
+        elif np.ndim(operand) == 0:
+            # scalars don't need any alignment
+            nodes.append(operand)
+            continue
+        else:
+            node = LazyTablArray._constant(np.asarray(operand), first.ts)
+        if ts is None:
+            ts = node.ts
+        else:
+            ts, _ = ts.combine(node.ts)
+            if ts is None:
+                raise ValueError("couldn't broadcast compound shapes in %s"
+                                 % getattr(func, '__name__', func))
+        nodes.append(node)
+    return LazyTablArray(func, tuple(nodes), ts, first.view, kwargs)
+
+
+class LazyTablArray(object):
+    """
+    A node of a lazy TablArray formula, i.e. func(*operands), or a leaf
+    which holds an array. ts (taShape) of the result is known up front.
+
+    Normally built by TablArray operators inside ``with ta.lazy():``
+    """
+
+    def __init__(self, func, operands, ts, view='cell', kwargs=None):
+        self._func = func
+        self._operands = operands
+        self._kwargs = {} if kwargs is None else kwargs
+        self.ts = ts
+        self.view = view
+        self._tabular = view == 'table' or view == 'bcast'
+
+    @classmethod
+    def leaf(cls, a, view=None):
+        """a leaf node holding TablArray a"""
+        return cls(None, (a.base,), a.ts, a.view if view is None else view)
+
+    @classmethod
+    def _constant(cls, array, ts):
+        """a leaf node for an ndarray broadcast against the cells of ts"""
+        ndim = ts.tdim + ts.cdim
+        shape = (1,) * (ndim - array.ndim) + array.shape
+        ts2 = tashape.taShape(shape, ts.cdim)
+        return cls(None, (array.reshape(shape),), ts2)
+
+    @property
+    def shape(self):
+        """the shape of the evaluated .base"""
+        return (*self.ts.tshape, *self.ts.cshape)
+
+    def _setview(self, view):
+        """the same graph with a different view"""
+        return LazyTablArray(self._func, self._operands, self.ts, view,
+                             self._kwargs)
+
+    @property
+    def cell(self):
+        return self._setview('cell')
+
+    @property
+    def table(self):
+        return self._setview('table')
+
+    @property
+    def bcast(self):
+        return self._setview('bcast')
+
+    def __repr__(self):
+        name = ('leaf' if self._func is None
+                else getattr(self._func, '__name__', self._func))
+        return 'LazyTablArray(%s, %s)' % (name, self.ts)
+
+    def _aligned(self, tdim, cdim):
+        """for a leaf, the array with singleton axes inserted to align with
+        a result of tdim and cdim"""
+        shape = ((1,) * (tdim - self.ts.tdim) + self.ts.tshape
+                 + (1,) * (cdim - self.ts.cdim) + self.ts.cshape)
+        return self._operands[0].reshape(shape)
+
+    def _leaves(self, tdim, cdim, leaves):
+        """collect aligned arrays for all leaves, keyed by id"""
+        if self._func is None:
+            leaves[id(self)] = self._aligned(tdim, cdim)
+            return
+        for operand in self._operands:
+            if islazy(operand) and id(operand) not in leaves:
+                operand._leaves(tdim, cdim, leaves)
+
+    def _eval_block(self, leaves, block):
+        """evaluate within block (slice of the leading axis, or None)"""
+        if self._func is None:
+            array = leaves[id(self)]
+            if block is None or array.shape[0] == 1:
+                return array
+            return array[block]
+        args = [operand._eval_block(leaves, block) if islazy(operand)
+                else operand for operand in self._operands]
+        return self._func(*args, **self._kwargs)
+
+    def evaluate(self, out=None, chunk=None):
+        """
+        Evaluate the graph in blocks along the leading tabular axis.
+
+        Parameters
+        ----------
+        out : ndarray [optional]
+            destination of shape self.shape, else a TablArray is returned.
+            If a leaf overlaps out, the graph is evaluated into a temporary
+            which is then copied into out.
+        chunk : int [optional]
+            number of elements per block (default from lazy())
+        """
+        chunk = _lazy_options['chunk'] if chunk is None else chunk
+        tdim = self.ts.tdim
+        shape = self.shape
+        leaves = {}
+        self._leaves(tdim, self.ts.cdim, leaves)
+        if out is not None and taexec.overlaps(out, leaves.values()):
+            # blocks would overwrite elements which later blocks read
+            out[...] = misc.base(self.evaluate(chunk=chunk))
+            return out
+        if tdim == 0:
+            blocks = [None]
+        else:
+            blocks = taexec.block_slices(shape, chunk)
+        rarray = out
+        for block in blocks:
+            rblock = self._eval_block(leaves, block)
+            if rarray is None:
+                # now the dtype is known
+                dtype = taprecision.policy_dtype(
+                    np.result_type(rblock), leaves.values(), repr(self))
+                rarray = np.empty(shape, dtype=dtype)
+            if block is None:
+                rarray[...] = rblock
+            else:
+                rarray[block] = rblock
+        if out is not None:
+            return out
+        from .ta import TablArray
+        return misc._rval_once_a_ta(TablArray, rarray, self.ts.cdim,
+                                    self.view)
+
+    def __getitem__(self, indices):
+        """index the evaluated TablArray, w.r.t. view"""
+        return self.evaluate()[indices]
+
+    def __array__(self, dtype=None, copy=None):
+        rarray = misc.base(self.evaluate())
+        return np.asarray(rarray, dtype=dtype)
+
+    def __array_function__(self, func, types, args, kwargs):
+        """numpy functions see the evaluated TablArray, e.g. np.sum keeps
+        the cellular shape rather than reducing the ndarray of __array__"""
+        return func(*_evaluated_all(args), **_evaluated_all(kwargs))
+
+
+def _lazy_op(name, swap=False):
+    """operator for LazyTablArray, using tanumpy wrappers which record"""
+    def lazy_op(self, other):
+        from .tanumpy import np_func
+        func = np_func.__dict__[name]
+        return func(other, self) if swap else func(self, other)
+    lazy_op.__name__ = name
+    return lazy_op
+
+
+def _lazy_unary(name):
+    def lazy_unary(self):
+        from .tanumpy import np_func
+        return np_func.__dict__[name](self)
+    lazy_unary.__name__ = name
+    return lazy_unary
+
+
+for _name, _ops in [('add', ('__add__', '__radd__')),
+                    ('subtract', ('__sub__', '__rsub__')),
+                    ('multiply', ('__mul__', '__rmul__')),
+                    ('power', ('__pow__', '__rpow__')),
+                    ('true_divide', ('__truediv__', '__rtruediv__')),
+                    ('floor_divide', ('__floordiv__', '__rfloordiv__'))]:
+    setattr(LazyTablArray, _ops[0], _lazy_op(_name))
+    setattr(LazyTablArray, _ops[1], _lazy_op(_name, swap=True))
+for _name, _op in [('equal', '__eq__'), ('greater_equal', '__ge__'),
+                   ('greater', '__gt__'), ('less_equal', '__le__'),
+                   ('less', '__lt__'), ('logical_and', '__and__'),
+                   ('logical_or', '__or__'), ('logical_xor', '__xor__')]:
+    setattr(LazyTablArray, _op, _lazy_op(_name))
+for _name, _op in [('abs', '__abs__'), ('negative', '__neg__'),
+                   ('invert', '__invert__')]:
+    setattr(LazyTablArray, _op, _lazy_unary(_name))
@@ -11,7 +11,7 @@ Created on Tue Jun 16 18:15:18 2020
 @author: chris
 """
 
-from .misc import *
+from .tamisc import *
 from .new import *
 from .np_func import *
 
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NumPy dispatch protocols for TablArray
+
+TablArray.__array_ufunc__ and TablArray.__array_function__ route numpy calls
+such as np.add(a, b), np.sin(a) or np.sum(a) to the TablArray compatible
+wraps, so the result keeps TablArray broadcasting and cdim.
+
+Created on Sun Oct 18 13:40:26 2026
+
+@author: chris
+"""
+
+import functools
+import numpy as _np
+
+from .. import taextract as _extract
+from .. import misc
+from .. import mmul
+from .. import tacow
+from ..wraps import (tawrap_ax2scalar, tawrap_binarybroadcast,
+                     tawrap_broadcastaxial, tawrap_elementwise,
+                     tawrap_multiop_bcast)
+from ..wraps.cbroadcast import broadcast_plan_n
+from . import linalg
+from . import tamisc as _tamisc
+from . import np_func
+
+
+def _registry(*modules):
+    """map names to the TablArray compatible functions found in modules,
+    skipping anything which is still the plain numpy function"""
+    registry = {}
+    for module in modules:
+        for name, func in vars(module).items():
+            if name.startswith('_') or not callable(func):
+                continue
+            np_func_ = getattr(_np, name, None)
+            if func is np_func_ or isinstance(func, type):
+                continue
+            registry.setdefault(name, func)
+    return registry
+
+
+_np_functions = {
+    'numpy': _registry(np_func, _tamisc),
+    'numpy.linalg': _registry(linalg)}
+_np_functions['numpy'].update(
+    matmul=mmul.matmul, dot=mmul.dot, cross=mmul.cross,
+    extract=_extract.extract)
+
+
+@functools.lru_cache(maxsize=None)
+def _wrapped_ufunc(ufunc, method):
+    """the TablArray compatible wrap of ufunc.method, or None"""
+    if method == '__call__':
+        if ufunc is _np.matmul:
+            return mmul.matmul
+        elif ufunc.nin == 1:
+            return tawrap_elementwise(ufunc)
+        elif ufunc.nin == 2:
+            return tawrap_binarybroadcast(ufunc)
+        return tawrap_multiop_bcast(ufunc, None)
+    elif method == 'reduce':
+        return tawrap_ax2scalar(ufunc.reduce)
+    elif method == 'accumulate':
+        return tawrap_broadcastaxial(ufunc.accumulate)
+    return None
+
+
+def _known_type(arg):
+    """False for types with their own __array_ufunc__ (other than ndarray),
+    those get a chance to handle the call instead"""
+    return not misc._overrides_ufuncs(arg)
+
+
+def _copyto_where(out, rval, where):
+    """copy rval into out (TablArray) where the mask is True"""
+    if misc.istablarray(where):
+        plan = broadcast_plan_n([out.ts, where.ts])
+        where = plan.align([out.base, where.base])[1]
+    _np.copyto(out.base, misc.base(rval), where=where)
+    return out
+
+
+def array_ufunc(ufunc, method, inputs, kwargs):
+    """implementation of TablArray.__array_ufunc__"""
+    if not all(_known_type(arg) for arg in inputs):
+        return NotImplemented
+    if ufunc.nout > 1 and (method != '__call__' or 'out' in kwargs):
+        return NotImplemented
+    func = _wrapped_ufunc(ufunc, method)
+    if func is None:
+        return NotImplemented
+    out = kwargs.pop('out', None)
+    out = out[0] if type(out) is tuple else out
+    if out is not None:
+        if not misc.istablarray(out):
+            return NotImplemented
+        tacow.detach(out)
+    if method != '__call__':
+        # numpy reduces/accumulates along axis 0 by default
+        kwargs.setdefault('axis', 0)
+        if out is not None:
+            kwargs['out'] = out.base
+        rval = func(*inputs, **kwargs)
+        return rval if out is None else out
+    where = kwargs.pop('where', True)
+    if where is not True and out is not None:
+        # calculate everywhere, then copy where the mask is True
+        return _copyto_where(out, func(*inputs, **kwargs), where)
+    # without out, numpy leaves masked elements uninitialized, so
+    # calculating everywhere is also valid
+    if out is not None:
+        kwargs['out'] = out
+    return func(*inputs, **kwargs)
+
+
+def _unwrap(arg):
+    """.base of TablArray, also within lists and tuples"""
+    if misc.istablarray(arg):
+        return arg.base
+    elif type(arg) is list or type(arg) is tuple:
+        return type(arg)(_unwrap(a) for a in arg)
+    elif type(arg) is dict:
+        return {key: _unwrap(val) for key, val in arg.items()}
+    return arg
+
+
+# numpy implements these by reading .shape, .size or .ndim, which follow the
+# view of a TablArray, so they must not see .base
+_view_functions = {'shape', 'size', 'ndim'}
+
+
+def array_function(func, types, args, kwargs):
+    """implementation of TablArray.__array_function__"""
+    from ..ta import TablArray
+    if not all(issubclass(t, (TablArray, _np.ndarray)) for t in types):
+        return NotImplemented
+    ta_func = _np_functions.get(func.__module__, {}).get(func.__name__)
+    if ta_func is not None:
+        return ta_func(*args, **kwargs)
+    implementation = getattr(func, '_implementation', func)
+    if func.__name__ in _view_functions:
+        return implementation(*args, **kwargs)
+    # no TablArray compatible version, so numpy works on .base
+    return implementation(*_unwrap(args), **_unwrap(kwargs))
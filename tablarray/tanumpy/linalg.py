@@ -34,3 +34,16 @@ from ..wraps import tawrap_mat1_rN
 eig = tawrap_mat1_rN(_np.linalg.eig, 2, 1, 2)
 eigh = tawrap_mat1_rN(_np.linalg.eigh, 2, 1, 2)
 slogdet = tawrap_mat1_rN(_np.linalg.slogdet, 2, 0, 1)
+
+from ..wraps import tawrap_gufunc
+
+
+def _solve_vector(a, b):
+    """np.linalg.solve for stacks of vectors b, since numpy>=2 treats b as
+    a stack of matrices unless b is 1-d"""
+    return _np.linalg.solve(a, b[..., None])[..., 0]
+
+
+# func(matrix, vector)->vector, or for matrix cells of b see tawrap_gufunc
+solve = tawrap_gufunc(_solve_vector, '(n,n),(n)->(n)')
+solve.__name__ = 'solve'
@@ -89,6 +89,43 @@ not_equal = tawrap_binarybroadcast(_np.not_equal, dtype=bool)
 remainder = tawrap_binarybroadcast(_np.remainder)
 right_shift = tawrap_binarybroadcast(_np.right_shift)
 
+from ..wraps import tawrap_multiop_bcast as _tawrap_multiop_bcast
+
+
+def _multiply_add(a, b, c, dtype=None, casting='same_kind'):
+    """a * b + c, adding into the product where possible"""
+    rval = _np.multiply(a, b, dtype=dtype, casting=casting)
+    if (_np.broadcast_shapes(rval.shape, _np.shape(c)) == rval.shape
+            and (dtype is not None
+                 or _np.can_cast(_np.result_type(rval, c), rval.dtype))):
+        # avoid a second full-size temporary
+        return _np.add(rval, c, out=rval, dtype=dtype, casting=casting)
+    return _np.add(rval, c, dtype=dtype, casting=casting)
+
+
+def _select_flat(n, *arrays):
+    """np.select with condlist, choicelist, default flattened into args"""
+    return _np.select(list(arrays[:n]), list(arrays[n:2 * n]), arrays[2 * n])
+
+
+# n-ary functions, with one broadcast plan for all operands
+clip = _tawrap_multiop_bcast(_np.clip, [True, True, True], typed=True)
+multiply_add = _tawrap_multiop_bcast(_multiply_add, [True, True, True],
+                                     typed=True)
+where = _tawrap_multiop_bcast(_np.where, [True, True, True])
+_select = _tawrap_multiop_bcast(_select_flat, None)
+
+
+def select(condlist, choicelist, default=0):
+    """**TablArray compatible** select
+
+    Return a TablArray drawn from elements in choicelist, depending on
+    conditions. See numpy.select
+    """
+    n = len(condlist)
+    return _select(n, *condlist, *choicelist, default)
+
+
 from ..wraps import tawrap_elementwise
 # elementwise functions
 abs = tawrap_elementwise(_np.abs)
@@ -55,12 +55,13 @@ class _MeshfilterArgs():
 
     def args(self):
         # second pass, pull args from the temp_set.meshtile
+        # plots only read, so mesh using views instead of copies
         for i in self.index:
             key = self.keys[i]
             if self._returnbaseonly:
-                arg = self.as_set.meshtile(key).base
+                arg = self.as_set.meshtile(key, copy=False).base
             else:
-                arg = self.as_set.meshtile(key)
+                arg = self.as_set.meshtile(key, copy=False)
             self._args[i] = arg
         return self._args
 
@@ -315,7 +316,7 @@ def contour3d_box(*args, cbargs={'pad': 0.1}, **kwargs):
         slice0 = [slice(None), slice(None), slice(None)]
         slice0[ax_dim] = i
         sliced_set = tset.__getitem__(tuple(keys + slice0))
-        x0, y0, z0, data0 = sliced_set.meshtile(*tuple(keys))
+        x0, y0, z0, data0 = sliced_set.meshtile(*tuple(keys), copy=False)
         return x0, y0, z0, data0, mn, mx
     # plot args
     d_mn = data.min()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Precision policy for results of TablArray operations
+
+The policy decides the floating point precision of results from binary ops,
+stacking, matmul and reductions:
+
+    'numpy'     results follow numpy promotion rules (default)
+    'preserve'  results never exceed the widest floating point precision
+                found among the operands, e.g. float32 and int64 stay float32
+    'single'    results are at most single precision (float32, complex64)
+
+Created on Sun Oct 18 09:12:40 2026
+
+@author: chris
+"""
+
+import contextlib
+import warnings
+import numpy as np
+
+from . import misc
+
+_precision_options = {
+    'policy': 'numpy',  # 'numpy', 'preserve' or 'single'
+    'report': 'ignore'}  # 'ignore', 'warn' or 'raise' when an op upcasts
+
+
+class UpcastWarning(RuntimeWarning):
+    """an operation upcast floating point precision beyond its operands"""
+    pass
+
+
+def _check_options_2dict(policy=None, report=None):
+    """validate options, return a dict of non-None options"""
+    options = {k: v for k, v in locals().items() if v is not None}
+    if policy not in [None, 'numpy', 'preserve', 'single']:
+        raise ValueError("policy must be one of 'numpy', 'preserve', or "
+                         "'single'")
+    if report not in [None, 'ignore', 'warn', 'raise']:
+        raise ValueError("report must be one of 'ignore', 'warn', or "
+                         "'raise'")
+    return options
+
+
+def set_precision(policy=None, report=None):
+    """
+    Set the precision policy for tablarray results.
+
+    Parameters
+    ----------
+    policy: 'numpy' 'preserve' 'single' [optional]
+        'numpy' (default) follows numpy promotion rules. 'preserve' casts
+        floating point results down to the widest floating point precision
+        of the operands. 'single' casts floating point results down to
+        float32 or complex64.
+    report: 'ignore' 'warn' 'raise' [optional]
+        What to do when a floating point result is wider than its
+        narrowest TablArray operand, e.g. float32 * float64 ndarray, or the
+        mean of int32. 'warn' issues an UpcastWarning, 'raise' raises
+        TypeError. (default 'ignore')
+    """
+    options = _check_options_2dict(policy, report)
+    _precision_options.update(options)
+    misc._set_active('precision', isactive())
+
+
+def get_precision():
+    """
+    Return the current precision policy for tablarray.
+
+    Returns
+    -------
+    options: dict
+        - policy: str
+        - report: str
+    """
+    return _precision_options.copy()
+
+
+@contextlib.contextmanager
+def precision(*args, **kwargs):
+    """
+    Context manager for setting the precision policy for tablarray.
+
+    >>> import numpy as np
+    >>> import tablarray as ta
+    >>> a = ta.TablArray(np.ones((3, 2), dtype=np.float32), 1)
+    >>> with ta.precision('preserve'):
+    ...     print((a * np.arange(2)).dtype)
+    float32
+
+    See set_precision for parameters.
+    """
+    # save prior policy
+    opts = get_precision()
+    try:
+        set_precision(*args, **kwargs)
+        # yield with the requested policy in context
+        yield get_precision()
+    finally:
+        # always return to prior policy
+        set_precision(**opts)
+
+
+def isactive():
+    """True unless the policy is the default, i.e. numpy and ignore"""
+    return not (_precision_options['policy'] == 'numpy'
+                and _precision_options['report'] == 'ignore')
+
+
+def _real_itemsize(dtype):
+    """bytes per real component of an inexact dtype, else None"""
+    if dtype.kind == 'f':
+        return dtype.itemsize
+    elif dtype.kind == 'c':
+        return dtype.itemsize // 2
+    return None
+
+
+def _operands_itemsize(operands):
+    """widest real itemsize among inexact operands, None if there are none
+
+    Python scalars don't count, numpy doesn't let them upcast arrays"""
+    itemsize = None
+    for operand in operands:
+        dtype = getattr(operand, 'dtype', None)
+        if dtype is None:
+            continue
+        size = _real_itemsize(np.dtype(dtype))
+        if size is not None and (itemsize is None or size > itemsize):
+            itemsize = size
+    return itemsize
+
+
+def _report_itemsize(operands):
+    """itemsize a result is compared to when reporting upcasts: of the
+    narrowest TablArray operand (else array operand), by real itemsize if
+    any is inexact, else by itemsize, i.e. integers count as their width.
+    None if there are no such operands"""
+    arrays = [op for op in operands if hasattr(op, 'ts')]
+    if not arrays:
+        arrays = [op for op in operands if hasattr(op, 'dtype')]
+    dtypes = [np.dtype(op.dtype) for op in arrays]
+    sizes = [_real_itemsize(dtype) for dtype in dtypes
+             if dtype.kind in 'fc']
+    if not sizes:
+        sizes = [dtype.itemsize for dtype in dtypes if dtype.kind in 'biu']
+    return min(sizes) if sizes else None
+
+
+def _capped_dtype(dtype, itemsize):
+    """dtype cast down to itemsize bytes per real component"""
+    if dtype.kind == 'c':
+        # the narrowest complex is complex64
+        return np.dtype('c%d' % (2 * max(itemsize, 4)))
+    return np.dtype('f%d' % itemsize)
+
+
+def policy_dtype(dtype, operands, name='operation'):
+    """
+    Given the dtype numpy would return from operands, return the dtype
+    required by the precision policy, reporting any remaining upcast.
+    """
+    policy = _precision_options['policy']
+    report = _precision_options['report']
+    if policy == 'numpy' and report == 'ignore':
+        # fast path, nothing to do
+        return np.dtype(dtype)
+    dtype = np.dtype(dtype)
+    real_size = _real_itemsize(dtype)
+    if real_size is None:
+        return dtype
+    in_size = _operands_itemsize(operands)
+    if policy == 'single':
+        cap = 4
+    elif policy == 'preserve':
+        cap = in_size
+    else:
+        cap = None
+    if cap is not None and real_size > cap:
+        dtype = _capped_dtype(dtype, cap)
+        real_size = _real_itemsize(dtype)
+    if report == 'ignore':
+        return dtype
+    ref_size = _report_itemsize(operands)
+    if ref_size is not None and real_size > ref_size:
+        msg = ('%s upcast %d-byte operands to %s'
+               % (name, ref_size, dtype))
+        if report == 'raise':
+            raise TypeError(msg)
+        warnings.warn(msg, UpcastWarning, stacklevel=3)
+    return dtype
+
+
+def _operand_dtype(operand):
+    """dtype for ufunc.resolve_dtypes, python scalars stay weakly typed"""
+    if type(operand) in (int, float, complex):
+        return type(operand)
+    dtype = getattr(operand, 'dtype', None)
+    return np.result_type(operand) if dtype is None else dtype
+
+
+def ufunc_dtype(func, operands):
+    """the dtype numpy computes func(*operands) at, if func is a single
+    output ufunc, else None"""
+    if not isinstance(func, np.ufunc) or func.nout != 1:
+        return None
+    try:
+        dtypes = tuple(_operand_dtype(op) for op in operands) + (None,)
+        return func.resolve_dtypes(dtypes)[-1]
+    except (TypeError, ValueError):
+        return None
+
+
+# reductions which take dtype=, where integer operands give float results
+_float_reductions = {'mean', 'nanmean', 'std', 'nanstd', 'var', 'nanvar'}
+_sum_reductions = {'sum', 'nansum', 'prod', 'nanprod'}
+
+
+def reduction_dtype(name, dtype):
+    """the dtype numpy computes reduction name at, for real operands of
+    dtype, if the reduction takes dtype=, else None"""
+    dtype = np.dtype(dtype)
+    if name not in _float_reductions and name not in _sum_reductions:
+        return None
+    if dtype.kind == 'f':
+        return dtype
+    if dtype.kind in 'biu' and name in _float_reductions:
+        return np.dtype(float)
+    return None
+
+
+def apply_policy(rarray, operands, name='operation'):
+    """cast rarray to the dtype required by the precision policy
+
+    Only for results whose dtype couldn't be known in advance, otherwise
+    pass policy_dtype as dtype= into the calculation, which avoids a
+    full-size temporary at numpy's precision"""
+    if not isactive():
+        # fast path, nothing to do
+        return rarray
+    dtype = getattr(rarray, 'dtype', None)
+    if dtype is None:
+        return rarray
+    dtype2 = policy_dtype(dtype, operands, name)
+    if dtype2 == dtype:
+        return rarray
+    return rarray.astype(dtype2, copy=False)
@@ -7,32 +7,116 @@ Created on Mon Apr 27 15:58:10 2020
 """
 
 import copy
+import functools
+import math
+import weakref
 import numpy as np
 
 from .wraps import cbroadcast
 
 
 class taShape(object):
-    """given an array and cellular ndim, return derived attributes object"""
-    def __init__(self, shape, cdim):
-        self.cdim = cdim
-        self.tdim = len(shape) - cdim
-        self.cshape = shape[self.tdim:]     # cellular shape
-        self.csize = np.prod(self.cshape)   # cellular number of elements
-        self.tshape = shape[:self.tdim]     # tabular shape
-        self.tsize = np.prod(self.tshape)   # tabular number of elements
+    """given an array and cellular ndim, return derived attributes object
+
+    taShape is immutable and interned, i.e. taShape(shape, cdim) returns the
+    same object for equal arguments as long as one is alive. So it is
+    hashable and cheap to compare or use as a dict key."""
+    __slots__ = ('cdim', 'tdim', 'cshape', 'csize', 'tshape', 'tsize',
+                 '_hash', '_views', '_indexed', '__weakref__')
+    _interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, shape, cdim):
+        return _recent_shape(cls, tuple(shape), cdim)
+
+    @classmethod
+    def _intern(cls, shape, cdim):
+        """the live taShape for shape and cdim, else a new one"""
+        key = (shape, cdim)
+        self = cls._interned.get(key)
+        if self is not None:
+            return self
+        shape = tuple(int(n) for n in shape)
+        cdim = int(cdim)
+        tdim = len(shape) - cdim
+        self = object.__new__(cls)
+        # derived fields are set once, bypassing __setattr__
+        _set = object.__setattr__
+        _set(self, 'cdim', cdim)
+        _set(self, 'tdim', tdim)
+        _set(self, 'cshape', shape[tdim:])      # cellular shape
+        _set(self, 'csize', math.prod(shape[tdim:]))  # cellular n elements
+        _set(self, 'tshape', shape[:tdim])      # tabular shape
+        _set(self, 'tsize', math.prod(shape[:tdim]))  # tabular n elements
+        _set(self, '_hash', hash((shape, cdim)))
+        # view attributes of TablArray, filled in per view by ta.py
+        _set(self, '_views', {})
+        # taShapes after one int index, see _int_indexed
+        _set(self, '_indexed', {})
+        cls._interned[key] = self
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError('taShape is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('taShape is immutable')
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, taShape):
+            return NotImplemented
+        return (self.cdim == other.cdim and self.tshape == other.tshape
+                and self.cshape == other.cshape)
+
+    def __ne__(self, other):
+        rval = self.__eq__(other)
+        return rval if rval is NotImplemented else not rval
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (taShape, (self.tshape + self.cshape, self.cdim))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     def __str__(self):
         return 't%s|c%s' % (self.tshape, self.cshape)
 
+    def __repr__(self):
+        return 'taShape(%s, %d)' % (self.tshape + self.cshape, self.cdim)
+
     def combine(self, other):
         """combine - the new shape after broadcast of 2,
         None if incompatible"""
         if other is None:
             return self, None
-        bc = cbroadcast.CellBroadcast.from_tshapes(self, other)
-        new_shape = taShape(tuple(bc.new_shape), bc.new_cdim) if bc.valid else None
-        return new_shape, bc
+        entry = cbroadcast._combined.get((id(self), id(other)))
+        if entry is None:
+            bc = cbroadcast.broadcast_plan(self, other)
+            new_shape = (taShape(bc.new_shape, bc.new_cdim) if bc.valid
+                         else None)
+            entry = (self, other, new_shape, bc)
+            cbroadcast._remember(cbroadcast._combined,
+                                 (id(self), id(other)), entry)
+        return entry[2], entry[3]
+
+    def _int_indexed(self, cellular):
+        """the taShape after one int index, into the first cellular dim if
+        cellular, else into the first tabular dim"""
+        ts = self._indexed.get(cellular)
+        if ts is None:
+            if cellular:
+                ts = taShape(self.tshape + self.cshape[1:], self.cdim - 1)
+            else:
+                ts = taShape(self.tshape[1:] + self.cshape, self.cdim)
+            self._indexed[cellular] = ts
+        return ts
 
     def cslice(self, indices):
         """align slice indices only to the cellular structure,
@@ -86,3 +170,9 @@ class taShape(object):
             if idx != slice(None):
                 cdim -= 1
         return indices, cdim
+
+
+# recently used shapes stay alive, so short-lived results don't keep
+# re-creating them
+_recent_shape = functools.lru_cache(maxsize=1024)(
+    lambda cls, shape, cdim: cls._intern(shape, cdim))
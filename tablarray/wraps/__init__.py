@@ -9,6 +9,7 @@ TablArray-like functions.
 
 from .cbroadcast import *
 from .funcnd import *
+from .gufunc import tawrap_gufunc
 from .lin import *
 from .op12swap import *
 #from .sets import *
@@ -7,8 +7,13 @@ Created on Fri Feb 28 12:09:36 2020
 """
 # std lib
 import attr
+import functools
 import numpy as np
 
+from .. import misc
+from .. import taarena
+from .. import taexec
+
 # broadcast loop controls
 DIMEQ = 0       # EQ dimensions
 DIMLP1 = 1      # loop over side 1
@@ -17,30 +22,22 @@ DIMPAD1 = -1    # pad on side 1
 DIMPAD2 = -2    # pad on side 2
 DIMERR = -3     # error, incompatible dimension
 
-_DTYPE_PRIORITY = {'bool': 0,
-                   'bool8': 1,
-                   'int8': 2,
-                   'int16': 3,
-                   'int32': 4,
-                   'int64': 5,
-                   'float16': 6,
-                   'float32': 7,
-                   'float64': 8,
-                   'float128': 9,
-                   'complex64': 10,
-                   'complex128': 11,
-                   'complex256': 12}
-
 
 def _prioritize_dtype(override, atype, btype):
     """when arrays a and b are broadcast,
-    determine dtype of the return array"""
+    determine dtype of the return array (numpy promotion rules)"""
     if override is not None:
         return override
-    a_priority = _DTYPE_PRIORITY[atype.__str__()]
-    b_priority = _DTYPE_PRIORITY[btype.__str__()]
-    dtype = atype if (a_priority >= b_priority) else btype
-    return dtype
+    return np.result_type(atype, btype)
+
+
+def _call_into(func, out, *args, **kwargs):
+    """calculate func(*args, **kwargs) into the ndarray out, directly if func
+    is a ufunc, else by assignment"""
+    if isinstance(func, np.ufunc):
+        return func(*args, out=out, **kwargs)
+    out[...] = func(*args, **kwargs)
+    return out
 
 
 def broadcast_shape(shape1, shape2):
@@ -80,12 +77,21 @@ def broadcast_shape(shape1, shape2):
     return new_shape, controls, valid
 
 
-@attr.s
+def _freeze(plan, **attrs):
+    """set derived attributes of a frozen plan once, in __attrs_post_init__"""
+    for key, val in attrs.items():
+        object.__setattr__(plan, key, val)
+
+
+@attr.s(frozen=True)
 class CellBroadcast(object):
     """Given a and b arrays, being segmented between tabular and cellular
     shapes, provide an iterator that yields 3 slices to be used for
     broadcasting.
 
+    CellBroadcast is an immutable plan, so it is safe to share. Prefer
+    broadcast_plan() which memoizes plans in an LRU cache.
+
     Example::
 
         cb = CellBroadcast((2,), (1,), (1,), (2, 2))
@@ -103,24 +109,65 @@ class CellBroadcast(object):
         # cellularshape controls
         cshape_ctrl = broadcast_shape(
                 self._cshape_a, self._cshape_b)
-        # new_cdim = len(new_cshape)
-        self.new_cdim = len(cshape_ctrl[0])
         # master shape controls
-        shape_ctrl = self._broadcast_ctrl_combiner(
+        new_shape, controls, valid = self._broadcast_ctrl_combiner(
                 tshape_ctrl, cshape_ctrl)
-        self.new_shape, self._controls, self.valid = shape_ctrl
-        self._ndim = len(self.new_shape)
-        self.rslice = [slice(None)] * self._ndim
-        is_in_a = np.logical_not(self._controls == DIMPAD1)
-        ndim_a = np.sum(is_in_a)
-        self.aslice = [slice(None)] * ndim_a
-        self._a_ndim_map = np.zeros(self._ndim, dtype=int)
-        self._a_ndim_map[is_in_a] = np.arange(ndim_a)
-        is_in_b = np.logical_not(self._controls == DIMPAD2)
-        ndim_b = np.sum(is_in_b)
-        self.bslice = [slice(None)] * ndim_b
-        self._b_ndim_map = np.zeros(self._ndim, dtype=int)
-        self._b_ndim_map[is_in_b] = np.arange(ndim_b)
+        ndim = len(new_shape)
+        is_in_a = np.logical_not(controls == DIMPAD1)
+        ndim_a = int(np.sum(is_in_a))
+        a_ndim_map = np.zeros(ndim, dtype=int)
+        a_ndim_map[is_in_a] = np.arange(ndim_a)
+        is_in_b = np.logical_not(controls == DIMPAD2)
+        ndim_b = int(np.sum(is_in_b))
+        b_ndim_map = np.zeros(ndim, dtype=int)
+        b_ndim_map[is_in_b] = np.arange(ndim_b)
+        _freeze(
+            self,
+            # new_cdim = len(new_cshape)
+            new_cdim=len(cshape_ctrl[0]),
+            new_shape=tuple(int(n) for n in new_shape),
+            valid=valid,
+            _controls=tuple(int(c) for c in controls),
+            _ndim=ndim,
+            _ndim_a=ndim_a,
+            _ndim_b=ndim_b,
+            _a_ndim_map=tuple(int(d) for d in a_ndim_map),
+            _b_ndim_map=tuple(int(d) for d in b_ndim_map))
+        # aligned shapes, i.e. singleton axes inserted where a or b is padded
+        # so that a single call with numpy broadcasting replaces the loop
+        _freeze(
+            self,
+            _a_shape=self._aligned_shape(
+                self._tshape_a, self._cshape_a, DIMPAD1),
+            _b_shape=self._aligned_shape(
+                self._tshape_b, self._cshape_b, DIMPAD2),
+            # 0-length dims look like padding, keep the loop for those cases
+            _vectorized=(
+                ndim_a == len(self._tshape_a) + len(self._cshape_a)
+                and ndim_b == len(self._tshape_b) + len(self._cshape_b)))
+        # numpy broadcasting pads on the left anyway, so arrays which only
+        # miss leading singleton axes need no reshape
+        _freeze(
+            self,
+            _a_as_is=self._is_left_padded(
+                self._a_shape, self._tshape_a, self._cshape_a),
+            _b_as_is=self._is_left_padded(
+                self._b_shape, self._tshape_b, self._cshape_b))
+
+    @staticmethod
+    def _is_left_padded(aligned_shape, tshape, cshape):
+        """True if aligned_shape is tshape + cshape after leading 1's"""
+        shape = tuple(tshape) + tuple(cshape)
+        pad = len(aligned_shape) - len(shape)
+        return (aligned_shape[pad:] == shape
+                and all(n == 1 for n in aligned_shape[:pad]))
+
+    def _aligned_shape(self, tshape, cshape, pad_ctrl):
+        """insert singleton axes into tshape + cshape wherever pad_ctrl
+        appears, giving a shape of ndim equal to new_shape"""
+        shape = iter(tuple(tshape) + tuple(cshape))
+        return tuple(1 if ctrl == pad_ctrl else next(shape, 0)
+                     for ctrl in self._controls)
 
     @classmethod
     def from_tshapes(cls, a_ts, b_ts):
@@ -136,56 +183,227 @@ class CellBroadcast(object):
         valid = a_valid and b_valid
         return new_shape, controls, valid
 
-    def _set_slice(self, dim, this_ctrl, this_slice):
-        self.rslice[dim] = (this_slice)
+    def _set_slice(self, slices, dim, this_ctrl, this_slice):
+        rslice, aslice, bslice = slices
+        rslice[dim] = (this_slice)
         adim = self._a_ndim_map[dim]
         bdim = self._b_ndim_map[dim]
         # place this slice into aslice and/or bslice
         if this_ctrl == DIMLP2 or this_ctrl == DIMPAD2:
-            self.aslice[adim] = (this_slice)
+            aslice[adim] = (this_slice)
         if this_ctrl == DIMLP1 or this_ctrl == DIMPAD1:
-            self.bslice[bdim] = (this_slice)
+            bslice[bdim] = (this_slice)
         # DIMLP requires slice(0) to dereference
         if this_ctrl == DIMLP1:
-            self.aslice[adim] = (0)
+            aslice[adim] = (0)
         elif this_ctrl == DIMLP2:
-            self.bslice[bdim] = (0)
+            bslice[bdim] = (0)
+
+    def __iter__(self):
+        # slices are local to each iteration, so a shared plan is reentrant
+        slices = ([slice(None)] * self._ndim,
+                  [slice(None)] * self._ndim_a,
+                  [slice(None)] * self._ndim_b)
+        return self._iter_dim(slices, 0)
 
-    def __iter__(self, dim=0):
+    def _iter_dim(self, slices, dim):
         if dim == self._ndim:
             # end recursion using yield as an iterator
-            yield tuple(self.rslice), tuple(self.aslice), tuple(self.bslice)
+            yield tuple(slices[0]), tuple(slices[1]), tuple(slices[2])
             return
         this_ctrl = self._controls[dim]
         if this_ctrl == DIMEQ:
             # recursion
-            yield from self.__iter__(dim + 1)
+            yield from self._iter_dim(slices, dim + 1)
         else:
             this_n = self.new_shape[dim]
             for i in range(this_n):
-                self._set_slice(dim, this_ctrl, i)
+                self._set_slice(slices, dim, this_ctrl, i)
                 # recursion
-                yield from self.__iter__(dim + 1)
+                yield from self._iter_dim(slices, dim + 1)
 
     def demo(self):
-        print('new_shape: %s' % self.new_shape)
+        print('new_shape: %s' % (self.new_shape,))
         for rslice, aslice, bslice in self:
             print('\nr ', rslice)
             print('a ', aslice)
             print('b ', bslice)
 
-    def calc_function(self, func, a, b, dtype=None):
-        """calculate rval=func(a, b) using my iterator"""
-        assert self.valid, (
-                "couldn't broadcast compound shapes %s and %s" %
-                (a.ts, b.ts))
+    def calc_function(self, func, a, b, *args, dtype=None, out=None,
+                      **kwargs):
+        """calculate rval=func(a, b), vectorized where possible, else using
+        my iterator. If given, out (ndarray of new_shape) receives rval."""
+        if not self.valid:
+            raise ValueError("couldn't broadcast compound shapes %s and %s"
+                             % (a.shape, b.shape))
+        if self._vectorized:
+            # one call over the aligned arrays does the whole broadcast
+            a2 = a if self._a_as_is else a.reshape(self._a_shape)
+            b2 = b if self._b_as_is else b.reshape(self._b_shape)
+            if out is None and not misc._active_features:
+                # one plain call, nothing is blocked, threaded or pooled
+                rval = func(a2, b2, *args, **kwargs)
+                return rval if dtype is None else np.asarray(rval, dtype=dtype)
+            blocks = taexec.blocks(self.new_shape)
+            if blocks is not None:
+                return taexec.call_blocked(
+                    func, self.new_shape, (a2, b2), *args, out=out,
+                    dtype=dtype, blocks=blocks, **kwargs)
+            if out is not None:
+                return _call_into(func, out, a2, b2, *args, **kwargs)
+            # func decides the dtype, unless there is an override
+            if taarena.isactive():
+                rval = taarena.call(func, self.new_shape, (a2, b2), *args,
+                                    **kwargs)
+            else:
+                rval = func(a2, b2, *args, **kwargs)
+            return rval if dtype is None else np.asarray(rval, dtype=dtype)
+        # fall back on the loop, e.g. if any dims have 0 length
         dtype = _prioritize_dtype(dtype, a.dtype, b.dtype)
-        rval = np.zeros(self.new_shape, dtype=dtype)
+        return self._calc_loop(func, a, b, *args, dtype=dtype, out=out,
+                               **kwargs)
+
+    def _calc_loop(self, func, a, b, *args, dtype=None, out=None, **kwargs):
+        """calculate rval=func(a, b) using my iterator"""
+        rval = np.zeros(self.new_shape, dtype=dtype) if out is None else out
         for rslice, aslice, bslice in self:
-            rval[rslice] = func(a[aslice], b[bslice])
+            rval[rslice] = func(a[aslice], b[bslice], *args, **kwargs)
         return rval
 
 
+@attr.s(frozen=True)
+class MultiBroadcast(object):
+    """Given the tabular and cellular shapes of any number of arrays, plan
+    their TablArray broadcast: the new shape, and for each array an aligned
+    shape with singleton axes inserted into its tabular and cellular shapes.
+    After align(), a single call with numpy broadcasting does the rest.
+
+    Example::
+
+        mb = MultiBroadcast(((4,), (3, 1), ()), ((2,), (), (2, 2)))
+        mb.new_shape    # (3, 4, 2, 2)
+    """
+    _tshapes = attr.ib(type=tuple)
+    _cshapes = attr.ib(type=tuple)
+
+    def __attrs_post_init__(self):
+        valid = True
+        new_tshape = ()
+        for tshape in self._tshapes:
+            new_tshape, _, valid_i = broadcast_shape(new_tshape, tshape)
+            new_tshape = tuple(int(n) for n in new_tshape)
+            valid = valid and valid_i
+        new_cshape = ()
+        for cshape in self._cshapes:
+            new_cshape, _, valid_i = broadcast_shape(new_cshape, cshape)
+            new_cshape = tuple(int(n) for n in new_cshape)
+            valid = valid and valid_i
+        new_tdim = len(new_tshape)
+        new_cdim = len(new_cshape)
+        shapes = tuple(
+            (1,) * (new_tdim - len(tshape)) + tuple(tshape)
+            + (1,) * (new_cdim - len(cshape)) + tuple(cshape)
+            for tshape, cshape in zip(self._tshapes, self._cshapes))
+        _freeze(self, new_shape=new_tshape + new_cshape, new_cdim=new_cdim,
+                valid=valid, _shapes=shapes,
+                # arrays which only miss leading singleton axes need no
+                # reshape, numpy broadcasting pads those anyway
+                _as_is=tuple(
+                    CellBroadcast._is_left_padded(shape, tshape, cshape)
+                    for shape, tshape, cshape
+                    in zip(shapes, self._tshapes, self._cshapes)))
+
+    def align(self, arrays, core_shapes=None):
+        """reshape each array to its aligned shape (views, no copies),
+        optionally followed by trailing core_shapes which don't broadcast
+        (e.g. gufunc core dims)"""
+        if not self.valid:
+            raise ValueError("couldn't broadcast compound shapes %s"
+                             % ([a.shape for a in arrays],))
+        if core_shapes is None:
+            return [a if as_is else a.reshape(shape) for a, shape, as_is
+                    in zip(arrays, self._shapes, self._as_is)]
+        return [a.reshape(shape + tuple(core)) for a, shape, core
+                in zip(arrays, self._shapes, core_shapes)]
+
+
+# memoized broadcast plans, keyed on the plan type and its shapes
+_PLAN_CACHE_SIZE = 256
+
+
+def _new_plan(cls, *shapes):
+    return cls(*shapes)
+
+
+_cached_plan = functools.lru_cache(maxsize=_PLAN_CACHE_SIZE)(_new_plan)
+
+# results of taShape.combine and broadcast_plan_n for recent taShapes, keyed
+# on their ids which is cheaper than hashing their shapes. Entries hold the
+# taShapes, so the ids stay valid
+_combined = {}
+_planned_n = {}
+_combined_size = _PLAN_CACHE_SIZE
+
+
+def _remember(cache, key, entry):
+    """keep entry in cache (_combined or _planned_n), starting over once
+    _combined_size entries are kept"""
+    if _combined_size is not None and len(cache) >= _combined_size:
+        cache.clear()
+    if _combined_size != 0:
+        cache[key] = entry
+
+
+def broadcast_plan(a_ts, b_ts):
+    """return the (cached) CellBroadcast plan for 2 taShapes"""
+    return _cached_plan(CellBroadcast, a_ts.tshape, b_ts.tshape,
+                        a_ts.cshape, b_ts.cshape)
+
+
+def broadcast_plan_n(tss):
+    """return the (cached) MultiBroadcast plan for a sequence of taShapes"""
+    tss = tuple(tss)
+    key = tuple(map(id, tss))
+    entry = _planned_n.get(key)
+    if entry is None:
+        plan = _cached_plan(MultiBroadcast,
+                            tuple(ts.tshape for ts in tss),
+                            tuple(ts.cshape for ts in tss))
+        entry = (tss, plan)
+        _remember(_planned_n, key, entry)
+    return entry[1]
+
+
+def broadcast_cache_info():
+    """return hits, misses, maxsize and currsize of the broadcast plan
+    cache"""
+    return _cached_plan.cache_info()
+
+
+def broadcast_cache_clear():
+    """clear the broadcast plan cache and its statistics"""
+    _cached_plan.cache_clear()
+    _combined.clear()
+    _planned_n.clear()
+
+
+def set_broadcast_cache_size(maxsize):
+    """set the maximum number of cached broadcast plans (clears the cache)
+
+    Parameters
+    ----------
+    maxsize : int or None
+        0 disables caching, None lets the cache grow without bound
+    """
+    global _cached_plan, _combined_size
+    if maxsize is not None and (type(maxsize) is not int or maxsize < 0):
+        raise ValueError('maxsize must be None or int >= 0')
+    _cached_plan = functools.lru_cache(maxsize=maxsize)(_new_plan)
+    _combined.clear()
+    _planned_n.clear()
+    _combined_size = maxsize
+
+
 if __name__ == '__main__':
     import doctest
     doctest.testmod()
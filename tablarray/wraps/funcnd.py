@@ -9,7 +9,25 @@ Created on Wed Sep 27 18:56:18 2023
 import functools as _functools
 import numpy as _np
 
+from .. import talazy as _lazy
 from .. import misc
+from .. import taarena
+from .. import taexec
+from .. import taprecision
+from .cbroadcast import _call_into, broadcast_plan_n
+
+# operand types which the fast paths handle directly
+_scalar_types = (int, float, complex, bool, _np.float64, _np.int64,
+                 _np.complex128)
+
+
+def _fast_rval(rclass, rval, ts, view):
+    """wrap the result of a fast path, trusting ts (taShape or cdim) if
+    rval is one ndarray, e.g. ufuncs with several outputs give a tuple"""
+    if type(rval) is _np.ndarray:
+        return rclass._from_trusted(rval, ts, view)
+    cdim = ts if type(ts) is int else ts.cdim
+    return misc._rval_once_a_ta(rclass, rval, cdim, view)
 
 
 def tawrap_passthrough(func):
@@ -22,8 +40,10 @@ def tawrap_passthrough(func):
         args2 = []
         kwargs2 = {}
         for arg in args:
+            arg = _lazy.evaluated(arg)
             args2.append(arg.base if misc.istablarray(arg) else arg)
         for key, val in kwargs.items():
+            val = _lazy.evaluated(val)
             kwargs2[key] = val.base if misc.istablarray(val) else val
         func(*tuple(args2), **kwargs2)
     wrap_a_pthrough.__doc__ = (
@@ -38,15 +58,56 @@ def tawrap_elementwise(func):
     unary input.
 
     After wrap, the function will allow TablArray-like inputs including
-    np.ndarray, or scalar.
+    np.ndarray, or scalar. out= may give a TablArray to receive the result.
     """
     @_functools.wraps(func)
-    def wrap_elop_cast(x, *args, **kwargs):
-        if misc.istablarray(x):
+    def wrap_elop_cast(x, *args, out=None, **kwargs):
+        x_type = type(x)
+        if (x_type in misc._tablarray_types and out is None and x.ts.tdim
+                and not misc._active_features):
+            # fast path for the common case
             rarray = func(x.base, *args, **kwargs)
+            return _fast_rval(x_type, rarray, x.ts, x.view)
+        if _lazy.islazy(x) or (_lazy.isrecording() and misc.istablarray(x)):
+            node = _lazy.record(func, (x, *args), kwargs)
+            return _lazy_out(node, out)
+        if misc.istablarray(x):
+            call = func
+            pdtype = None
+            if (out is None and not args and 'dtype' not in kwargs
+                    and 'casting' not in kwargs and taprecision.isactive()):
+                # compute at the precision of the policy, not cast afterwards
+                pdtype = taprecision.ufunc_dtype(func, (x,))
+                if pdtype is not None:
+                    pdtype = taprecision.policy_dtype(pdtype, (x,),
+                                                      func.__name__)
+                    call = _functools.partial(func, dtype=pdtype,
+                                              casting='same_kind')
+            if out is not None:
+                misc._check_out(out, x.base.shape, x.ts.cdim)
+            blocks = taexec.blocks(x.base.shape)
+            if blocks is not None:
+                rarray = taexec.call_blocked(
+                    call, x.base.shape, (x.base,), *args,
+                    out=None if out is None else out.base, blocks=blocks,
+                    **kwargs)
+            elif out is not None:
+                _call_into(call, out.base, x.base, *args, **kwargs)
+            elif taarena.isactive() and pdtype is None:
+                rarray = taarena.call(call, x.base.shape, (x.base,), *args,
+                                      **kwargs)
+            else:
+                rarray = call(x.base, *args, **kwargs)
+            if out is not None:
+                return out
+            if pdtype is None:
+                rarray = taprecision.apply_policy(rarray, (x,),
+                                                  func.__name__)
             rclass = x.__class__
             # once a TablArray, usually a TablArray
             return misc._rval_once_a_ta(rclass, rarray, x.ts.cdim, x.view)
+        elif out is not None:
+            return func(x, *args, out=out, **kwargs)
         else:
             # a is presumably array-like
             return func(x, *args, **kwargs)
@@ -70,6 +131,7 @@ def tawrap_ax2scalar(func, default_view=None):
         # what should happen if user throws keepdims?
         # or instead of looking for 'keepdims' in kwargs
         #   should we verify dimensions change in rval?
+        a = _lazy.evaluated(a)
         if misc.istablarray(a):
             if type(view) is str:
                 # get view of a (same as a.cell or a.table)
@@ -99,7 +161,19 @@ def tawrap_ax2scalar(func, default_view=None):
                     # the number of cdims is unchanged, easy case
                     delta_cdim = 0
                     # cdim = a.ts.cdim
-            rarray = func(a.base, axis=axis, **kwargs)
+            pdtype = None
+            if (taprecision.isactive() and 'dtype' not in kwargs
+                    and 'out' not in kwargs):
+                # reduce at the precision of the policy, not cast after
+                pdtype = taprecision.reduction_dtype(func.__name__,
+                                                     a.base.dtype)
+                if pdtype is not None:
+                    pdtype = taprecision.policy_dtype(pdtype, (a,),
+                                                      func.__name__)
+                    kwargs = dict(kwargs, dtype=pdtype)
+            rarray = taexec.call_reduction(func, a.base, axis, **kwargs)
+            if pdtype is None:
+                rarray = taprecision.apply_policy(rarray, (a,), func.__name__)
             rclass = a.__class__  # probably TablArray
             # there are cases where the ndim doesn't actually reduce (e.g. keepdims=True in kwargs)
             cdim = a.ts.cdim - delta_cdim if (_np.ndim(rarray) < _np.ndim(a.base)) else 0
@@ -124,16 +198,22 @@ def tawrap_broadcastaxial(func, default_view=None):
     _doc_prepend = ("    **TablArray compatible** %s, where axis aligns w.r.t. view\n\n" % func.__name__
                     + "    view: 'cell', 'table', or None (default=%s)\n" % default_view
                     + "        overrides a.view if istablarray(a)\n"
+                    + "    workers: int or None (default=None)\n"
+                    + "        threads for a block-parallel cumsum, cumprod,"
+                    + " nancumsum or nancumprod\n"
                     + "    -----\n\n")
     @_functools.wraps(func)
-    def wrapped_ax2_bcast(a, axis=None, view=default_view, **kwargs):
+    def wrapped_ax2_bcast(a, axis=None, view=default_view, workers=None,
+                          **kwargs):
+        a = _lazy.evaluated(a)
         if misc.istablarray(a):
             if type(view) is str:
                 # get view of a (same as a.cell or a.table)
                 # not a.setview which alters input parameter
                 a = a.__getattribute__(view)
             axis = a._viewdims[axis]
-            rarray = func(a.base, axis=axis, **kwargs)
+            # scans like cumsum may run block-parallel, see taexec
+            rarray = taexec.call_scan(func, a.base, axis, workers, **kwargs)
             rclass = a.__class__
             # once a TablArray, usually a TablArray
             return misc._rval_once_a_ta(rclass, rarray, a.ts.cdim, a.view)
@@ -158,41 +238,142 @@ def _cast_other_type(other, ta):
     return other
 
 
+def _lazy_out(node, out):
+    """return a lazy node, or evaluate it into out if given"""
+    if out is None:
+        return node
+    misc._check_out(out, node.shape, node.ts.cdim)
+    node.evaluate(out=out.base)
+    return out
+
+
 def tawrap_binarybroadcast(func, dtype=None):
     """
     TablArray wrap for numpy-compatible functions which have binary input
     and need TablArray broadcasting adaptation.
 
     After wrap, the function will allow TablArray-like inputs including
-    np.ndarray, or scalar.
+    np.ndarray, or scalar. out= may give a TablArray to receive the result.
     """
     @_functools.wraps(func)
-    def wrap_bin_bcast(a, b, *args, **kwargs):
+    def wrap_bin_bcast(a, b, *args, out=None, **kwargs):
         """depending on the types of a and b, find a suitable broadcasting"""
-        if misc.istablarray(a) and misc.istablarray(b):
+        if out is None and not args and not kwargs and not misc._active_features:
+            # fast path for the common cases, TablArray with TablArray or
+            # with a scalar, when the result has tabular dims
+            a_type = type(a)
+            b_type = type(b)
+            if a_type in misc._tablarray_types:
+                if b_type is a_type:
+                    new_ts, bc = a.ts.combine(b.ts)
+                    if new_ts is not None and new_ts.tdim:
+                        rarray = bc.calc_function(func, a.base, b.base,
+                                                  dtype=dtype)
+                        return _fast_rval(a_type, rarray, new_ts, a.view)
+                elif b_type in _scalar_types and a.ts.tdim:
+                    return _fast_rval(a_type, func(a.base, b), a.ts, a.view)
+                elif (b_type is _np.ndarray and a.ts.tdim and not a._tabular
+                      and b.ndim <= a.ts.cdim):
+                    # b broadcasts within the cells, keeping a's tdim
+                    rarray = func(a.base, b)
+                    ts = (a.ts if getattr(rarray, 'shape', None)
+                          == a.base.shape else a.ts.cdim)
+                    return _fast_rval(a_type, rarray, ts, a.view)
+            elif b_type in misc._tablarray_types and a_type in _scalar_types:
+                if b.ts.tdim:
+                    return _fast_rval(b_type, func(a, b.base), b.ts, b.view)
+        if misc._overrides_ufuncs(a) or misc._overrides_ufuncs(b):
+            # e.g. RaggedTablArray handles TablArray operands itself, numpy
+            # reaches its __array_ufunc__ since TablArray's declines
+            if isinstance(func, _np.ufunc):
+                if out is not None:
+                    kwargs['out'] = out
+                return func(a, b, *args, **kwargs)
+            return NotImplemented
+        a_is_ta = misc.istablarray(a)
+        b_is_ta = misc.istablarray(b)
+        if 'dtype' in kwargs:
+            # dtype= belongs to func, but also fixes the result dtype
+            rdtype = kwargs['dtype']
+            call = _functools.partial(func, dtype=kwargs.pop('dtype'))
+        else:
+            rdtype = dtype
+            call = func
+        a_is_lazy = _lazy.islazy(a)
+        b_is_lazy = _lazy.islazy(b)
+        if (a_is_lazy or b_is_lazy
+                or (_lazy.isrecording() and (a_is_ta or b_is_ta))):
+            # record a graph node instead of computing
+            if not (b_is_ta or b_is_lazy):
+                b = _cast_other_type(b, a)
+            elif not (a_is_ta or a_is_lazy):
+                a = _cast_other_type(a, b)
+            node = _lazy.record(call, (a, b, *args), kwargs)
+            return _lazy_out(node, out)
+        pdtype = None
+        if (out is None and rdtype is None and not args
+                and 'casting' not in kwargs and taprecision.isactive()):
+            # compute at the precision of the policy, not cast afterwards
+            pdtype = taprecision.ufunc_dtype(func, (a, b))
+            if pdtype is not None:
+                pdtype = taprecision.policy_dtype(pdtype, (a, b),
+                                                  func.__name__)
+                rdtype = pdtype
+                call = _functools.partial(func, dtype=pdtype,
+                                          casting='same_kind')
+        if a_is_ta and b_is_ta:
             # if both are TablArray, then use tablarray broadcasting
             cdim, bc = a.ts.combine(b.ts)
-            rarray = bc.calc_function(func, a.base, b.base, *args,
-                                      dtype=dtype, **kwargs)
+            if out is not None:
+                if cdim is not None:
+                    misc._check_out(out, bc.new_shape, bc.new_cdim)
+                bc.calc_function(call, a.base, b.base, *args, out=out.base,
+                                 **kwargs)
+                return out
+            rarray = bc.calc_function(call, a.base, b.base, *args,
+                                      dtype=rdtype, **kwargs)
             rclass = a.__class__
             view = a.view
-        elif misc.istablarray(a):
-            b = _cast_other_type(b, a)
+        elif a_is_ta or b_is_ta:
+            if a_is_ta:
+                b = _cast_other_type(b, a)
+                a_ta, x1, x2 = a, a.base, b
+            else:
+                a = _cast_other_type(a, b)
+                a_ta, x1, x2 = b, a, b.base
             # if only one is TablArray, then use numpy array broadcast
-            rarray = func(a.base, b, *args, **kwargs)
-            rclass = a.__class__
-            # assume the result has the same cdim as a.ts.cdim
-            cdim = a.ts.cdim
-            view = a.view
-        elif misc.istablarray(b):
-            a = _cast_other_type(a, b)
-            rarray = func(a, b.base, *args, **kwargs)
-            rclass = b.__class__
-            cdim = b.ts.cdim
-            view = b.view
+            # and assume the result has the same cdim as a_ta.ts.cdim
+            cdim = a_ta.ts.cdim
+            blocks = None
+            arena = taarena.isactive()
+            if out is not None or arena or taexec.isactive():
+                shape = _np.broadcast_shapes(_np.shape(x1), _np.shape(x2))
+                if out is not None:
+                    misc._check_out(out, shape, cdim)
+                blocks = taexec.blocks(shape)
+            if blocks is not None:
+                rarray = taexec.call_blocked(
+                    call, shape, (x1, x2), *args,
+                    out=None if out is None else out.base, blocks=blocks,
+                    **kwargs)
+            elif out is not None:
+                _call_into(call, out.base, x1, x2, *args, **kwargs)
+            elif arena:
+                rarray = taarena.call(call, shape, (x1, x2), *args,
+                                      **kwargs)
+            else:
+                rarray = call(x1, x2, *args, **kwargs)
+            if out is not None:
+                return out
+            rclass = a_ta.__class__
+            view = a_ta.view
+        elif out is not None:
+            return call(a, b, *args, out=out, **kwargs)
         else:
             # if neither operand is TablArray, just fall back on numpy
-            return func(a, b, *args, **kwargs)
+            return call(a, b, *args, **kwargs)
+        if pdtype is None:
+            rarray = taprecision.apply_policy(rarray, (a, b), func.__name__)
         # once a TablArray, always a TablArray
         return misc._rval_once_a_ta(rclass, rarray, cdim, view)
     wrap_bin_bcast.__doc__ = (
@@ -201,65 +382,67 @@ def tawrap_binarybroadcast(func, dtype=None):
     return wrap_bin_bcast
 
 
-def tawrap_multiop_bcast(func, arg_ctl, dtype=None):
+def tawrap_multiop_bcast(func, arg_ctl, dtype=None, typed=False):
     '''
     TablArray wrap for numpy-compatible functions which have any number of
     input operands in need of TablArray broadcasting adaptation. This does
     require the wrapped function to have a single array-like return.
 
+    One broadcast plan aligns tabular and cellular shapes of all TablArray
+    args, then func is called once. np.ndarray args share the cdim of the
+    result, i.e. they broadcast against the cells.
+
     After wrap, the function will allow TablArray-like inputs including
     np.ndarray, or scalar.
 
     Input
     -----
-    arg_ctl : list of bool
+    arg_ctl : list of bool, or None
         ags expected to be TablArray-like, e.g. [True, False, True]. TablArray
         args will only be considered if they correspond to a True flag.
+        None means every arg is considered.
+    typed : bool
+        func takes dtype= and casting= like a ufunc (ufuncs always do), so
+        the precision policy applies within the call
     '''
-    from ..tashape import taShape
-    Narg0 = len(arg_ctl)
     @_functools.wraps(func)
     def wrap_multi_bcast(*args, **kwargs):
+        args = tuple(map(_lazy.evaluated, args))
         # get map of important arg types
-        arg_is_ta = _np.zeros(Narg0, dtype=bool)
-        for i in range(min(len(args), Narg0)):
-            # if the arg_ctl masked off the argument here, ignore it
-            if arg_ctl[i]:
-                arg_is_ta[i] = misc.istablarray(args[i])
-        # find the broadcast shape first based only on TablArray args
-        bc = taShape((), 0)
-        idx_is_ta, = _np.nonzero(arg_is_ta)
-        for i in idx_is_ta:
-            bc, _ = args[i].ts.combine(bc)
-        # Important: imply that np.ndarray args share same cdim as max
-        cdim = bc.cdim
-        # substitute TablArray args
+        Narg = len(args) if arg_ctl is None else min(len(args), len(arg_ctl))
+        idx_is_ta = [i for i in range(Narg)
+                     if (arg_ctl is None or arg_ctl[i])
+                     and misc.istablarray(args[i])]
+        if len(idx_is_ta) == 0:
+            # if no TablArray were passed, just fall back on numpy
+            return func(*args, **kwargs)
+        # find one broadcast plan for all TablArray args
+        tas = [args[i] for i in idx_is_ta]
+        plan = broadcast_plan_n([arg.ts for arg in tas])
+        # substitute TablArray args with aligned base arrays
         args2 = list(args)
-        for i in idx_is_ta:
-            arg = args[i]
-            cdim_i = arg.ts.cdim
-            if cdim_i == cdim:
-                # if the cdim is at max, just get the base array
-                args2[i] = arg.base
-            else:
-                # if the cdim is less than max
-                cshape = list(arg.ts.cshape)
-                # pad dimensions that lie in between this cdim and the
-                # broadcast shape
-                cshape2 = tuple([1] * (cdim - cdim_i) + cshape)
-                # use that for a reshape
-                arg2 = (arg.cell.reshape(cshape2)).table
-                # but use the base
-                args2[i] = arg2.base
+        for i, base in zip(idx_is_ta, plan.align([arg.base for arg in tas])):
+            args2[i] = base
+        pdtype = None
+        if (taprecision.isactive() and 'dtype' not in kwargs
+                and 'casting' not in kwargs):
+            # compute at the precision of the policy, not cast afterwards
+            if isinstance(func, _np.ufunc):
+                pdtype = taprecision.ufunc_dtype(func, args2)
+            elif typed:
+                pdtype = _np.result_type(*args2)
+            if pdtype is not None:
+                pdtype = taprecision.policy_dtype(pdtype, tas, func.__name__)
+                kwargs = dict(kwargs, dtype=pdtype, casting='same_kind')
         rval = func(*tuple(args2), **kwargs)
-        if _np.sum(arg_is_ta) > 0:
-            # if any TablArray were passed, consider returning TablArray
-            arg = args[idx_is_ta[0]]
-            rclass = arg.__class__
-            view = arg.view
-            return misc._rval_once_a_ta(rclass, rval, cdim, view)
-        else:
+        if type(rval) is tuple:
+            # e.g. np.where(condition) returns indices
             return rval
+        if pdtype is None:
+            rval = taprecision.apply_policy(rval, tas, func.__name__)
+        rclass = tas[0].__class__
+        view = tas[0].view
+        return misc._rval_once_a_ta(rclass, rval, plan.new_cdim, view)
     wrap_multi_bcast.__doc__ = (
         "**TablArray multi op compatible wrapped** %s\n\n" % func.__name__
         + wrap_multi_bcast.__doc__)
@@ -274,10 +457,22 @@ def tawrap_new(func):
     
     decorator for ATC compatibility for new numpy generators,
     but I'm not so sure I should use a decorator or even have the same names
-    the thing is that this decorator changes the input args..."""
+    the thing is that this decorator changes the input args...
+
+    layout='cell-major' allocates the cellular axes outermost in memory,
+    see re.as_layout"""
     from ..ta import TablArray
+    from ..re import _layout_axes
     @_functools.wraps(func)
-    def wrapper_atc_new(shape, cdim, view='cell', **kwargs):
-        rarray = func(shape, **kwargs)
+    def wrapper_atc_new(shape, cdim, view='cell', layout='table-major',
+                        **kwargs):
+        if layout == 'table-major':
+            rarray = func(shape, **kwargs)
+        else:
+            # allocate in physical order, then view in logical order
+            shape = tuple(shape)
+            axes = _layout_axes(len(shape), cdim, layout)
+            rarray = func(tuple(shape[i] for i in axes), **kwargs)
+            rarray = rarray.transpose(_np.argsort(axes))
         return TablArray(rarray, cdim, view=view)
     return wrapper_atc_new
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Signature-driven wrap for generalized ufuncs
+
+Created on Sun Oct 18 20:41:09 2026
+
+@author: chris
+"""
+
+import functools as _functools
+import re as _re
+import numpy as _np
+
+from .. import misc
+from .. import talazy as _lazy
+from .cbroadcast import MultiBroadcast, _cached_plan
+
+_dims = r'\(\s*(?:\w+\??\s*(?:,\s*\w+\??\s*)*)?\)'
+_signature_re = _re.compile(r'^%s(?:,%s)*->%s(?:,%s)*$' % ((_dims,) * 4))
+
+
+def _parse_signature(signature):
+    """'(n,n),(n)->(n)' --> ([('n', 'n'), ('n',)], [('n',)]), optional
+    core dims keep their '?' """
+    signature = signature.replace(' ', '')
+    if not _signature_re.match(signature):
+        raise ValueError('not a valid gufunc signature: %s' % signature)
+    ins, outs = signature.split('->')
+    return tuple(
+        [tuple(d for d in group.split(',') if d)
+         for group in _re.findall(r'\((.*?)\)', side)]
+        for side in (ins, outs))
+
+
+def tawrap_gufunc(func, signature=None):
+    """
+    TablArray wrap for numpy-compatible generalized ufuncs, given a
+    signature like '(n,n),(n)->(n)'. Core dims are the trailing cellular
+    dims of each operand. Any leading cellular dims, and all tabular dims,
+    are loop dims which follow TablArray broadcasting (see MultiBroadcast).
+    func is then called once on the aligned arrays::
+
+        solve = tawrap_gufunc(_solve_vector, '(n,n),(n)->(n)')
+        x = solve(A, b)     # A t(N, M)|c(3, 3), b t(M,)|c(3,)
+
+        @np.vectorize(signature='(n),(n)->()')
+        def kernel(x, y):
+            ...
+        kernel_ta = tawrap_gufunc(kernel)
+
+    Operands which are not TablArray are cells, i.e. all their dims are
+    cellular. If func has a .signature (gufuncs and np.vectorize), the
+    signature may be omitted.
+
+    As in numpy, optional core dims ('?') are missing from an operand
+    with too few cellular dims, and then from the results. func gets them
+    as size 1 dims, so loop dims can't take their place, e.g. matmul of
+    matrix cells and vector cells::
+
+        matmul = tawrap_gufunc(np.matmul)   # (n?,k),(k,m?)->(n?,m?)
+        y = matmul(A, x)    # A t(N,)|c(3, 3), x t(N,)|c(3,) -> c(3,)
+
+    Parameters
+    ----------
+    func : callable
+        func(*operands, *args, **kwargs) with gufunc broadcasting
+    signature : str, optional
+        gufunc signature
+    """
+    if signature is None:
+        signature = getattr(func, 'signature', None)
+        if signature is None:
+            raise ValueError('tawrap_gufunc needs a signature')
+    in_cores, out_cores = _parse_signature(signature)
+    nin = len(in_cores)
+
+    @_functools.wraps(func)
+    def wrapped_gufunc(*args, **kwargs):
+        operands = tuple(_lazy.evaluated(x) for x in args[:nin])
+        rest = args[nin:]
+        if len(operands) < nin:
+            raise TypeError('%s needs %d operands' % (signature, nin))
+        tas = [x for x in operands if misc.istablarray(x)]
+        if not tas:
+            return func(*args, **kwargs)
+        bases = [x.base if misc.istablarray(x) else _np.asarray(x)
+                 for x in operands]
+        tshapes = []
+        loop_cshapes = []
+        core_shapes = []
+        sizes = {}
+        missing = set()
+        present = set()
+        for x, base, core in zip(operands, bases, in_cores):
+            if misc.istablarray(x):
+                tshape, cshape = x.ts.tshape, x.ts.cshape
+            else:
+                tshape, cshape = (), base.shape
+            dims = core
+            if len(cshape) < len(core):
+                dims = tuple(d for d in core if not d.endswith('?'))
+            if len(cshape) < len(dims):
+                raise ValueError(
+                    'operand with cellular shape %s has too few dims for '
+                    'core dims %s' % (cshape, core))
+            split = len(cshape) - len(dims)
+            for d, size in zip(dims, cshape[split:]):
+                if sizes.setdefault(d, size) != size:
+                    raise ValueError(
+                        'core dim %s has mismatched sizes %d and %d in %s'
+                        % (d.rstrip('?'), sizes[d], size, signature))
+            missing.update(set(core) - set(dims))
+            present.update(dims)
+            tshapes.append(tshape)
+            loop_cshapes.append(cshape[:split])
+            # missing optional dims are passed as size 1
+            core_shapes.append(tuple(sizes[d] if d in dims else 1
+                                     for d in core))
+        if missing & present:
+            raise ValueError('optional core dims %s are missing from only '
+                             'some operands of %s'
+                             % (sorted(missing & present), signature))
+        plan = _cached_plan(MultiBroadcast, tuple(tshapes),
+                            tuple(loop_cshapes))
+        aligned = plan.align(bases, core_shapes)
+        rvals = func(*aligned, *rest, **kwargs)
+        rclass = tas[0].__class__
+        view = tas[0].view
+        if len(out_cores) == 1:
+            rvals = (rvals,)
+        results = []
+        for rval, core in zip(rvals, out_cores):
+            drop = tuple(i - len(core) for i, d in enumerate(core)
+                         if d in missing)
+            if drop:
+                rval = _np.squeeze(rval, axis=drop)
+            results.append(misc._rval_once_a_ta(
+                rclass, rval, plan.new_cdim + len(core) - len(drop), view))
+        if len(out_cores) == 1:
+            return results[0]
+        return tuple(results)
+    return wrapped_gufunc
@@ -13,6 +13,7 @@ Created on Sat Sep 30 08:08:03 2023
 import functools as _functools
 
 from .. import misc
+from .. import talazy as _lazy
 
 
 def tawrap_mat1_r1(func, min_cdim, rval_cdim):
@@ -44,12 +45,13 @@ def tawrap_mat1_r1(func, min_cdim, rval_cdim):
     """
     @_functools.wraps(func)
     def wrapped_mat1_r1_atc(a, *args, **kwargs):
+        a = _lazy.evaluated(a)
         if misc.istablarray(a):
             if (a.ts.cdim < min_cdim):
                 raise ValueError(
                         '%d-dimensional array given.' % a.ts.cdim
                         + 'Array must be at least %d-dimensional' % min_cdim)
-            rarray = func(a.cell, *args, **kwargs)
+            rarray = func(a.base, *args, **kwargs)
             rclass = a.__class__
             return misc._rval_once_a_ta(rclass, rarray, rval_cdim, a.view)
             # return rclass(rarray, rval_cdim, view=a.view)
@@ -85,12 +87,13 @@ def tawrap_mat1_rN(func, min_cdim, *rv_cdims):
     N_rval = len(rv_cdims)
     @_functools.wraps(func)
     def wrapped_mat1_rN_atc(a, *args, **kwargs):
+        a = _lazy.evaluated(a)
         if misc.istablarray(a):
             if (a.ts.cdim < min_cdim):
                 raise ValueError(
                         '%d-dimensional array given.' % a.ts.cdim
                         + 'Array must be at least %d-dimensional' % min_cdim)
-            rvals = func(a.cell, *args, **kwargs)
+            rvals = func(a.base, *args, **kwargs)
             assert len(rvals) == N_rval, '%d rvals, expected %d' % (
                     len(rvals), N_rval)
             rclass = a.__class__
@@ -8,6 +8,9 @@ Created on Mon May 18 13:01:14 2020
 
 import functools
 
+from .. import misc
+from .. import tacow
+
 
 def op12_swap(func):
     """wrapper swaps arg12 of func(arg1, arg2, ...)"""
@@ -15,3 +18,14 @@ def op12_swap(func):
     def wrapper_op12_swap(arg1, arg2, *args, **kwargs):
         return func(arg2, arg1, *args, **kwargs)
     return wrapper_op12_swap
+
+
+def op_inplace(func):
+    """wrapper calls func(arg1, arg2, ..., out=arg1), i.e. for __iadd__"""
+    @functools.wraps(func)
+    def wrapper_op_inplace(arg1, arg2, *args, **kwargs):
+        if misc.istablarray(arg1):
+            # arg1 may share its buffer with a copy-on-write copy
+            tacow.detach(arg1)
+        return func(arg1, arg2, *args, out=arg1, **kwargs)
+    return wrapper_op_inplace
@@ -48,3 +48,304 @@ class Test_BIop(unittest.TestCase):
             allclose = np.allclose(self.answers[fname], ta_answ.base)
             self.assertTrue(allclose,
                             msg="results differ in %s" % fname)
+
+    def test_several_outputs(self):
+        # ufuncs with several outputs give a tuple of TablArrays
+        a = ta.TablArray(np.arange(12.).reshape(6, 2), 1)
+        b = ta.TablArray(np.arange(1., 3.), 1)
+        for d, (q, r) in [(2., divmod(a, 2.)), (b, divmod(a, b)),
+                          (b, np.divmod(a, b)),
+                          (b, ta.divmod(a, np.array([1., 2.])))]:
+            for x in (q, r):
+                self.assertIsInstance(x, ta.TablArray)
+                self.assertEqual(x.ts.cdim, 1)
+            np.testing.assert_array_equal((q * d + r).base, a.base)
+        frac, whole = np.modf(a / 4)
+        self.assertIsInstance(frac, ta.TablArray)
+        with ta.execution(threshold=0, blocksize=2):
+            q, r = divmod(a, b)
+        np.testing.assert_array_equal(q.base, a.base // b.base)
+
+
+class Test_CellBroadcast(unittest.TestCase):
+    """show the vectorized broadcast matches the per-slice loop"""
+
+    SHAPES = [((4096,), (2,), (4096,), (2, 2)),
+              ((4, 1), (3,), (5,), ()),
+              ((1, 3), (2, 1), (2, 1), (1, 4)),
+              ((), (2, 2), (6,), (2,))]
+
+    def test_vectorized_vs_loop(self):
+        for tshape_a, cshape_a, tshape_b, cshape_b in self.SHAPES:
+            a = np.random.randn(*tshape_a, *cshape_a)
+            b = np.random.randn(*tshape_b, *cshape_b)
+            bc = ta.wraps.CellBroadcast(tshape_a, tshape_b, cshape_a, cshape_b)
+            vec = bc.calc_function(np.multiply, a, b)
+            loop = bc._calc_loop(np.multiply, a, b, dtype=vec.dtype)
+            self.assertEqual(tuple(bc.new_shape), vec.shape)
+            self.assertTrue(np.array_equal(vec, loop))
+
+    def test_dtype_override(self):
+        a = ta.TablArray(np.random.randn(5, 2), 1)
+        b = ta.TablArray(np.random.randn(5, 2, 2), 2)
+        c = ta.greater(a, b)
+        self.assertEqual(c.dtype, bool)
+        self.assertEqual(c.ts.cdim, 2)
+
+    def test_plan_cache(self):
+        ta.broadcast_cache_clear()
+        a = ta.TablArray(np.random.randn(3, 2), 1)
+        b = ta.TablArray(np.random.randn(3, 1, 2, 2), 2)
+        for i in range(4):
+            c = a + b
+        info = ta.broadcast_cache_info()
+        # the first sum plans, later sums reuse its plan and taShape
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.currsize, 1)
+        self.assertIs((a + b).ts, c.ts)
+        self.assertEqual(c.ts.tshape, (3, 3))
+        ta.broadcast_cache_clear()
+        a + b
+        self.assertEqual(ta.broadcast_cache_info().misses, 1)
+
+
+class Test_InPlace(unittest.TestCase):
+    """show in-place operators and out= write into existing TablArrays"""
+
+    def setUp(self):
+        self.E = ta.TablArray(np.random.randn(4, 3, 2), 1)
+        self.dE = ta.TablArray(np.random.randn(3, 2), 1)
+
+    def test_iadd(self):
+        E = self.E
+        base = E.base
+        answer = E.base + self.dE.base
+        E += self.dE
+        self.assertIs(E.base, base)
+        self.assertTrue(np.allclose(E.base, answer))
+        E *= 2.0
+        self.assertIs(E.base, base)
+        self.assertTrue(np.allclose(E.base, 2 * answer))
+
+    def test_out(self):
+        out = ta.zeros((4, 3, 2), 1)
+        rval = ta.multiply(self.E, self.dE, out=out)
+        self.assertIs(rval, out)
+        self.assertTrue(np.allclose(out.base, self.E.base * self.dE.base))
+        ta.exp(self.E, out=out)
+        self.assertTrue(np.allclose(out.base, np.exp(self.E.base)))
+
+    def test_out_validation(self):
+        wrong_cdim = ta.zeros((4, 3, 2), 2)
+        with self.assertRaises(ValueError):
+            ta.add(self.E, self.dE, out=wrong_cdim)
+        with self.assertRaises(ValueError):
+            self.dE += self.E
+
+    def test_invalid_shapes(self):
+        other = ta.TablArray(np.random.randn(5, 2), 1)
+        with self.assertRaises(ValueError) as ctx:
+            ta.add(self.E, other)
+        self.assertIn('(5, 2)', str(ctx.exception))
+
+    def test_matmul_out(self):
+        m = ta.TablArray(np.random.randn(4, 2, 2), 2)
+        out = ta.zeros((4, 3, 2), 1)
+        ta.matmul(m.table.reshape((4, 1)), self.E, out=out)
+        answer = np.einsum('...ij,...j->...i', m.base[:, None], self.E.base)
+        self.assertTrue(np.allclose(out.base, answer))
+
+
+class Test_MultiOp(unittest.TestCase):
+    """show n-ary functions broadcast like chained binary operators"""
+
+    def setUp(self):
+        self.x = ta.TablArray(np.linspace(-2, 2, 4), 0)
+        self.y = ta.TablArray(np.linspace(-1.5, 1.5, 3).reshape(3, 1), 0)
+        self.E = ta.TablArray(np.random.randn(3, 4, 2), 1)
+
+    def test_where(self):
+        rval = ta.where(self.x > self.y, self.E, self.y)
+        cond = (self.x > self.y).base[..., None]
+        answer = np.where(cond, self.E.base, (self.y + 0 * self.E).base)
+        self.assertEqual(rval.ts.cdim, 1)
+        self.assertTrue(np.allclose(rval.base, answer))
+
+    def test_multiply_add(self):
+        rval = ta.multiply_add(self.x, self.E, self.y)
+        answer = self.x * self.E + self.y
+        self.assertEqual(rval.ts.tshape, (3, 4))
+        self.assertTrue(np.allclose(rval.base, answer.base))
+
+    def test_clip(self):
+        rval = ta.clip(self.E, self.y - 2, self.x + 2)
+        self.assertTrue(np.all((rval >= self.y - 2).base))
+        self.assertTrue(np.all((rval <= self.x + 2).base))
+
+
+class Test_Blocked(unittest.TestCase):
+    """show blocked execution matches a single call"""
+
+    def setUp(self):
+        self.a = ta.TablArray(np.random.randn(50, 40, 3), 1)
+        self.b = ta.TablArray(np.random.randn(40, 1), 1)
+
+    def test_blocked(self):
+        answers = [self.a * self.b, self.a * np.arange(3),
+                   ta.sqrt(abs(self.a))]
+        with ta.execution(threshold=0, blocksize=100):
+            rvals = [self.a * self.b, self.a * np.arange(3),
+                     ta.sqrt(abs(self.a))]
+            out = ta.zeros((50, 40, 3), 1)
+            ta.multiply(self.a, self.b, out=out)
+        for rval, answer in zip(rvals, answers):
+            self.assertTrue(np.allclose(rval.base, answer.base))
+        self.assertTrue(np.allclose(out.base, answers[0].base))
+        self.assertIsNone(ta.get_execution()['threshold'])
+
+    def test_out_overlap(self):
+        # out aliasing an operand must not be overwritten by earlier blocks
+        for options in [dict(threshold=2, blocksize=2),
+                        dict(workers=4, parallel_threshold=2)]:
+            E = ta.TablArray(np.arange(8.), 0)
+            with ta.execution(**options):
+                E += E.table[::-1]
+            np.testing.assert_array_equal(E.base, 7)
+            E = ta.TablArray(np.arange(8.).reshape(4, 2), 1)
+            with ta.execution(**options):
+                ta.add(E, E.table[::-1], out=E)
+                ta.sqrt(E, out=E)
+            np.testing.assert_allclose(E.base, np.sqrt([[6, 8]] * 4))
+
+    def test_blocks(self):
+        with ta.execution(threshold=10, blocksize=6):
+            self.assertIsNone(ta.taexec.blocks((2, 5)))
+            blocks = ta.taexec.blocks((4, 2, 3))
+        self.assertEqual(blocks, [slice(0, 1), slice(1, 2), slice(2, 3),
+                                  slice(3, 4)])
+
+
+class Test_Threads(unittest.TestCase):
+    """show threaded execution matches a single call"""
+
+    def setUp(self):
+        self.a = ta.TablArray(np.random.randn(50, 40, 3), 1)
+        self.b = ta.TablArray(np.random.randn(40, 1), 1)
+
+    def test_threads(self):
+        answers = [self.a * self.b, ta.sqrt(abs(self.a)),
+                   ta.sum(self.a), ta.max(self.a.table, axis=1)]
+        with ta.execution(workers=4, parallel_threshold=0):
+            rvals = [self.a * self.b, ta.sqrt(abs(self.a)),
+                     ta.sum(self.a), ta.max(self.a.table, axis=1)]
+        for rval, answer in zip(rvals, answers):
+            self.assertEqual(rval.ts.cdim, answer.ts.cdim)
+            self.assertTrue(np.allclose(rval.base, answer.base))
+        self.assertEqual(ta.get_execution()['workers'], 1)
+
+    def test_table_reductions(self):
+        # reductions over the leading axis combine partials of each piece
+        i = ta.TablArray(np.random.randint(0, 9, (50, 40)), 0)
+        funcs = [ta.sum, ta.mean, ta.max, ta.nanmin, ta.prod, ta.any]
+        for x in [self.a, i]:
+            answers = [func(x.table, axis=0) for func in funcs]
+            answers.append(ta.mean(x.table))
+            with ta.execution(workers=4, parallel_threshold=0):
+                rvals = [func(x.table, axis=0) for func in funcs]
+                rvals.append(ta.mean(x.table))
+            for rval, answer in zip(rvals, answers):
+                self.assertEqual(np.shape(rval), np.shape(answer))
+                self.assertEqual(np.result_type(rval), np.result_type(answer))
+                self.assertTrue(np.allclose(ta.base(rval), ta.base(answer)))
+
+    def test_pool(self):
+        # the pool grows to the most workers, and is then kept
+        with ta.execution(workers=4, parallel_threshold=0):
+            ta.sum(self.a.table, axis=0)
+            pool = ta.taexec._pool()
+        with ta.execution(workers=2, parallel_threshold=0):
+            ta.sum(self.a.table, axis=0)
+            self.assertIs(ta.taexec._pool(), pool)
+
+    def test_scan(self):
+        i = ta.TablArray(np.random.randint(-5, 5, (500, 3)), 1)
+        x = ta.TablArray(np.random.rand(500, 3), 1)
+        x.base[7, 1] = np.nan
+        with ta.execution(blocksize=60):
+            for func in [ta.cumsum, ta.cumprod]:
+                rval = func(i.table, axis=0, workers=3)
+                self.assertTrue(np.array_equal(rval.base,
+                                               func(i.base, axis=0)))
+            for func in [ta.cumsum, ta.nancumsum, ta.nancumprod]:
+                rval = func(x.table, axis=0, workers=3)
+                answer = func(x.base, axis=0)
+                self.assertTrue(np.allclose(rval.base, answer,
+                                            equal_nan=True))
+                # the same blocks for any number of workers
+                self.assertTrue(np.array_equal(
+                    rval.base, func(x.table, axis=0, workers=2).base,
+                    equal_nan=True))
+            # scans along the cells
+            rval = ta.cumsum(x.cell, axis=0, workers=2)
+            self.assertTrue(np.allclose(rval.base, np.cumsum(x.base, -1),
+                                        equal_nan=True))
+
+
+class Test_Arena(unittest.TestCase):
+    """show the buffer arena reuses released results, with the same values"""
+
+    def setUp(self):
+        ta.arena_clear()
+
+    def tearDown(self):
+        ta.arena_clear()
+
+    def test_reuse(self):
+        E0 = ta.TablArray(np.random.rand(200, 10, 2), 1)
+        dE = ta.TablArray(np.random.rand(10, 2), 1)
+        answer = E0
+        for _ in range(5):
+            answer = ta.sqrt(answer + dE * 0.5) * 2.0
+        E = E0
+        with ta.arena(minbytes=0):
+            for _ in range(5):
+                E = ta.sqrt(E + dE * 0.5) * 2.0
+            info = ta.arena_info()
+        self.assertTrue(np.allclose(E.base, answer.base))
+        self.assertGreater(info['hits'], 0)
+        self.assertLessEqual(info['buffers'], 4)
+        self.assertFalse(ta.get_arena()['enabled'])
+        # the pool is evicted on exit
+        self.assertEqual(ta.arena_info()['buffers'], 0)
+        self.assertEqual(ta.arena_info()['bytes'], 0)
+
+    def test_held_buffers(self):
+        a = ta.TablArray(np.random.rand(100, 3), 1)
+        with ta.arena(minbytes=0):
+            b = a + 1.
+            view = (a * 2.).cell[0]
+            c = a + 2.
+            d = a * 3.
+            column = (a * 4.).base[:, 1]
+            a * 6.
+            e = a * 5.
+            self.assertGreater(ta.arena_info()['hits'], 0)
+        # held results, or their views, are never handed out again
+        self.assertTrue(np.allclose(b.base, a.base + 1))
+        self.assertTrue(np.allclose(view.base, 2 * a.base[:, 0]))
+        self.assertTrue(np.allclose(c.base, a.base + 2))
+        self.assertTrue(np.allclose(d.base, 3 * a.base))
+        self.assertTrue(np.allclose(column, 4 * a.base[:, 1]))
+        self.assertTrue(np.allclose(e.base, 5 * a.base))
+
+    def test_bounded(self):
+        a = ta.TablArray(np.random.rand(100, 3), 1)
+        with ta.arena(minbytes=0, maxbytes=a.base.nbytes):
+            b = a + 1.
+            c = a + 2.
+            info = ta.arena_info()
+        self.assertEqual(info['buffers'], 1)
+        self.assertEqual(info['bypass'], 1)
+        self.assertTrue(np.allclose(c.base - b.base, 1))
+        with self.assertRaises(ValueError):
+            ta.set_arena(maxbytes=-1)
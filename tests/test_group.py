@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:07:51 2026
+
+@author: chris
+"""
+
+import numpy as np
+import unittest
+
+import tablarray as ta
+
+
+class Test_GroupbyReduce(unittest.TestCase):
+    """show grouped reductions match reducing each group's selection"""
+
+    def setUp(self):
+        self.E = ta.TablArray(np.random.randn(6, 5, 2), 1)
+        self.mode = ta.TablArray(np.random.randint(0, 4, (6, 5)), 0)
+
+    def test_table(self):
+        E, mode = self.E, self.mode
+        for name, func in [('sum', np.sum), ('mean', np.mean),
+                           ('max', np.max), ('min', np.min),
+                           ('std', np.std), ('var', np.var)]:
+            rval, groups = ta.groupby_reduce(E, mode, name)
+            self.assertEqual(rval.ts.tshape, (len(groups),))
+            self.assertEqual(rval.ts.cshape, (2,))
+            for i, label in enumerate(groups):
+                answer = func(E.base[mode.base == label], axis=0)
+                self.assertTrue(np.allclose(rval.base[i], answer), name)
+        count, groups = ta.groupby_reduce(E, mode, 'count')
+        self.assertEqual(count.base[:, 0].sum(), 30)
+        with self.assertRaises(ValueError):
+            ta.groupby_reduce(E, mode, 'median')
+
+    def test_degenerate(self):
+        # labels by row only, broadcast along the table
+        rows = np.array([[0], [1], [0], [1], [2], [2]])
+        rval, groups = ta.groupby_reduce(self.E, rows, np.mean)
+        self.assertTrue(np.all(groups == [0, 1, 2]))
+        answer = self.E.base[[0, 2]].reshape(-1, 2).mean(axis=0)
+        self.assertTrue(np.allclose(rval.base[0], answer))
+
+    def test_broadcast_values(self):
+        # values degenerate along the table, labels along the cell
+        E = ta.TablArray(np.random.randn(1, 5, 2), 1)
+        mode = np.random.randint(0, 3, (4, 5))
+        rval, groups = ta.groupby_reduce(E, mode, 'var')
+        meshed = ta.TablArray(np.broadcast_to(E.base, (4, 5, 2)), 1)
+        answer, _ = ta.groupby_reduce(meshed, mode, 'var')
+        self.assertTrue(np.allclose(rval.base, answer.base))
+        a = ta.TablArray(np.random.randn(3, 1), 1)
+        rval, groups = ta.groupby_reduce(a, [[0, 1], [1, 1]], 'sum',
+                                         view='cell')
+        self.assertTrue(np.allclose(rval.base, a.base * [1, 3]))
+
+    def test_empty(self):
+        empty = ta.TablArray(np.zeros((0, 2)), 1)
+        for name in ['sum', 'min', 'mean', 'std', 'count']:
+            rval, groups = ta.groupby_reduce(empty, np.zeros(0), name)
+            self.assertEqual(len(groups), 0)
+            self.assertEqual(rval.ts.tshape, (0,))
+            self.assertEqual(rval.ts.cshape, (2,))
+
+    def test_cell(self):
+        a = ta.TablArray(np.random.randn(3, 4), 1)
+        rval, groups = ta.groupby_reduce(a, [1, 0, 1, 1], 'sum', view='cell')
+        self.assertEqual(rval.ts.tshape, (3,))
+        self.assertTrue(np.allclose(rval.base[:, 1],
+                                    a.base[:, [0, 2, 3]].sum(axis=1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:02:33 2026
+
+@author: chris
+"""
+
+import numpy as np
+import unittest
+
+import tablarray as ta
+from tablarray.wraps import tawrap_gufunc
+
+
+class Test_Gufunc(unittest.TestCase):
+    """show signature-driven wraps loop like TablArray broadcasting"""
+
+    def setUp(self):
+        self.A = ta.TablArray(np.random.rand(4, 1, 3, 3) + 3 * np.eye(3), 2)
+        self.b = ta.TablArray(np.random.rand(5, 3), 1)
+
+    def test_solve(self):
+        x = ta.linalg.solve(self.A, self.b)
+        self.assertEqual(x.ts.tshape, (4, 5))
+        self.assertEqual(x.ts.cdim, 1)
+        for i in range(4):
+            for j in range(5):
+                answer = np.linalg.solve(self.A.base[i, 0], self.b.base[j])
+                self.assertTrue(np.allclose(x.base[i, j], answer))
+        # numpy dispatch reaches the same wrap
+        self.assertEqual(np.linalg.solve(self.A, self.b).ts, x.ts)
+
+    def test_matrix_cells(self):
+        solve = tawrap_gufunc(np.linalg.solve, '(n,n),(n,k)->(n,k)')
+        B = ta.TablArray(np.random.rand(5, 3, 2), 2)
+        X = solve(self.A, B)
+        self.assertEqual(X.ts.tshape, (4, 5))
+        self.assertEqual(X.ts.cshape, (3, 2))
+        self.assertTrue(np.allclose(ta.matmul(self.A, X).base,
+                                    np.broadcast_to(B.base, (4, 5, 3, 2))))
+
+    def test_vectorize(self):
+        kernel = np.vectorize(lambda x, y: (x * y).sum(),
+                              signature='(n),(n)->()')
+        dot = tawrap_gufunc(kernel)
+        rval = dot(self.b, np.array([1., 2., 3.]))
+        self.assertEqual(rval.ts.tshape, (5,))
+        self.assertEqual(rval.ts.cdim, 0)
+        self.assertTrue(np.allclose(rval.base, self.b.base @ [1, 2, 3]))
+        # leading cellular dims are loop dims
+        m = ta.TablArray(np.random.rand(5, 2, 3), 2)
+        self.assertEqual(dot(m, self.b).ts.cshape, (2,))
+        with self.assertRaises(ValueError):
+            dot(ta.TablArray(np.ones(5), 0), self.b)
+        with self.assertRaises(ValueError):
+            dot(self.b, np.ones(2))
+
+    def test_optional_dims(self):
+        matmul = tawrap_gufunc(np.matmul)
+        A = ta.TablArray(np.random.rand(4, 3, 3), 2)
+        x = ta.TablArray(np.random.rand(4, 3), 1)
+        for rval, answer in [
+                (matmul(A, x), np.einsum('nij,nj->ni', A.base, x.base)),
+                (matmul(x, A), np.einsum('nj,nji->ni', x.base, A.base)),
+                (matmul(x, x), np.einsum('nj,nj->n', x.base, x.base)),
+                (matmul(A, A), A.base @ A.base)]:
+            self.assertEqual(rval.ts.tshape, (4,))
+            self.assertEqual(rval.base.shape, answer.shape)
+            self.assertTrue(np.allclose(rval.base, answer))
+        with self.assertRaises(ValueError):
+            matmul(A, ta.TablArray(np.ones((4, 2)), 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
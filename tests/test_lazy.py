@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:58:03 2026
+
+@author: chris
+"""
+
+import numpy as np
+import unittest
+
+import tablarray as ta
+
+
+class Test_Lazy(unittest.TestCase):
+    """lazy formulas must match eager results, block by block"""
+
+    def setUp(self):
+        self.x = ta.TablArray(np.linspace(1, 2, 35).reshape(7, 5), 0)
+        self.y = ta.TablArray(np.linspace(1, 3, 5), 0)
+        self.v = ta.TablArray(np.random.randn(7, 1, 3), 1)
+
+    def test_record(self):
+        with ta.lazy():
+            r = 1.5 / (self.x**2 + self.y**2)
+        self.assertTrue(ta.islazy(r))
+        self.assertEqual(r.shape, (7, 5))
+        # outside the context, operators compute again
+        self.assertFalse(ta.islazy(self.x + self.y))
+
+    def test_setitem(self):
+        E = ta.TablArray(np.zeros((7, 5, 2)), 1)
+        with ta.lazy(chunk=6):
+            E.cell[0] = 1.5 / (self.x**2 + self.y**2)
+        np.testing.assert_allclose(E.cell[0].base,
+                                   (1.5 / (self.x**2 + self.y**2)).base)
+        np.testing.assert_array_equal(E.cell[1].base, 0)
+
+    def test_setitem_overlap(self):
+        # leaves which overlap the target must not be overwritten by
+        # earlier blocks
+        E = ta.TablArray(np.arange(8.).reshape(4, 2), 1)
+        with ta.lazy(chunk=2):
+            E.cell[0] = E.cell[1] + E.cell[0].table[::-1]
+        np.testing.assert_array_equal(E.cell[0].base, [7, 7, 7, 7])
+        # reading exactly the target is safe block by block
+        with ta.lazy(chunk=2):
+            E.cell[1] = 2 * E.cell[1]
+        np.testing.assert_array_equal(E.cell[1].base, [2, 6, 10, 14])
+
+    def test_expr(self):
+        def f(x, y, v):
+            return ta.sqrt(x**2 + y**2) * v - np.arange(3)
+        ref = f(self.x, self.y, self.v)
+        for chunk in [1, 7, 100, 10000]:
+            r = ta.expr(f, self.x, self.y, self.v, chunk=chunk)
+            self.assertEqual(r.ts.cdim, ref.ts.cdim)
+            np.testing.assert_allclose(r.base, ref.base)
+
+    def test_tabular_view(self):
+        ref = self.v.table * np.arange(5)
+        r = ta.expr(lambda v: v.table * np.arange(5), self.v)
+        self.assertEqual(r.view, 'table')
+        np.testing.assert_allclose(r.base, ref.base)
+
+    def test_unrecorded(self):
+        v = self.v
+        m = ta.TablArray(np.random.randn(7, 1, 3, 3), 2)
+        refs = [ta.sum(v * v), np.sum(v * v), ta.mean(v * 2, axis=0),
+                ta.cumsum(v * 2, axis=0, view='table'),
+                ta.matmul(m, v * 2), ta.linalg.norm(v * 2)]
+        with ta.lazy():
+            rvals = [ta.sum(v * v), np.sum(v * v), ta.mean(v * 2, axis=0),
+                     ta.cumsum(v * 2, axis=0, view='table'),
+                     ta.matmul(m, v * 2), ta.linalg.norm(v * 2)]
+        for rval, ref in zip(rvals, refs):
+            self.assertEqual(rval.ts, ref.ts)
+            np.testing.assert_allclose(rval.base, ref.base)
+
+    def test_indexing(self):
+        v = self.v
+        with ta.lazy():
+            cell = (v * 2).cell[0]
+            row = (v * 2).table[3]
+        self.assertEqual(cell.ts, v.cell[0].ts)
+        np.testing.assert_allclose(cell.base, 2 * v.cell[0].base)
+        np.testing.assert_allclose(row.base, 2 * v.table[3].base)
+
+    def test_incompatible(self):
+        with ta.lazy():
+            with self.assertRaises(ValueError):
+                self.x + ta.TablArray(np.ones(4), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
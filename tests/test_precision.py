@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:02:15 2026
+
+@author: chris
+"""
+
+import numpy as np
+import tracemalloc
+import unittest
+
+import tablarray as ta
+
+
+class Test_Precision(unittest.TestCase):
+    """show the precision policy keeps single precision tables single"""
+
+    def setUp(self):
+        self.f32 = ta.TablArray(np.random.randn(4, 3, 2).astype(np.float32), 1)
+        self.i64 = ta.TablArray(np.arange(6).reshape(3, 2), 1)
+
+    def test_numpy_policy(self):
+        self.assertEqual((self.f32 * self.i64).dtype, np.float64)
+        # uint and longdouble dtypes used to be unknown
+        u8 = ta.TablArray(np.arange(2, dtype=np.uint8), 1)
+        self.assertEqual((u8 + self.i64).dtype, np.int64)
+
+    def test_preserve_policy(self):
+        with ta.precision('preserve'):
+            self.assertEqual((self.f32 * self.i64).dtype, np.float32)
+            self.assertEqual(ta.stack_bcast(
+                (self.f32.cell, self.i64), axis=0).dtype, np.float32)
+            self.assertEqual(ta.mean(self.f32.table).dtype, np.float32)
+        self.assertEqual(ta.get_precision()['policy'], 'numpy')
+
+    def test_report(self):
+        with ta.precision(report='raise'):
+            with self.assertRaises(TypeError):
+                self.f32 + self.i64
+        with ta.precision(report='warn'):
+            with self.assertWarns(ta.UpcastWarning):
+                self.f32 + self.i64
+            # ndarray and numpy scalar operands are wider than the table
+            i32 = ta.TablArray(np.arange(6, dtype=np.int32), 1)
+            for upcast in [lambda: self.f32 * np.ones(2),
+                           lambda: self.f32 * np.float64(2),
+                           lambda: ta.mean(i32)]:
+                with self.assertWarns(ta.UpcastWarning):
+                    upcast()
+        with ta.precision(report='raise'):
+            # python scalars don't upcast
+            self.assertEqual((self.f32 * 2.).dtype, np.float32)
+
+    def test_single_policy(self):
+        f64 = ta.TablArray(np.abs(self.f32.base).astype(np.float64), 1)
+        with ta.precision('single'):
+            self.assertEqual(ta.sqrt(f64).dtype, np.float32)
+            self.assertEqual(np.exp(f64).dtype, np.float32)
+            self.assertEqual((f64 * f64).dtype, np.float32)
+        self.assertEqual(ta.sqrt(f64).dtype, np.float64)
+
+    def test_compute_at_policy_dtype(self):
+        f64 = ta.TablArray(np.random.randn(2 ** 16, 2), 1)
+        m64 = ta.TablArray(np.random.randn(2 ** 16, 2, 2), 2)
+        with ta.precision('single'):
+            ops = [lambda: f64 * f64, lambda: f64 * 2.0,
+                   lambda: ta.matmul(m64, f64),
+                   lambda: ta.multiply_add(f64, f64, f64),
+                   lambda: ta.clip(f64, 0., 1.),
+                   lambda: ta.stack((f64, f64))]
+            for op in ops:
+                # warm up any caches first
+                op()
+                tracemalloc.start()
+                rval = op()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                self.assertEqual(rval.dtype, np.float32)
+                # no float64 temporary of the full result
+                self.assertLess(peak, 1.5 * rval.base.nbytes)
+            self.assertEqual(ta.mean(self.i64.table).dtype, np.float32)
+            self.assertTrue(np.allclose((f64 * f64).base, f64.base ** 2))
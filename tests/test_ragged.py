@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:31:09 2026
+
+@author: chris
+"""
+
+import numpy as np
+import unittest
+
+import tablarray as ta
+
+
+def _rows():
+    return [[np.array([i, j], dtype=float) for j in range(i % 4)]
+            for i in range(6)]
+
+
+class Test_RaggedTablArray(unittest.TestCase):
+    """show ragged rows match their padded TablArray, without padding"""
+
+    def setUp(self):
+        self.rows = _rows()
+        self.r = ta.RaggedTablArray.from_rows(self.rows)
+
+    def test_storage(self):
+        r = self.r
+        self.assertEqual(r.nrows, 6)
+        self.assertEqual(r.cshape, (2,))
+        self.assertEqual(r.values.shape, (sum(i % 4 for i in range(6)), 2))
+        self.assertTrue(np.all(r.lengths == [0, 1, 2, 3, 0, 1]))
+        self.assertTrue(np.all(r[2].base == np.array(self.rows[2])))
+        self.assertEqual(r[0].ts.tshape, (0,))
+        with self.assertRaises(ValueError):
+            ta.RaggedTablArray(np.ones((3, 2)), [0, 2])
+
+    def test_padded(self):
+        a = self.r.to_padded(blank=-1)
+        self.assertEqual(a.ts.tshape, (6, 3))
+        self.assertEqual(a.base[3, 2, 1], 2)
+        self.assertEqual(a.base[1, 1, 0], -1)
+        r2 = ta.RaggedTablArray.from_padded(a, self.r.lengths)
+        self.assertTrue(np.all(r2.values == self.r.values))
+
+    def test_elementwise(self):
+        r = self.r
+        r2 = np.sqrt(2 * r + 1) - r
+        self.assertIsInstance(r2, ta.RaggedTablArray)
+        self.assertTrue(np.allclose(
+            r2.values, np.sqrt(2 * r.values + 1) - r.values))
+        self.assertTrue(np.all((r > 1).values == (r.values > 1)))
+        with self.assertRaises(ValueError):
+            r + ta.RaggedTablArray(np.ones((1, 2)), [0, 1])
+
+    def test_broadcast_ta(self):
+        r = self.r
+        # one cell per row is repeated across that row
+        per_row = ta.TablArray(np.arange(12.).reshape(6, 2), 1)
+        rval = (r + per_row).to_padded(blank=np.nan)
+        answer = r.to_padded(blank=np.nan).base + per_row.base[:, None]
+        self.assertTrue(np.allclose(rval.base, answer, equal_nan=True))
+        # cdim=0 per row against cdim=1 cells
+        scale = ta.TablArray(np.arange(6.), 0)
+        self.assertTrue(np.allclose(
+            (r * scale)[3].base, np.array(self.rows[3]) * 3))
+        # tdim=0 acts like one cell
+        cell = ta.TablArray(np.array([1., -1.]), 1)
+        self.assertTrue(np.allclose((r * cell).values,
+                                    r.values * [1, -1]))
+        with self.assertRaises(ValueError):
+            r + ta.TablArray(np.ones((4, 2)), 1)
+
+    def test_operand_order(self):
+        r = self.r
+        per_row = ta.TablArray(np.arange(12.).reshape(6, 2), 1)
+        scale = ta.TablArray(np.arange(6.), 0)
+        for left, right in [(per_row + r, r + per_row),
+                            (scale * r, r * scale),
+                            (ta.add(per_row, r), np.add(r, per_row)),
+                            (per_row - r, -(r - per_row))]:
+            self.assertIsInstance(left, ta.RaggedTablArray)
+            self.assertTrue(np.allclose(left.values, right.values))
+
+    def test_reductions(self):
+        r = self.r
+        for method, func in [('sum', np.sum), ('max', np.max),
+                             ('min', np.min), ('mean', np.mean)]:
+            rval = getattr(r, method)()
+            self.assertEqual(rval.ts.tshape, (6,))
+            self.assertEqual(rval.ts.cdim, 1)
+            for i, row in enumerate(self.rows):
+                if row:
+                    self.assertTrue(np.allclose(rval.base[i],
+                                                func(row, axis=0)))
+        self.assertTrue(np.all(r.sum().base[0] == 0))
+        self.assertTrue(np.all(np.isnan(r.mean().base[4])))
+        self.assertTrue(np.all(np.isnan(r.max().base[0])))
+
+    def test_empty_reductions(self):
+        r = ta.RaggedTablArray(np.empty((0, 2)), [0, 0, 0])
+        for method in ['sum', 'prod', 'max', 'min', 'mean']:
+            rval = getattr(r, method)()
+            self.assertEqual(rval.ts.tshape, (2,))
+            self.assertEqual(rval.ts.cshape, (2,))
+        self.assertTrue(np.all(np.isnan(r.max().base)))
+        self.assertTrue(np.all(r.prod().base == 1))
+        # small ints sum like numpy, in the default int
+        i8 = ta.RaggedTablArray(np.ones(3, dtype=np.int8), [0, 3, 3])
+        self.assertEqual(i8.sum().dtype, np.sum(i8.values).dtype)
+        self.assertEqual(i8.max(blank=0).dtype, np.int8)
+
+
+if __name__ == '__main__':
+    unittest.main()
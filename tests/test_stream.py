@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:24:37 2026
+
+@author: chris
+"""
+
+import numpy as np
+import unittest
+
+import tablarray as ta
+
+
+class Test_ReduceChunks(unittest.TestCase):
+
+    def setUp(self):
+        base = np.random.randn(50, 7, 3)
+        base[3, 2, 1] = np.nan
+        self.a = ta.TablArray(base, 1)
+        self.clean = ta.TablArray(np.random.randn(50, 7, 3), 1)
+
+    def check(self, name, a, axis, view='table', **kwargs):
+        func = getattr(ta, name)
+        answer = func(a, axis=axis, view=view, **kwargs)
+        rval = ta.reduce_chunks(name, a, axis=axis, view=view, chunk=40,
+                                **kwargs)
+        self.assertEqual(type(rval), type(answer), name)
+        if ta.istablarray(answer):
+            self.assertEqual(rval.ts, answer.ts, name)
+        self.assertTrue(np.allclose(ta.base(rval), ta.base(answer),
+                                    equal_nan=True), name)
+
+    def test_streamed_axis(self):
+        for name in ['sum', 'prod', 'min', 'max', 'mean', 'var', 'std',
+                     'argmin', 'argmax']:
+            self.check(name, self.clean, 0)
+        for name in ['nansum', 'nanmin', 'nanmax', 'nanmean', 'nanvar',
+                     'nanstd', 'nanargmin', 'nanargmax']:
+            self.check(name, self.a, 0)
+        for name in ['sum', 'mean', 'std', 'max']:
+            self.check(name, self.clean, None)
+        self.check('var', self.clean, 0, ddof=1)
+
+    def test_other_axes(self):
+        for name in ['sum', 'mean', 'std', 'argmax']:
+            self.check(name, self.clean, 1)
+            self.check(name, self.clean, 0, view='cell')
+
+    def test_generator(self):
+        pieces = (ta.TablArray(self.clean.base[i:i + 15], 1)
+                  for i in range(0, 50, 15))
+        rval = ta.reduce_chunks(np.argmax, pieces, axis=0, chunk=21 * 2)
+        self.assertTrue(np.all(rval.base == np.argmax(self.clean.base, 0)))
+        with self.assertRaises(ValueError):
+            ta.reduce_chunks('median', self.clean, axis=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,7 @@ Created on Sun May  3 15:37:48 2020
 @author: chris
 """
 
+import copy
 import numpy as np
 import unittest
 
@@ -43,3 +44,331 @@ class Test_ATC2(unittest.TestCase):
         self.theta = np.linspace(0, np.pi, 16)
         self.R = np.linspace(1, 8, 16)
         
+
+
+class Test_Broadcast_to(unittest.TestCase):
+    """show broadcast views match tiled copies without the memory"""
+    def setUp(self):
+        self.x = ta.TablArray(np.linspace(-2, 2, 4), 0)
+        self.y = ta.TablArray(np.linspace(-1.5, 1.5, 3).reshape(3, 1), 0)
+        self.tset = ta.TablaSet(x=self.x, y=self.y)
+
+    def test_meshtile_view(self):
+        for key in ['x', 'y']:
+            copied = self.tset.meshtile(key)
+            viewed = self.tset.meshtile(key, copy=False)
+            self.assertEqual(viewed.ts.tshape, (3, 4))
+            self.assertTrue(np.array_equal(copied.base, viewed.base))
+            self.assertFalse(viewed.base.flags.writeable)
+            self.assertTrue(np.shares_memory(viewed.base, self.tset[key].base))
+
+    def test_broadcast_to_cell(self):
+        E = ta.TablArray(np.random.randn(3, 2), 1)
+        E2 = ta.broadcast_to(E.cell, (4, 2))
+        self.assertEqual(E2.ts.cdim, 2)
+        self.assertTrue(np.array_equal(E2.base[:, 3], E.base))
+
+
+class Test_NumpyProtocols(unittest.TestCase):
+    """show numpy calls keep TablArray broadcasting and cdim"""
+
+    def setUp(self):
+        self.a = ta.TablArray(np.random.randn(3, 4, 2), 1)
+        self.b = ta.TablArray(np.random.randn(4, 1), 1)
+
+    def test_ufunc(self):
+        rval = np.add(self.a, self.b)
+        self.assertEqual(rval.ts.cdim, 1)
+        self.assertTrue(np.allclose(rval.base, (self.a + self.b).base))
+        self.assertEqual(np.sin(self.a).ts.cdim, 1)
+        self.assertEqual(np.multiply(self.a, self.b, dtype=np.float32).dtype,
+                         np.float32)
+
+    def test_ufunc_out_where(self):
+        out = ta.zeros((3, 4, 2), 1)
+        self.assertIs(np.multiply(self.a, self.b, out=out), out)
+        self.assertTrue(np.allclose(out.base, (self.a * self.b).base))
+        out = ta.zeros((3, 4, 2), 1)
+        mask = self.a > 0
+        np.add(self.a, 1, out=out, where=mask)
+        answer = np.where(mask.base, self.a.base + 1, 0)
+        self.assertTrue(np.allclose(out.base, answer))
+
+    def test_function(self):
+        self.assertEqual(np.sum(self.a).ts.cdim, 0)
+        self.assertEqual(np.mean(self.a.table, axis=0).ts.tshape, (4,))
+        self.assertEqual(np.add.reduce(self.a.table).ts.tshape, (4,))
+        m = ta.TablArray(np.eye(2) * np.arange(1, 4)[:, None, None], 2)
+        self.assertEqual(np.linalg.inv(m).ts.cdim, 2)
+        # without a TablArray version, numpy works on .base
+        self.assertEqual(np.concatenate([self.a, self.a]).shape, (6, 4, 2))
+
+    def test_shape_follows_view(self):
+        a = self.a
+        for func in [np.shape, np.size, np.ndim, ta.shape, ta.size]:
+            self.assertEqual(func(a), func(a.base[0, 0]))
+            self.assertEqual(func(a.table), func(a.base[..., 0]))
+        self.assertEqual(np.size(a.table, 1), 4)
+
+
+class Test_ViewCache(unittest.TestCase):
+    """show cached views stay consistent with their TablArray"""
+
+    def test_cache(self):
+        a = ta.TablArray(np.ones((4, 3, 2)), 1)
+        self.assertIs(a.cell, a.cell)
+        self.assertEqual(a.table.shape, (4, 3))
+        self.assertEqual(a.cell.shape, (2,))
+        self.assertEqual(a.array.size, 24)
+        # a cached view altered by setview is not reused
+        a.cell.setview('table')
+        self.assertEqual(a.cell.view, 'cell')
+        # nor after .base is replaced
+        cell = a.cell
+        a.base = np.zeros((4, 3, 2))
+        self.assertIsNot(a.cell, cell)
+        self.assertIs(a.cell.base, a.base)
+        with self.assertRaises(ValueError):
+            a.setview('tabel')
+
+
+class Test_taShape(unittest.TestCase):
+    """show taShape is an immutable, interned value"""
+
+    def test_interned(self):
+        import copy
+        import pickle
+        ts = ta.tashape.taShape((4, 3, 2), 1)
+        self.assertIs(ts, ta.tashape.taShape([4, 3, np.int64(2)], 1))
+        self.assertIs(ts, ta.TablArray(np.ones((4, 3, 2)), 1).ts)
+        self.assertEqual((ts.tsize, ts.csize, ts.tdim), (12, 2, 2))
+        self.assertEqual({ts: 1}[ta.tashape.taShape((4, 3, 2), 1)], 1)
+        self.assertNotEqual(ts, ta.tashape.taShape((4, 3, 2), 2))
+        self.assertIs(copy.deepcopy(ts), ts)
+        self.assertIs(pickle.loads(pickle.dumps(ts)), ts)
+        with self.assertRaises(AttributeError):
+            ts.cdim = 2
+
+
+class Test_FastPath(unittest.TestCase):
+    """show the fast dispatch path gives the same TablArray results"""
+
+    def test_istablarray(self):
+        a = ta.TablArray(np.ones((4, 3)), 1)
+        self.assertTrue(ta.misc.istablarray(a))
+        self.assertTrue(ta.misc.istablarray(a.table))
+        self.assertFalse(ta.misc.istablarray(a.base))
+        self.assertFalse(ta.misc.istablarray(2.0))
+
+    def test_results(self):
+        a = ta.TablArray(np.random.randn(4, 3), 1)
+        b = ta.TablArray(np.random.randn(3), 1)
+        for rval, answer in [(a + b, a.base + b.base),
+                             (2 * a.table, 2 * a.base),
+                             (ta.sqrt(abs(a)), np.sqrt(abs(a.base)))]:
+            self.assertEqual(rval.ts.cdim, 1)
+            self.assertTrue(np.allclose(rval.base, answer))
+        self.assertEqual((2 * a.table).view, 'table')
+        # without tabular dims, results are still plain arrays
+        self.assertIs(type(b * 2), np.ndarray)
+
+    def test_ndarray_operand(self):
+        a = ta.TablArray(np.random.randn(4, 1, 3), 1)
+        for v in [np.arange(3.), np.ones((2, 1))]:
+            rval = a * v
+            with ta.precision(report='warn'):
+                # any active feature takes the full path
+                answer = a * v
+            self.assertIs(rval.ts, answer.ts)
+            np.testing.assert_array_equal(rval.base, answer.base)
+        self.assertEqual(ta.misc._active_features, set())
+
+    def test_int_index(self):
+        a = ta.TablArray(np.random.randn(4, 3, 2), 1)
+        for view in ['cell', 'table', 'array']:
+            rval = getattr(a, view)[1]
+            answer = getattr(a, view)[np.int64(1)]
+            self.assertEqual(rval.ts, answer.ts)
+            self.assertEqual(rval.view, view)
+            np.testing.assert_array_equal(rval.base, answer.base)
+        # without tabular dims left, a plain array
+        self.assertIs(type(a.table[1].table[0]), np.ndarray)
+        self.assertEqual(a.table[1].cell[0].ts.tshape, (3,))
+
+
+class Test_Ragged(unittest.TestCase):
+    """show ragged lists are padded with blank"""
+
+    def test_from_listarray(self):
+        lla = [[np.array([i, j]) for j in range(i % 4)] for i in range(6)]
+        a = ta.TablArray.from_listarray(lla, blank=-1, dtype=int)
+        self.assertEqual(a.ts.tshape, (6, 3))
+        self.assertEqual(a.ts.cshape, (2,))
+        answer = np.full((6, 3, 2), -1)
+        for i, row in enumerate(lla):
+            for j, cell in enumerate(row):
+                answer[i, j] = cell
+        self.assertTrue(np.all(a.base == answer))
+
+    def test_from_layered(self):
+        lld = [[{'x': i, 'y': np.array([i, j])} for j in range(i % 3 + 1)]
+               for i in range(4)]
+        dataset = ta.TablaSet.from_layered(lld, blank=-1, dtype=int)
+        self.assertEqual(dataset['x'].ts.tshape, (4, 3))
+        self.assertEqual(dataset['y'].base[2, 2, 1], 2)
+        self.assertEqual(dataset['y'].base[3, 1, 1], -1)
+
+
+class Test_Extract(unittest.TestCase):
+    """show extract picks whole cells by a tabular mask"""
+
+    def test_extract(self):
+        a = ta.TablArray(np.random.randn(4, 3, 2), 1)
+        mask = a.base[..., 0] > 0
+        cells, index = ta.extract(mask, a, return_index=True)
+        self.assertEqual(cells.ts.cdim, 1)
+        self.assertTrue(np.all(cells.base == a.base[mask]))
+        # scatter back into a table of the same shape
+        b = ta.TablArray(np.zeros((4, 3, 2)), 1)
+        b.table[index] = cells
+        self.assertTrue(np.all(b.base[mask] == a.base[mask]))
+        self.assertTrue(np.all(b.base[~mask] == 0))
+        self.assertTrue(np.all(a.table.compress(mask).base == cells.base))
+        self.assertTrue(np.all(np.extract(mask, a).base == cells.base))
+
+    def test_degenerate(self):
+        # a mask over axis 1 and a table degenerate on axis 0
+        a = ta.TablArray(np.random.randn(1, 3, 2), 1)
+        mask = np.array([[True], [False], [True], [True]])
+        cells, index = ta.extract(mask, a, return_index=True)
+        answer = np.broadcast_to(a.base, (4, 3, 2))[
+            np.broadcast_to(mask, (4, 3))]
+        self.assertEqual(cells.ts.tshape, (9,))
+        self.assertTrue(np.all(cells.base == answer))
+        self.assertEqual(len(index), 2)
+        with self.assertRaises(ValueError):
+            ta.extract(ta.TablArray(np.ones((4, 3, 2), bool), 1), a)
+
+
+class Test_CopyOnWrite(unittest.TestCase):
+    """show copy-on-write copies share .base until one is written"""
+
+    def test_default_copies(self):
+        a = ta.TablArray(np.zeros((4, 2)), 1)
+        b = copy.copy(a)
+        self.assertIsNot(b.base, a.base)
+
+    def test_share_until_write(self):
+        a = ta.TablArray(np.zeros((4, 2)), 1)
+        with ta.copyonwrite():
+            b = copy.copy(a)
+            c = copy.copy(b)
+        self.assertIs(b.base, a.base)
+        self.assertIs(c.base, a.base)
+        # write through a view of the original
+        table = a.table
+        table[0] = ta.TablArray(np.ones(2), 1)
+        self.assertTrue(np.all(a.base[0] == 1))
+        self.assertTrue(np.all(b.base == 0))
+        self.assertIs(c.base, b.base)
+        # in-place op on a copy, the last sharer writes in place
+        b += 2
+        self.assertTrue(np.all(b.base == 2))
+        self.assertTrue(np.all(c.base == 0))
+        base = c.base
+        np.add(c, 1, out=c)
+        self.assertIs(c.base, base)
+        self.assertTrue(np.all(c.base == 1))
+
+    def test_nested_views(self):
+        a = ta.TablArray(np.zeros((4, 2)), 1)
+        nested = a.cell.table
+        with ta.copyonwrite():
+            b = copy.copy(a)
+        a.cell[0] = 1
+        self.assertIs(nested.base, a.base)
+        self.assertTrue(np.all(nested.base[:, 0] == 1))
+        self.assertTrue(np.all(b.base == 0))
+
+    def test_released_copies(self):
+        a = ta.TablArray(np.zeros((4, 2)), 1)
+        with ta.copyonwrite():
+            b = copy.copy(a)
+            c = copy.copy(b)
+        del b, c
+        # the last sharer writes in place
+        base = a.base
+        a += 1
+        self.assertIs(a.base, base)
+
+    def test_out_routes(self):
+        a = ta.TablArray(np.ones((4, 2, 2)), 2)
+        row = ta.TablArray(np.ones((1, 2)), 2)
+        routes = [
+            lambda b: ta.exp(b, out=b),
+            lambda b: ta.add(b, 1., out=b),
+            lambda b: ta.add(b, b, out=b),
+            lambda b: ta.matmul(a, a, out=b),
+            lambda b: ta.add(b, row, out=b)]
+        for route in routes:
+            with ta.copyonwrite():
+                b = copy.copy(a)
+            route(b)
+            self.assertTrue(np.all(a.base == 1))
+            self.assertFalse(np.all(b.base == 1))
+        with ta.execution(threshold=2, blocksize=2):
+            with ta.copyonwrite():
+                b = copy.copy(a)
+            ta.add(b, 1., out=b)
+        self.assertTrue(np.all(a.base == 1))
+        self.assertTrue(np.all(b.base == 2))
+        with ta.lazy():
+            with ta.copyonwrite():
+                b = copy.copy(a)
+            ta.add(a, 1., out=b)
+        self.assertTrue(np.all(a.base == 1))
+        self.assertTrue(np.all(b.base == 2))
+
+    def test_tablaset_snapshot(self):
+        x = ta.TablArray(np.linspace(0, 1, 5), 0)
+        E = ta.TablArray(np.zeros((5, 2)), 1)
+        tset = ta.TablaSet(x=x, E=E)
+        with ta.copyonwrite():
+            snapshot = copy.copy(tset)
+        self.assertIs(snapshot['E'].base, tset['E'].base)
+        self.assertEqual(snapshot.ts, tset.ts)
+        E.cell[0] = 3
+        self.assertTrue(np.all(tset['E'].base[:, 0] == 3))
+        self.assertTrue(np.all(snapshot['E'].base == 0))
+        snapshot['x'].table[0] = -1
+        self.assertEqual(x.base[0], 0)
+
+
+class Test_Layout(unittest.TestCase):
+
+    def test_as_layout(self):
+        a = ta.TablArray(np.random.randn(5, 4, 3), 1)
+        self.assertEqual(ta.layout(a), 'table-major')
+        self.assertIs(ta.as_layout(a, 'table-major'), a)
+        b = ta.as_layout(a.table, 'cell-major')
+        self.assertEqual(ta.layout(b), 'cell-major')
+        self.assertEqual(b.view, 'table')
+        self.assertEqual(b.ts, a.ts)
+        self.assertTrue(np.all(b.base == a.base))
+        self.assertTrue(b.cell[0].base.flags.c_contiguous)
+        c = ta.as_layout(b, 'table-major')
+        self.assertTrue(c.base.flags.c_contiguous)
+        with self.assertRaises(ValueError):
+            ta.as_layout(a, 'diagonal')
+
+    def test_ops_keep_layout(self):
+        a = ta.zeros((6, 5, 2), 1, layout='cell-major')
+        self.assertEqual(ta.layout(a), 'cell-major')
+        a.cell[0] = 1.
+        for rval in [ta.sqrt(a + 1), 2 * a, copy.copy(a)]:
+            self.assertEqual(ta.layout(rval), 'cell-major')
+        with ta.execution(threshold=0, blocksize=10):
+            rval = a * a + a
+        self.assertEqual(ta.layout(rval), 'cell-major')
+        self.assertTrue(np.all(rval.base[..., 0] == 2))
+        self.assertIn('[2. 0.]', str(rval))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:21:45 2026
+
+@author: chris
+"""
+
+import os
+import tempfile
+import numpy as np
+import unittest
+
+import tablarray as ta
+
+
+class Test_Memmap(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'field.npy')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip(self):
+        a = ta.TablArray(np.random.randn(5, 4, 3), 1, 'table')
+        ta.save_memmap(a, self.path)
+        b = ta.TablArray.open_memmap(self.path, 'r')
+        self.assertIsInstance(b.base, np.memmap)
+        self.assertEqual(b.ts, a.ts)
+        self.assertEqual(b.view, 'table')
+        self.assertTrue(np.all(b.base == a.base))
+        # plain numpy can read the buffer
+        self.assertTrue(np.all(np.load(self.path) == a.base))
+        # wrappers work unchanged
+        self.assertTrue(np.allclose(ta.sum(b.cell).base, a.base.sum(-1)))
+        self.assertTrue(np.allclose((b + a).base, 2 * a.base))
+
+    def test_write_through(self):
+        a = ta.open_memmap(self.path, 'w+', shape=(6, 2), dtype=np.float32,
+                           cdim=1)
+        a.table[2:4] = ta.TablArray(np.ones(2), 1)
+        a.base.flush()
+        del a
+        b = ta.open_memmap(self.path, 'r+')
+        self.assertEqual(b.dtype, np.float32)
+        self.assertEqual(b.ts.cdim, 1)
+        self.assertTrue(np.all(b.base[2:4] == 1))
+        self.assertTrue(np.all(b.base[:2] == 0))
+        self.assertEqual(ta.read_header(self.path)['shape'], (6, 2))
+
+
+class Test_SaveSet(unittest.TestCase):
+
+    def test_roundtrip(self):
+        x = ta.TablArray(np.linspace(-2, 2, 4), 0)
+        y = ta.TablArray(np.linspace(-1.5, 1.5, 3).reshape(3, 1), 0)
+        E = ta.TablArray(np.random.randn(3, 4, 2), 1)
+        dataset = ta.TablaSet(x=x, y=y, E=E)
+        with tempfile.TemporaryDirectory() as tmp:
+            dataset.save(tmp)
+            for lazy in [True, False]:
+                loaded = ta.TablaSet.load(tmp, lazy=lazy)
+                self.assertEqual(list(loaded.keys()), ['x', 'y', 'E'])
+                self.assertEqual(loaded.ts, dataset.ts)
+                self.assertEqual(isinstance(loaded['E'].base, np.memmap),
+                                 lazy)
+                for key in ['x', 'y', 'E']:
+                    # degenerate axes keep their compact shape
+                    self.assertEqual(loaded[key].ts, dataset[key].ts)
+                    self.assertTrue(np.all(
+                        loaded[key].base == dataset[key].base))
+            # copy-on-write, changes do not reach the file
+            loaded = ta.TablaSet.load(tmp)
+            loaded['x'].base[0] = 100
+            self.assertEqual(ta.TablaSet.load(tmp)['x'].base[0], -2)
+
+
+if __name__ == '__main__':
+    unittest.main()